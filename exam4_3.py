@@ -1,41 +1,670 @@
-
+import argparse
+import atexit
+import bisect
+import csv
+import io
 import json
+import os
+import pickle
 import re
-from datetime import datetime
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from operator import itemgetter
+from datetime import date as calendar_date
+from itertools import chain, islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокування файлів між процесами недоступне
+    fcntl = None
+
+# Ключові поля записів у кожній колекції даних
+RECORD_KEYS = {"residents": "tax_id", "apartments": "number"}
+
+# Версія формату даних: 2 - квартири зберігають лише ІПН мешканців
+DATA_FORMAT = 2
+
+# Версія формату бінарного кешу; зміна версії робить старі кеші недійсними
+CACHE_VERSION = 1
+
+# Лічильник версій на початку знімка: {"version": N, ...}
+VERSION_PATTERN = re.compile(r'\s*\{\s*"version"\s*:\s*(\d+)')
+
+
+class _Stage:
+    """Вимірює тривалість одного етапу та додає її до статистики профілювальника."""
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+
+
+# Спільний порожній контекст для вимкненого профілювання: нічого не створює і не вимірює
+_NO_STAGE = nullcontext()
+
+
+class Instrumentation:
+    """ Instrumentation збирає тривалість етапів (перевірка, пошук, перебудова об'єктів,
+    сортування, збереження, звіт) та лічильники (записані байти, переглянуті записи).
+    За замовчуванням вимкнена: stage() повертає спільний порожній контекст,
+    а count() лише перевіряє прапорець."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Очищує зібрану статистику."""
+        self.stages = {}  # Етап -> [кількість викликів, загальний час, найдовший виклик]
+        self.counters = {}
+
+    def stage(self, name):
+        """Контекстний менеджер, що вимірює етап name: with profiler.stage("save"): ..."""
+        return _Stage(self, name) if self.enabled else _NO_STAGE
+
+    def record(self, name, seconds):
+        stats = self.stages.get(name)
+        if stats is None:
+            self.stages[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def count(self, name, amount=1):
+        """Збільшує лічильник name на amount."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counted(self, name, records):
+        """Ітератор по records, що додає кількість пройдених записів до лічильника name."""
+        if not self.enabled:
+            return iter(records)
+        return self._count_iter(name, records)
+
+    def _count_iter(self, name, records):
+        scanned = 0
+        try:
+            for record in records:
+                scanned += 1
+                yield record
+        finally:
+            self.count(name, scanned)
+
+    def measure(self, name):
+        """Декоратор: вимірює кожен виклик функції як етап name."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Stage(self, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Статистика у вигляді словника для збереження в JSON."""
+        return {
+            "stages": {name: {"calls": calls, "total_ms": total * 1000, "avg_ms": total / calls * 1000,
+                              "max_ms": longest * 1000}
+                       for name, (calls, total, longest) in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def dump(self, path):
+        """Зберігає статистику у файл JSON."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=4)
+
+    def report(self):
+        """Виводить статистику у стандартний вивід."""
+        snapshot = self.snapshot()
+        print("\n--- Профілювання ---")
+        for name, stats in snapshot["stages"].items():
+            print(f"{name:40} викликів: {stats['calls']:7d}, усього: {stats['total_ms']:10.3f} мс, "
+                  f"середнє: {stats['avg_ms']:8.3f} мс, макс.: {stats['max_ms']:8.3f} мс")
+        for name, value in snapshot["counters"].items():
+            print(f"{name:40} {value}")
+
+
+# Спільний профілювальник програми; вмикається пунктом меню або параметром --profile
+profiler = Instrumentation()
+
+
+def _number_key(number):
+    """Числовий ключ сортування за номером квартири; записи без номера йдуть у кінець."""
+    try:
+        return int(number)
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+def put_change(collection, record):
+    """Формує запис журналу про додавання або оновлення запису колекції."""
+    return {"op": "put", "collection": collection, "record": record}
+
+
+def delete_change(collection, key):
+    """Формує запис журналу про видалення запису колекції за ключем."""
+    return {"op": "delete", "collection": collection, "key": key}
+
+
+def apply_changes(data, changes):
+    """ Застосовує до даних список змін журналу (put/delete).
+    Зміни ідемпотентні, тому повторне застосування не псує дані.
+    Позиції записів зберігаються в словнику ключ -> позиція; видалений запис лише позначається
+    (None), а позначені записи прибираються одним проходом наприкінці - O(n + d) замість O(n·d)."""
+    positions = {}
+    for change in changes:
+        collection = change["collection"]
+        key_field = RECORD_KEYS[collection]
+        records = data.setdefault(collection, [])
+        if collection not in positions:
+            positions[collection] = {r[key_field]: i for i, r in enumerate(records)}
+        index = positions[collection]
+        if change["op"] == "put":
+            record = change["record"]
+            key = record[key_field]
+            if key in index:
+                records[index[key]] = record  # Оновлюємо існуючий запис на місці
+            else:
+                index[key] = len(records)
+                records.append(record)
+        elif change["op"] == "delete":
+            position = index.pop(change["key"], None)
+            if position is not None:
+                records[position] = None  # Позначка видалення
+    for collection in positions:
+        records = data[collection]
+        if len(positions[collection]) != len(records):
+            records[:] = [record for record in records if record is not None]
+
+
+def migrate_to_normalized(data):
+    """ Переводить дані зі старого формату (повні копії мешканців у квартирах)
+    до нормалізованого: квартири містять лише ІПН, а записи мешканців зберігаються
+    в одному місці. Посилання, що суперечать полю apartment мешканця, відкидаються."""
+    residents = {r["tax_id"]: r for r in data["residents"]}
+    for apartment in data["apartments"]:
+        tax_ids = []
+        for entry in apartment.get("residents", []):
+            if isinstance(entry, dict):
+                tax_id = entry["tax_id"]
+                if tax_id not in residents:
+                    # Мешканець існував лише всередині квартири - переносимо його до списку
+                    residents[tax_id] = dict(entry, apartment=entry.get("apartment", apartment["number"]))
+                    data["residents"].append(residents[tax_id])
+            else:
+                tax_id = entry
+            resident = residents.get(tax_id)
+            if resident is not None and resident.get("apartment") != apartment["number"]:
+                continue
+            if tax_id not in tax_ids:
+                tax_ids.append(tax_id)
+        apartment["residents"] = tax_ids
+    data["format"] = DATA_FORMAT
+    return data
+
+
+# Колекції, які потоковий режим читає та записує по одному запису
+STREAMED_COLLECTIONS = ("residents", "apartments")
+
+
+class JsonStreamReader:
+    """ JsonStreamReader поступово читає JSON-документ {"ключ": значення, ...} частинами
+    по chunk_size символів. Елементи масивів residents та apartments декодуються по одному
+    (json raw_decode), тому в пам'яті одночасно є лише частина тексту файлу та один запис."""
+    WHITESPACE = re.compile(r"[ \t\r\n]*")
+    NUMBER = re.compile(r"[-+0-9.eE]*")  # Символи, з яких може складатися число JSON
+
+    def __init__(self, stream, chunk_size=1 << 16):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0  # Позиція першого непрочитаного символу в буфері
+        self.eof = False
+
+    def _fill(self):
+        """Дочитує наступну частину файлу, відкидаючи вже прочитаний початок буфера."""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def _peek(self):
+        """Пропускає пробільні символи та повертає наступний символ ('' в кінці файлу)."""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def _expect(self, chars):
+        """Читає один із символів chars (розділювач або дужку) і повертає його."""
+        char = self._peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Очікувався один із символів {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def _value(self):
+        """Декодує наступне значення; якщо воно обірване межею частини, дочитує файл."""
+        self._peek()
+        while True:
+            # Число, що доходить до кінця буфера, могло обірватися ("-1." + "5e3") і розібралося б
+            # частково - спочатку дочитуємо. Обірвані рядки, масиви й літерали дають помилку розбору.
+            if not self.eof and self.NUMBER.match(self.buffer, self.pos).end() == len(self.buffer):
+                self._fill()
+                continue
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self, streamed=STREAMED_COLLECTIONS):
+        """ Генерує пари (ключ, значення) верхнього рівня документа.
+        Для ключів зі streamed значення має бути масивом, і пара генерується для кожного елемента."""
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in streamed:
+                self._expect("[")
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                yield key, self._value()
+            if self._expect(",}") == "}":
+                return
+
+
+def write_json_stream(data, file):
+    """ Записує дані у JSON по одному запису в рядку, не будуючи весь текст у пам'яті.
+    Результат - звичайний JSON, який читає і json.load, і JsonStreamReader."""
+    file.write("{")
+    for position, (key, value) in enumerate(data.items()):
+        file.write(",\n" if position else "\n")
+        file.write(json.dumps(key, ensure_ascii=False) + ": ")
+        if isinstance(value, list):
+            file.write("[")
+            for index, record in enumerate(value):
+                file.write(",\n" if index else "\n")
+                file.write(json.dumps(record, ensure_ascii=False, default=to_serializable))
+            file.write("\n]")
+        else:
+            file.write(json.dumps(value, ensure_ascii=False, default=to_serializable))
+    file.write("\n}\n")
+
 
 # Клас для роботи з файлами
 class FileManager:
-    """ FileManager відповідає за завантаження та збереження даних у файл. """
-    def __init__(self, file_path):
+    """ FileManager відповідає за завантаження та збереження даних у файл.
+    У режимі журналу кожна зміна дописується рядком у JSON Lines файл поруч із основним,
+    а повний знімок перезаписується лише під час періодичного ущільнення.
+    З увімкненим кешем дані зберігаються ще й у бінарному знімку (pickle), який
+    використовується, доки розмір і час зміни файлу даних та журналу не змінилися.
+
+    Кілька процесів можуть працювати з одним файлом: запис виконується під ексклюзивним
+    блокуванням (fcntl) файлу <назва>.lock, читання - під спільним, тому читачі не чекають один на одного.
+    Поруч із файлом даних з'являються <назва>.lock і <назва>.cache.pickle - службові файли, які можна
+    не зберігати, та <назва>.journal.jsonl - зміни, ще не перенесені у знімок (до ущільнення це частина даних).
+    Знімок містить лічильник версій; якщо файл змінив інший процес, save() зливає
+    зміни з даними на диску і повертає об'єднані дані, які репозиторій має прийняти.
+
+    У потоковому режимі (streaming) файл читається частинами, а записи одразу стають
+    об'єктами моделі; знімок записується по одному запису в рядку."""
+    def __init__(self, file_path, journal=False, compact_every=1000, cache=False, streaming=False):
         self.file_path = file_path  # Шлях до файлу для зберігання даних
+        self.journal = journal  # Чи записувати зміни в журнал замість повного перезапису
+        self.journal_path = os.path.splitext(file_path)[0] + ".journal.jsonl"
+        self.compact_every = compact_every  # Кількість змін у журналі до ущільнення
+        self.journal_size = 0  # Кількість змін, записаних у журнал після останнього знімка
+        self.cache = cache  # Чи використовувати бінарний кеш для швидкого завантаження
+        self.cache_path = os.path.splitext(file_path)[0] + ".cache.pickle"
+        # Порожній файл блокування поруч із файлом даних. Він лишається після завершення роботи:
+        # видалення під час роботи інших процесів дало б їм різні блокування одного файлу.
+        self.lock_path = os.path.splitext(file_path)[0] + ".lock"
+        self.streaming = streaming  # Читати та записувати файл потоково, без повного тексту в пам'яті
+        self.version = 0  # Версія знімка, з якою працює цей процес
+        self._known_state = None  # (версія знімка, розмір журналу), відомі цьому процесу
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """Блокування файлу даних між процесами; без fcntl (Windows) працює без блокування."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _disk_version(self):
+        """Читає версію з початку знімка, не розбираючи весь файл."""
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                match = VERSION_PATTERN.match(file.read(64))
+        except FileNotFoundError:
+            return 0
+        return int(match.group(1)) if match else 0
+
+    def _disk_state(self):
+        """Поточний стан файлів на диску: (версія знімка, розмір журналу в байтах)."""
+        try:
+            journal_bytes = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            journal_bytes = 0
+        return self._disk_version(), journal_bytes
+
+    def _is_stale(self):
+        """Чи змінив файли інший процес після нашого останнього читання або запису."""
+        return self._known_state is not None and self._disk_state() != self._known_state
 
     def load(self):
         """ Завантажує дані з файлу. Якщо файл не знайдено або він містить некоректний JSON,
-        повертає порожній шаблон даних."""
+        повертає порожній шаблон даних. Після знімка відтворюються зміни з журналу."""
+        with self._locked(exclusive=False):
+            if self.cache:
+                data = self._load_cache()
+                if data is not None:
+                    self._known_state = self._disk_state()
+                    self.version = self._known_state[0]
+                    return data
+            data = self._read_unlocked()
+            # Підпис беремо під тим самим блокуванням, що й дані: інакше запис іншого процесу
+            # між читанням і записом кешу зберіг би старі дані з підписом нових файлів
+            signature = self._signature()
+        if self.cache:
+            self._write_cache(data, signature)
+        return data
+
+    def _read_unlocked(self):
+        """Читає знімок і відтворює журнал; викликається під блокуванням."""
         try:
             # Спроба завантажити дані з файлу
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                return json.load(file)  # Читаємо JSON-дані з файлу
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            data = self._read_snapshot()
+        except (FileNotFoundError, ValueError) as e:
             # Якщо файл не знайдено або не можна декодувати JSON, ініціалізуємо порожні дані
             print(f"Помилка завантаження даних: {e}")
-            return {"residents": [], "apartments": []}  # Повертаємо порожні дані
+            data = {"residents": [], "apartments": []}  # Повертаємо порожні дані
+        changes = self._read_journal()
+        apply_changes(data, changes)
+        self.journal_size = len(changes)
+        self._known_state = self._disk_state()
+        self.version = data.get("version", 0)
+        return data
+
+    def _read_snapshot(self):
+        """Читає знімок із файлу; формат файлу визначають цей метод і _dump_snapshot."""
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            # Читаємо JSON-дані з файлу: повністю або потоково, запис за записом
+            return self._read_stream(file) if self.streaming else json.load(file)
+
+    def _dump_snapshot(self, snapshot, path):
+        """Записує знімок у файл path і скидає його на диск."""
+        with open(path, 'w', encoding='utf-8') as file:
+            # Записуємо дані у файл; об'єкти моделі перетворюються на словники лише тут
+            if self.streaming:
+                write_json_stream(snapshot, file)
+            else:
+                json.dump(snapshot, file, ensure_ascii=False, indent=4, default=to_serializable)
+            file.flush()
+            os.fsync(file.fileno())
+            profiler.count("bytes_written", file.tell())
 
-    def save(self, data):
-        """ Зберігає дані у файл у форматі JSON """
+    @staticmethod
+    def _read_stream(file):
+        """Потоково читає знімок, перетворюючи кожен запис на об'єкт моделі одразу після декодування."""
+        data = {collection: [] for collection in STREAMED_COLLECTIONS}
+        for key, value in JsonStreamReader(file).items():
+            if key in RECORD_TYPES:
+                data[key].append(RECORD_TYPES[key].from_dict(value))
+            else:
+                data[key] = value
+        return data
+
+    def _signature(self):
+        """Розмір і час зміни файлу даних та журналу - за ними перевіряється актуальність кешу."""
+        signature = []
+        for path in (self.file_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_cache(self):
+        """Повертає дані з бінарного кешу або None, якщо кешу немає чи він застарів."""
         try:
-            # Спроба зберегти дані у файл
-            with open(self.file_path, 'w', encoding='utf-8') as file:
-                json.dump(data, file, ensure_ascii=False, indent=4)  # Записуємо дані у файл
+            with open(self.cache_path, 'rb') as cache:
+                version, signature, journal_size = pickle.load(cache)
+                if version != CACHE_VERSION or signature != self._signature():
+                    return None
+                data = pickle.load(cache)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+        self.journal_size = journal_size
+        return data
+
+    def _write_cache(self, data, signature):
+        """Записує бінарний кеш даних разом із підписом вихідних файлів, з яких їх прочитано."""
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as cache:
+                pickle.dump((CACHE_VERSION, signature, self.journal_size), cache, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, cache, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Помилка запису кешу: {e}")
+
+    def _read_journal(self):
+        """ Читає зміни з журналу. Пошкоджені рядки (зокрема неповний останній рядок після збою
+        під час запису) пропускаються; їх кількість повідомляється і рахується профілювальником.
+        Неповний рядок прибирається з файлу перед наступним дописуванням (_repair_journal)."""
+        changes = []
+        skipped = 0
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8', errors='replace') as journal:
+                for line in journal:
+                    try:
+                        changes.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        skipped += 1
+        except FileNotFoundError:
+            pass
+        if skipped:
+            print(f"Журнал {self.journal_path}: пропущено пошкоджених рядків: {skipped}.")
+            profiler.count("journal_lines_skipped", skipped)
+        return changes
+
+    def save(self, data, changes=None):
+        """ Зберігає дані у файл у форматі JSON. Якщо увімкнено журнал і передано зміни,
+        дописує лише їх, а повний знімок записує кожні compact_every змін.
+        Якщо файл тим часом змінив інший процес, зміни зливаються з даними на диску,
+        а об'єднані дані повертаються; інакше повертається None.
+        Помилка запису (OSError) виводиться і передається далі, щоб репозиторій міг відкотити зміни."""
+        try:
+            with self._locked():
+                stale = self._is_stale()
+                if self.journal and changes is not None:
+                    # Зміни в журналі - окремі записи, тож дописування не затирає чужих змін
+                    self._append_journal(changes)
+                    merged = self._read_unlocked() if stale else None
+                    if self.journal_size >= self.compact_every:
+                        self._write_snapshot(merged if merged is not None else data)
+                    return merged
+                if stale and changes is not None:
+                    # Перечитуємо дані з диску і застосовуємо до них лише наші зміни
+                    merged = self._read_unlocked()
+                    apply_changes(merged, changes)
+                    self._write_snapshot(merged)
+                    return merged
+                self._write_snapshot(data)
         except OSError as e:
             # Обробка помилки при записі у файл
             print(f"Помилка запису до файлу: {e}")
+            raise
+        return None
+
+    def _repair_journal(self):
+        """ Обрізає журнал до останнього повного рядка: неповний хвіст після збою інакше
+        склеївся б із наступним дописаним рядком і всі подальші зміни губилися б при читанні.
+        Викликається під ексклюзивним блокуванням."""
+        try:
+            journal = open(self.journal_path, 'r+b')
+        except FileNotFoundError:
+            return
+        with journal:
+            end = journal.seek(0, os.SEEK_END)
+            position = end
+            # Кожен запис закінчується переходом на новий рядок - шукаємо останній з кінця файлу
+            while position > 0:
+                start = max(0, position - 4096)
+                journal.seek(start)
+                newline = journal.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                journal.truncate(position)
+                journal.flush()
+                os.fsync(journal.fileno())
+                print(f"Журнал {self.journal_path}: відкинуто неповний останній рядок ({end - position} байт).")
+
+    def _append_journal(self, changes):
+        """Дописує зміни в журнал і скидає їх на диск."""
+        self._repair_journal()
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            start = journal.tell()
+            journal.write("".join(json.dumps(change, ensure_ascii=False, default=to_serializable) + "\n"
+                                  for change in changes))
+            journal.flush()
+            os.fsync(journal.fileno())
+            journal_bytes = journal.tell()
+        profiler.count("bytes_written", journal_bytes - start)
+        self.journal_size += len(changes)
+        if self._known_state is not None:
+            self._known_state = (self._known_state[0], journal_bytes)
+
+    def compact(self, data):
+        """ Записує повний знімок даних атомарно та очищує журнал.
+        Якщо файл змінив інший процес, знімок будується з актуальних даних на диску.
+        Помилка запису (OSError) виводиться і передається далі."""
+        try:
+            with self._locked():
+                self._write_snapshot(self._read_unlocked() if self._is_stale() else data)
+        except OSError as e:
+            print(f"Помилка запису до файлу: {e}")
+            raise
+
+    def _write_snapshot(self, data):
+        """ Записує знімок із новою версією через тимчасовий файл і os.replace; викликається під блокуванням."""
+        version = max(self.version, self._disk_version()) + 1
+        # Версія записується першою, щоб її можна було прочитати без розбору всього файлу
+        snapshot = {"version": version}
+        snapshot.update((key, value) for key, value in data.items() if key != "version")
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        # Спроба зберегти дані у файл
+        self._dump_snapshot(snapshot, temp_path)
+        os.replace(temp_path, self.file_path)
+        # Журнал видаляємо лише після успішної заміни знімка
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        data["version"] = self.version = version
+        self.journal_size = 0
+        self._known_state = (version, 0)
+        if self.cache:
+            self._write_cache(data, self._signature())
+
+
+def _to_int(value):
+    """Перетворює числове поле на int; порожні та нечислові значення лишаються як є."""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def _to_text(value):
+    """Перетворює числове поле назад на рядок для збереження у файлі."""
+    return str(value) if isinstance(value, int) else value
+
+
+def to_serializable(record):
+    """Перетворює об'єкт моделі на словник під час запису в JSON (параметр default для json.dump)."""
+    if isinstance(record, Record):
+        return record.to_dict()
+    raise TypeError(f"Об'єкт типу {type(record).__name__} не серіалізується в JSON")
+
+
+class Record:
+    """ Базовий клас компактних записів (__slots__ без __dict__).
+    Поля доступні і як атрибути, і як ключі словника (record["name"], record.get("name")),
+    тож код, що працював зі словниками, працює і з об'єктами моделі."""
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює запис зі словника; відсутні поля отримують значення None."""
+        return cls(**{field: data.get(field) for field in cls.__slots__})
+
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
 
 # Клас Мешканця
-class Resident:
+class Resident(Record):
     """
     Resident представляє мешканця із відповідними атрибутами.
     """
+    __slots__ = ("name", "tax_id", "birthdate", "phone", "email", "additional_info", "apartment")
+
     def __init__(self, name, tax_id, birthdate, phone, email, additional_info, apartment=None):
         self.name = name  # Ім'я мешканця
         self.tax_id = tax_id  # ІПН мешканця
@@ -64,31 +693,35 @@ class Resident:
         return False
 
 # Клас Квартири
-class Apartment:
-    """ Apartment представляє квартиру із відповідними атрибутами. """
+class Apartment(Record):
+    """ Apartment представляє квартиру із відповідними атрибутами.
+    Під'їзд, кількість поверхів, поверх і кількість кімнат зберігаються як цілі числа. """
+    __slots__ = ("number", "entrance", "floors", "floor", "rooms", "residents")
+
     def __init__(self, number, entrance, floors, floor, rooms, residents=None):
         self.number = number
-        self.entrance = entrance
-        self.floors = floors
-        self.floor = floor
-        self.rooms = rooms
-        self.residents = residents if residents is not None else []
+        self.entrance = _to_int(entrance)
+        self.floors = _to_int(floors)
+        self.floor = _to_int(floor)
+        self.rooms = _to_int(rooms)
+        self.residents = residents if residents is not None else []  # ІПН мешканців
 
     def add_resident(self, resident):
-        if not any(r["tax_id"] == resident.tax_id for r in self.residents):
-            self.residents.append(resident.to_dict())
+        """Додає ІПН мешканця до квартири (повні дані мешканця зберігаються окремо)."""
+        if resident.tax_id not in self.residents:
+            self.residents.append(resident.tax_id)
 
     def remove_resident(self, tax_id):
-        self.residents = [r for r in self.residents if r["tax_id"] != tax_id]
+        self.residents = [r for r in self.residents if r != tax_id]
 
     def to_dict(self):
         return {
             "number": self.number,
-            "entrance": self.entrance,
-            "floors": self.floors,
-            "floor": self.floor,
-            "rooms": self.rooms,
-            "residents": [resident.to_dict() if isinstance(resident, Resident) else resident
+            "entrance": _to_text(self.entrance),
+            "floors": _to_text(self.floors),
+            "floor": _to_text(self.floor),
+            "rooms": _to_text(self.rooms),
+            "residents": [resident.tax_id if isinstance(resident, Resident) else resident
                           for resident in self.residents]
         }
     def __eq__(self, other):
@@ -96,33 +729,714 @@ class Apartment:
         return isinstance(other, Apartment) and self.number == other.number
 
 
+# Класи моделі для записів кожної колекції
+RECORD_TYPES = {"residents": Resident, "apartments": Apartment}
+
+
+# Пошук мешканців: роздільник ключа та ІПН у впорядкованих масивах і найбільший символ (межа діапазону)
+_KEY_SEPARATOR = "\x00"
+_MAX_CHAR = "\U0010ffff"
+PHONE_DIGITS = 10  # Цифри номера без коду країни: 050-123-45-67
+PHONE_QUERY = re.compile(r"[\d\s()+-]+")
+NON_DIGITS = re.compile(r"\D")
+
+
+def _name_tokens(name):
+    """Слова імені у нижньому регістрі (однакові слова зберігаються в пам'яті один раз)."""
+    return [sys.intern(token) for token in str(name or "").casefold().replace(_KEY_SEPARATOR, "").split()]
+
+
+def _phone_key(phone):
+    """Цифри номера без коду країни: '+38-050-123-45-67' і '050-123-45-67' дають однаковий ключ."""
+    return NON_DIGITS.sub("", str(phone or ""))[-PHONE_DIGITS:]
+
+
+def _fuzzy_token(token):
+    """Опечатки шукаємо лише у словах з літерами довжиною від трьох символів."""
+    return len(token) >= 3 and not token.isdigit()
+
+
+def _trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(first, second, limit):
+    """Відстань Левенштейна між рядками; якщо вона більша за limit, повертає limit + 1."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        current = [i]
+        for j, other in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class _SortedKeys:
+    """ Впорядкований масив рядків "ключ\\x00ІПН". Пошук за префіксом ключа - бінарний пошук
+    за O(log n + k); вставка й видалення - bisect без пересортування."""
+    def __init__(self, entries=()):
+        self.entries = sorted(entries)
+
+    @staticmethod
+    def entry(key, tax_id):
+        return f"{key}{_KEY_SEPARATOR}{tax_id}"
+
+    def add(self, key, tax_id):
+        bisect.insort(self.entries, self.entry(key, tax_id))
+
+    def remove(self, key, tax_id):
+        entry = self.entry(key, tax_id)
+        position = bisect.bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def count(self, prefix):
+        """Кількість записів, ключ яких починається з prefix."""
+        return bisect.bisect_left(self.entries, prefix + _MAX_CHAR) - bisect.bisect_left(self.entries, prefix)
+
+    def find(self, prefix, exact=False):
+        """Генерує ІПН записів, ключ яких починається з prefix (або дорівнює йому, якщо exact)."""
+        start = prefix + _KEY_SEPARATOR if exact else prefix
+        for position in range(bisect.bisect_left(self.entries, start), len(self.entries)):
+            entry = self.entries[position]
+            if not entry.startswith(start):
+                break
+            yield entry.rpartition(_KEY_SEPARATOR)[2]
+
+
+class ResidentSearchIndex:
+    """ Індекс пошуку мешканців у пам'яті:
+    слова імен - впорядкований масив для пошуку за префіксом (замість дерева префіксів,
+    яке на мільйоні мешканців займає в рази більше пам'яті); триграми різних слів імен - для
+    пошуку з опечатками; телефон -> ІПН та email -> ІПН - для точного пошуку, а перевернуті
+    номери телефонів - для пошуку за кінцевими цифрами.
+    residents - словник ІПН -> мешканець репозиторію; зміни передаються через add/remove."""
+    def __init__(self, residents):
+        self._residents = residents
+        self._by_phone = {}  # Цифри телефону -> ІПН мешканців
+        self._by_email = {}  # Email у нижньому регістрі -> ІПН мешканців
+        self._token_counts = {}  # Слово імені -> кількість мешканців із ним
+        self._grams = {}  # Триграма -> слова імен, що її містять
+        names, phones = [], []
+        for resident in residents.values():
+            tokens, phone = self._add_maps(resident)
+            names += [_SortedKeys.entry(token, resident.tax_id) for token in tokens]
+            if phone:
+                phones.append(_SortedKeys.entry(phone[::-1], resident.tax_id))
+        self._names = _SortedKeys(names)
+        self._phones = _SortedKeys(phones)
+
+    def _add_maps(self, resident):
+        """Додає мешканця до словників; повертає його слова імені та ключ телефону для масивів."""
+        tokens = set(_name_tokens(resident.name))
+        for token in tokens:
+            self._token_counts[token] = self._token_counts.get(token, 0) + 1
+            if self._token_counts[token] == 1 and _fuzzy_token(token):
+                for gram in _trigrams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+        phone = _phone_key(resident.phone)
+        if phone:
+            self._by_phone.setdefault(phone, set()).add(resident.tax_id)
+        if resident.email:
+            self._by_email.setdefault(resident.email.casefold(), set()).add(resident.tax_id)
+        return tokens, phone
+
+    def add(self, resident):
+        """Додає мешканця до індексу."""
+        tokens, phone = self._add_maps(resident)
+        for token in tokens:
+            self._names.add(token, resident.tax_id)
+        if phone:
+            self._phones.add(phone[::-1], resident.tax_id)
+
+    def remove(self, resident):
+        """Прибирає мешканця з індексу (поля мешканця мають бути такими ж, як при додаванні)."""
+        tax_id = resident.tax_id
+        for token in set(_name_tokens(resident.name)):
+            self._names.remove(token, tax_id)
+            self._token_counts[token] -= 1
+            if not self._token_counts[token]:
+                del self._token_counts[token]
+                for gram in _trigrams(token) if _fuzzy_token(token) else ():
+                    self._grams[gram].discard(token)
+                    if not self._grams[gram]:
+                        del self._grams[gram]
+        phone = _phone_key(resident.phone)
+        if phone:
+            self._phones.remove(phone[::-1], tax_id)
+            self._discard(self._by_phone, phone, tax_id)
+        if resident.email:
+            self._discard(self._by_email, resident.email.casefold(), tax_id)
+
+    @staticmethod
+    def _discard(mapping, key, tax_id):
+        tax_ids = mapping.get(key)
+        if tax_ids is not None:
+            tax_ids.discard(tax_id)
+            if not tax_ids:
+                del mapping[key]
+
+    def search(self, query, limit=20, fuzzy=True):
+        """ Повертає ІПН мешканців, що відповідають запиту, у порядку релевантності:
+        запит з "@" - email (точний збіг); цифри - ІПН, номер телефону або його кінцеві цифри;
+        інакше - слова імені за префіксом, а якщо збігів менше за limit і fuzzy - слова з опечатками."""
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        if "@" in query:
+            return sorted(self._by_email.get(query.casefold(), ()))[:limit]
+        if PHONE_QUERY.fullmatch(query):
+            digits = NON_DIGITS.sub("", query)
+            found = [digits] if digits in self._residents else []
+            if len(digits) >= PHONE_DIGITS:
+                phones = sorted(self._by_phone.get(digits[-PHONE_DIGITS:], ()))
+            else:
+                phones = islice(self._phones.find(digits[::-1]), limit)
+            found += [tax_id for tax_id in phones if tax_id != digits]
+            return found[:limit]
+        tokens = _name_tokens(query)
+        found = self._search_prefix(tokens, limit)
+        if fuzzy and len(found) < limit:
+            found += self._search_fuzzy(tokens, limit - len(found), set(found))
+        return found
+
+    def _matches(self, tax_id, tokens):
+        """Чи кожне слово запиту є початком якогось слова імені мешканця."""
+        name = " " + " ".join(str(self._residents[tax_id].name or "").casefold().split())
+        return all(" " + token in name for token in tokens)
+
+    def _search_prefix(self, tokens, limit):
+        """Мешканці, у чиєму імені кожне слово запиту є початком якогось слова."""
+        # Кандидатів перебираємо за словом запиту з найвужчим діапазоном, решту слів перевіряємо
+        tokens = sorted(tokens, key=self._names.count)
+        found, seen = [], set()
+        for tax_id in self._names.find(tokens[0]):
+            if tax_id in seen:
+                continue
+            seen.add(tax_id)
+            if self._matches(tax_id, tokens[1:]):
+                found.append(tax_id)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _similar_tokens(self, token):
+        """Слова імен, схожі на token з точністю до опечаток: {слово: відстань редагування}."""
+        if not _fuzzy_token(token):
+            return {}
+        limit = 1 if len(token) < 6 else 2
+        grams = _trigrams(token)
+        shared = {}
+        for gram in grams:
+            for candidate in self._grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        # Кожна правка змінює не більше трьох триграм - відстань рахуємо лише для близьких слів
+        threshold = max(1, len(grams) - 3 * limit)
+        similar = {}
+        for candidate, count in shared.items():
+            if count >= threshold:
+                distance = _edit_distance(token, candidate, limit)
+                if distance <= limit:
+                    similar[candidate] = distance
+        return similar
+
+    def _search_fuzzy(self, tokens, limit, exclude):
+        """Мешканці, у чиєму імені кожне слово запиту - початок слова або слово з опечаткою."""
+        similar = [self._similar_tokens(token) for token in tokens]
+
+        def accepts(tax_id, position):
+            name_tokens = _name_tokens(self._residents[tax_id].name)
+            return any(name_token.startswith(tokens[position]) or name_token in similar[position]
+                       for name_token in name_tokens)
+
+        # Кандидатів перебираємо за словом запиту з найменшою кількістю схожих слів
+        driver = min(range(len(tokens)), key=lambda i: self._names.count(tokens[i]) + sum(
+            self._token_counts[token] for token in similar[i]))
+        closest = sorted(similar[driver], key=lambda token: (similar[driver][token], token))
+        candidates = chain(self._names.find(tokens[driver]),
+                           *(self._names.find(token, exact=True) for token in closest))
+        found, seen = [], set(exclude)
+        for tax_id in candidates:
+            if tax_id in seen:
+                continue
+            seen.add(tax_id)
+            if all(accepts(tax_id, position) for position in range(len(tokens)) if position != driver):
+                found.append(tax_id)
+                if len(found) >= limit:
+                    break
+        return found
+
+
+# Числові поля квартир, за якими будуються індекси діапазонів
+APARTMENT_RANGE_FIELDS = ("entrance", "floors", "floor", "rooms")
+
+
+def _value_range(condition):
+    """ Умова запиту -> межі (від, до) включно: число - точне значення,
+    пара (від, до) - діапазон, у якому будь-яку межу можна пропустити (None)."""
+    if isinstance(condition, (tuple, list)):
+        low, high = condition
+    else:
+        low = high = condition
+    return (float('-inf') if low is None else int(low)), (float('inf') if high is None else int(high))
+
+
+class _RangeIndex:
+    """ Вторинний індекс квартир за числовим полем: ключі (значення, ключ сортування квартири)
+    у впорядкованому масиві та квартири до них. Діапазон значень - два бінарні пошуки, O(log n + k).
+    Квартири з порожнім або нечисловим значенням поля до індексу не потрапляють."""
+    def __init__(self, field, apartments, sort_keys, sort_key):
+        self.field = field
+        self._sort_key = sort_key
+        # Квартири репозиторію вже впорядковані за ключами sort_keys, тож стабільне сортування
+        # за значенням поля дає порядок (значення, номер) без порівняння кортежів
+        values = [getattr(apartment, field) for apartment in apartments]
+        order = sorted((row for row, value in enumerate(values) if isinstance(value, int)), key=values.__getitem__)
+        self.keys = [(values[row], *sort_keys[row]) for row in order]
+        self.apartments = [apartments[row] for row in order]
+
+    def _key(self, apartment):
+        return (getattr(apartment, self.field), *self._sort_key(apartment))
+
+    def add(self, apartment):
+        if isinstance(getattr(apartment, self.field), int):
+            key = self._key(apartment)
+            position = bisect.bisect_left(self.keys, key)
+            self.keys.insert(position, key)
+            self.apartments.insert(position, apartment)
+
+    def remove(self, apartment):
+        if isinstance(getattr(apartment, self.field), int):
+            key = self._key(apartment)
+            position = bisect.bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+                del self.apartments[position]
+
+    def rows(self, start, stop):
+        """Пари (ключ сортування квартири, квартира) у позиціях [start, stop)."""
+        return ((key[1:], apartment) for key, apartment in zip(self.keys[start:stop], self.apartments[start:stop]))
+
+    def bounds(self, low, high):
+        """Позиції [початок, кінець) квартир зі значенням поля від low до high включно."""
+        # Значення цілі, тож кінець діапазону - позиція першого ключа зі значенням high + 1
+        return bisect.bisect_left(self.keys, (low,)), bisect.bisect_left(self.keys, (high + 1,))
+
+
+# Скільки елементів великого списку оцінюється, щоб наблизити його розмір
+SIZE_SAMPLE = 64
+
+
+def _estimate_size(value):
+    """ Приблизний розмір результату в пам'яті (sys.getsizeof разом із вкладеними значеннями), байт.
+    Розмір великого списку оцінюється за рівномірною вибіркою з SIZE_SAMPLE елементів."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(key) + _estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)) and len(value) > SIZE_SAMPLE:
+        step = len(value) / SIZE_SAMPLE
+        sample = sum(_estimate_size(value[int(i * step)]) for i in range(SIZE_SAMPLE))
+        size += sample * len(value) // SIZE_SAMPLE
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_estimate_size(item) for item in value)
+    elif isinstance(value, Record):
+        size += sum(_estimate_size(getattr(value, field)) for field in value.__slots__)
+    return size
+
+
+class ReportCache:
+    """ LRU-кеш результатів звітів та агрегатів. Запис дійсний, доки не змінилася ревізія
+    репозиторію (HouseRepository.revision збільшує кожна зміна даних), - застарілий запис
+    перераховується при наступному зверненні. Загальний розмір обмежено max_bytes:
+    при переповненні витісняються записи, до яких давно не зверталися.
+    Повернені результати спільні для всіх викликів - їх не слід змінювати."""
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # Ключ -> (ревізія, результат, розмір); найдавніші - на початку
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, revision, compute):
+        """Результат для ключа key і ревізії revision; якщо його немає в кеші, викликає compute()."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == revision:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = compute()
+        self.put(key, revision, value)
+        return value
+
+    def put(self, key, revision, value):
+        """Зберігає результат, витісняючи найдавніші записи, якщо кеш переповнено."""
+        size = _estimate_size(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            if size > self.max_bytes:
+                return  # Результат, більший за весь кеш, не зберігаємо
+            self._entries[key] = (revision, value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        """Очищає кеш і статистику."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Статистика кешу: влучання, промахи, витіснення, кількість записів і зайнята пам'ять."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / requests if requests else 0.0,
+                    "entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+# Режими збереження змін: після кожної операції, груповий запис у фоні, лише при виході
+DURABILITY_MODES = ("sync", "group", "exit")
+
+
+def _synchronized(method):
+    """Виконує метод репозиторію під його блокуванням, щоб фонове збереження не бачило напівзмінених даних."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 # Клас репозиторію для роботи з даними
 class HouseRepository:
     """
        HouseRepository містить основну логіку роботи з даними про мешканців та квартири.
+       Режим durability визначає, коли зміни потрапляють на диск:
+       "sync" - після кожної операції; "group" - фоновий потік зберігає накопичені зміни
+       через flush_interval секунд або одразу після flush_changes змін; "exit" - лише при
+       flush()/close() або завершенні програми.
        """
-    def __init__(self, file_path):
+    def __init__(self, file_path, journal=False, storage=None, lazy=False, cache=False,
+                 durability="sync", flush_interval=1.0, flush_changes=1000, streaming=False):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Невідомий режим збереження: {durability}")
         self.file_path = file_path  # Шлях до файлу
-        self.file_manager = FileManager(file_path)
-        self.data = self.file_manager.load() # Завантажуємо дані з файлу
+        # Сховище з інтерфейсом load/save; за замовчуванням - JSON-файл
+        self.file_manager = storage if storage is not None else FileManager(
+            file_path, journal=journal, cache=cache, streaming=streaming)
+        self._batch_depth = 0  # Глибина вкладених пакетних операцій
+        self._pending_changes = []  # Зміни, ще не передані сховищу
+        self._batch_undo = []  # Дії скасування змін пакетної операції, ще не записаних на диск
+        self.durability = durability
+        self.flush_interval = flush_interval  # Найдовша затримка групового запису, с
+        self.flush_changes = flush_changes  # Кількість змін, після якої груповий запис відбувається одразу
+        self._lock = threading.RLock()  # Захищає дані та відкладені зміни від фонового потоку
+        self._dirty = threading.Condition(self._lock)  # Сповіщає фоновий потік про нові зміни
+        self._flush_thread = None
+        self._closed = False
+        if durability != "sync":
+            atexit.register(self.close)  # Відкладені зміни не губляться при виході з програми
+        self.load_time = None  # Тривалість останнього завантаження даних, с
+        self.revision = 0  # Лічильник змін даних у пам'яті: за ним ReportCache визначає застарілі результати
+        self._data = None
+        if not lazy:
+            self._load()  # Завантажуємо дані з файлу; у лінивому режимі - при першому зверненні
+
+    def _load(self):
+        """Завантажує дані зі сховища та запам'ятовує тривалість завантаження."""
+        started = time.perf_counter()
+        self.data = self.file_manager.load()
+        self.load_time = time.perf_counter() - started
+
+    def _ensure_loaded(self):
+        """У лінивому режимі завантажує дані при першому зверненні."""
+        if self._data is None:
+            self._load()
+
+    @property
+    def data(self):
+        """Дані репозиторію: списки мешканців та квартир."""
+        self._ensure_loaded()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        """Замінює дані (наприклад, після перезавантаження з файлу) та перебудовує індекси.
+        Дані у старому форматі переводяться до нормалізованого, а словники - в об'єкти моделі."""
+        if value.get("format") != DATA_FORMAT:
+            migrate_to_normalized(value)
+        value["residents"] = [r if isinstance(r, Resident) else Resident.from_dict(r) for r in value["residents"]]
+        value["apartments"] = [a if isinstance(a, Apartment) else Apartment.from_dict(a) for a in value["apartments"]]
+        if self._data is not None:
+            self.revision += 1  # Перше завантаження даних не є зміною
+        self._data = value
+        self._rebuild_indexes()
+
+    # Поле, за яким упорядковано кожну колекцію: квартири - за номером, мешканці - за квартирою
+    SORT_FIELDS = {"residents": "apartment", "apartments": "number"}
+
+    def _rebuild_indexes(self):
+        """ Будує словникові індекси ІПН -> мешканець та номер -> квартира,
+        а також упорядковує списки та масиви ключів сортування до них."""
+        self._residents_by_tax_id = {}
+        for resident in self._data["residents"]:
+            self._residents_by_tax_id.setdefault(resident["tax_id"], resident)
+        self._apartments_by_number = {}
+        for apartment in self._data["apartments"]:
+            self._apartments_by_number.setdefault(apartment["number"], apartment)
+        self._search_index = None  # Індекс пошуку мешканців будується при першому пошуку
+        self._range_indexes = None  # Індекси діапазонів квартир - при першому запиті query_apartments
+        self._sort_keys = {}
+        for collection in self.SORT_FIELDS:
+            records = self._data[collection]
+            records.sort(key=lambda record: self._sort_key(collection, record))
+            self._sort_keys[collection] = [self._sort_key(collection, record) for record in records]
+
+    def _sort_key(self, collection, record):
+        """Ключ сортування запису: (номер квартири, ключ запису) - унікальний для кожного запису."""
+        return _number_key(record.get(self.SORT_FIELDS[collection])), record[RECORD_KEYS[collection]]
+
+    def _insert_sorted(self, collection, record):
+        """Вставляє запис у впорядкований список, знаходячи позицію бінарним пошуком."""
+        with profiler.stage("repository.sort"):
+            key = self._sort_key(collection, record)
+            keys = self._sort_keys[collection]
+            position = bisect.bisect_right(keys, key)
+            keys.insert(position, key)
+            self._data[collection].insert(position, record)
+
+    def _remove_sorted(self, collection, key):
+        """Видаляє запис із впорядкованого списку за його ключем сортування."""
+        with profiler.stage("repository.sort"):
+            keys = self._sort_keys[collection]
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+                del self._data[collection][position]
+
+    def _commit(self, changes):
+        """ Додає зміни до відкладених і зберігає їх відповідно до режиму durability.
+        Під час пакетної операції зміни лише накопичуються до її завершення."""
+        with self._lock:
+            if changes:
+                self.revision += 1
+            self._pending_changes.extend(changes)
+            if self._batch_depth or not self._pending_changes:
+                return
+            if self.durability == "sync" or self._closed:
+                self.flush()
+            elif self.durability == "group":
+                if self._flush_thread is None:
+                    self._flush_thread = threading.Thread(target=self._flush_loop, name="house-flush", daemon=True)
+                    self._flush_thread.start()
+                self._dirty.notify()
+
+    def _flush_loop(self):
+        """ Фоновий груповий запис: чекає на зміни, накопичує їх flush_interval секунд
+        (або до flush_changes змін) і зберігає одним записом."""
+        with self._dirty:
+            while not self._closed:
+                if not self._pending_changes or self._batch_depth:
+                    self._dirty.wait(None if not self._pending_changes else self.flush_interval)
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._pending_changes) < self.flush_changes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._dirty.wait(remaining)
+                if not self._batch_depth:
+                    try:
+                        self.flush()
+                    except OSError:
+                        # Помилку вже виведено; зміни лишаються відкладеними до наступної спроби
+                        self._dirty.wait(self.flush_interval)
+
+    def _save(self, changes):
+        """ Передає зміни сховищу. Якщо файл тим часом змінив інший процес, сховище
+        повертає об'єднані дані - приймаємо їх замість власних."""
+        with profiler.stage("repository.save"):
+            merged = self.file_manager.save(self.data, changes=changes)
+        if isinstance(merged, dict):
+            self.data = merged
+
+    @contextmanager
+    def batch(self):
+        """ Пакетна операція: усі зміни всередині блоку зберігаються одним записом у кінці.
+        Якщо блок завершився помилкою або запис не вдався, зміни пакета відкочуються в пам'яті
+        і не записуються (зміни, вже збережені явним flush() всередині блоку, лишаються)."""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._rollback_batch()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            try:
+                self._commit([])
+            except BaseException:
+                self._rollback_batch()
+                raise
+            self._batch_undo.clear()
+
+    @_synchronized
+    def _rollback_batch(self):
+        """Скасовує зміни пакетної операції у зворотному порядку та прибирає їх із відкладених."""
+        undo, self._batch_undo = self._batch_undo, []
+        for action in reversed(undo):
+            action()
+        if undo:
+            self.revision += 1  # Дані змінилися - кешовані звіти застаріли
+
+    @_synchronized
+    def flush(self):
+        """Зберігає всі відкладені зміни. Якщо запис не вдався, зміни лишаються відкладеними,
+        а помилка передається далі."""
+        if self._pending_changes:
+            changes, self._pending_changes = self._pending_changes, []
+            try:
+                self._save(changes)
+            except BaseException:
+                self._pending_changes[:0] = changes
+                raise
+            self._batch_undo.clear()  # Записані зміни вже не відкочуються
+
+    def _discard_pending(self, changes):
+        """Прибирає з відкладених змін відкочені (ще не записані) зміни."""
+        discarded = set(map(id, changes))
+        self._pending_changes[:] = [change for change in self._pending_changes if id(change) not in discarded]
+
+    def close(self):
+        """Зберігає відкладені зміни та зупиняє фоновий потік збереження."""
+        with self._dirty:
+            self._closed = True
+            self._dirty.notify()
+        if self._flush_thread is not None and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush()
+        if self.durability != "sync":
+            atexit.unregister(self.close)
 
     def find_resident_by_tax_id(self, tax_id):
         """Повертає мешканця за його ІПН або None, якщо не знайдено."""
-        return next((r for r in self.data["residents"] if r["tax_id"] == tax_id), None)
+        self._ensure_loaded()
+        return self._residents_by_tax_id.get(tax_id)
 
     def find_apartment_by_number(self, number):
         """Повертає квартиру за її номером або None, якщо не знайдено."""
-        return next((a for a in self.data["apartments"] if a["number"] == number), None)
+        self._ensure_loaded()
+        return self._apartments_by_number.get(number)
+
+    @_synchronized
+    def search_residents(self, query, limit=20, fuzzy=True):
+        """ Шукає мешканців за частиною імені (з опечатками, якщо fuzzy), ІПН, номером телефону
+        або його кінцевими цифрами чи email без обходу списку мешканців (див. ResidentSearchIndex).
+        Повертає не більше limit мешканців."""
+        self._ensure_loaded()
+        if self._search_index is None:
+            with profiler.stage("repository.search_index"):
+                self._search_index = ResidentSearchIndex(self._residents_by_tax_id)
+        with profiler.stage("repository.search"):
+            return [self._residents_by_tax_id[tax_id] for tax_id in self._search_index.search(query, limit, fuzzy)]
+
+    @_synchronized
+    def query_apartments(self, entrance=None, floors=None, floor=None, rooms=None, vacant=None):
+        """ Вибирає квартири за числовими полями через індекси діапазонів без обходу всіх квартир.
+        Умова поля - число (точне значення) або пара (від, до) включно, межу можна пропустити (None):
+        query_apartments(entrance=2, rooms=3, floor=(5, 9)). vacant=True - лише квартири без мешканців,
+        False - лише заселені. Квартири перебираються в найвужчому з діапазонів (O(log n + k)),
+        решта умов перевіряється для кожної з них. Повертає квартири в порядку зростання номера."""
+        self._ensure_loaded()
+        if self._range_indexes is None:
+            with profiler.stage("repository.range_index"):
+                self._range_indexes = {
+                    field: _RangeIndex(field, self._data["apartments"], self._sort_keys["apartments"],
+                                       lambda apartment: self._sort_key("apartments", apartment))
+                    for field in APARTMENT_RANGE_FIELDS}
+        conditions = {field: _value_range(condition) for field, condition in
+                      (("entrance", entrance), ("floors", floors), ("floor", floor), ("rooms", rooms))
+                      if condition is not None}
+        if not conditions:
+            rows, ordered = zip(self._sort_keys["apartments"], self._data["apartments"]), True
+        else:
+            # Найвужчий діапазон визначаємо за позиціями в індексах - два бінарні пошуки на поле
+            bounds = {name: self._range_indexes[name].bounds(*limits) for name, limits in conditions.items()}
+            field = min(bounds, key=lambda name: bounds[name][1] - bounds[name][0])
+            low, high = conditions.pop(field)
+            rows, ordered = self._range_indexes[field].rows(*bounds[field]), low == high
+        found = [(key, apartment) for key, apartment in rows
+                 if all(isinstance(getattr(apartment, name), int) and low <= getattr(apartment, name) <= high
+                        for name, (low, high) in conditions.items())
+                 and (vacant is None or bool(vacant) != bool(apartment.residents))]
+        if not ordered:
+            # Квартири з кількома значеннями поля впорядковані спершу за значенням - сортуємо за номером
+            found.sort(key=itemgetter(0))
+        return [apartment for _, apartment in found]
+
+    def iter_residents(self):
+        """Повертає ітератор мешканців у порядку номерів квартир."""
+        return profiler.counted("records_scanned", self.data["residents"])
+
+    def iter_apartments(self):
+        """Повертає ітератор квартир у порядку зростання номера."""
+        return profiler.counted("records_scanned", self.data["apartments"])
+
+    def residents_of(self, apartment):
+        """Повертає записи мешканців квартири за збереженими в ній ІПН."""
+        return [self._residents_by_tax_id[tax_id] for tax_id in apartment["residents"]
+                if tax_id in self._residents_by_tax_id]
+
+    def apartment_view(self, apartment):
+        """Повертає квартиру у старому форматі - з повними даними мешканців."""
+        return dict(apartment.to_dict(), residents=[r.to_dict() for r in self.residents_of(apartment)])
+
+    def denormalized_data(self):
+        """Сумісне подання даних у старому форматі для коду, що очікує вкладених мешканців."""
+        return {
+            "residents": [r.to_dict() for r in self.data["residents"]],
+            "apartments": [self.apartment_view(a) for a in self.data["apartments"]]
+        }
 
+    @_synchronized
     def add_resident(self, resident):
         """Додає мешканця до списку."""
         if self.find_resident_by_tax_id(resident.tax_id):
             print(f"Мешканець із ІПН {resident.tax_id} вже існує.")
             return
-        self.data["residents"].append(resident.to_dict()) # Додаємо мешканця у список
-        self.file_manager.save(self.data) # Зберігаємо оновлені дані
-
-
+        # Зберігаємо власну копію, щоб зміни об'єкта ззовні не обходили індекси
+        record = Resident.from_dict(resident.to_dict())
+        with self._transaction() as undo:
+            self._insert_sorted("residents", record) # Додаємо мешканця у список
+            undo.append(lambda: self._remove_sorted("residents", self._sort_key("residents", record)))
+            self._residents_by_tax_id[record.tax_id] = record
+            undo.append(lambda: self._residents_by_tax_id.pop(record.tax_id))
+            search_index = self._search_index
+            if search_index is not None:
+                search_index.add(record)
+                undo.append(lambda: search_index.remove(record))
+            # Зберігаємо оновлені дані
+            self._commit_undoable([put_change("residents", record)], undo)
+
+    @_synchronized
     def remove_resident(self, tax_id):
         """ Видаляє мешканця за ІПН. """
         # Перевіряє мешканця за ІПН
@@ -131,22 +1445,50 @@ class HouseRepository:
             print(f"Мешканця з ІПН {tax_id} не знайдено.")
             return
 
-        # Видаляємо мешканця з усіх квартир
-        for apartment in self.data["apartments"]:
-            apartment["residents"] = [r for r in apartment["residents"] if r["tax_id"] != tax_id]
-
-        # Видаляємо мешканця зі списку
-        self.data["residents"] = [r for r in self.data["residents"] if r["tax_id"] != tax_id]
-        self.file_manager.save(self.data)
-
+        changes = []
+        with self._transaction() as undo:
+            # Видаляємо мешканця з його квартири (лише вона посилається на його ІПН)
+            apartment = self.find_apartment_by_number(resident.get("apartment"))
+            if self._detach(apartment, tax_id, undo):
+                changes.append(put_change("apartments", apartment))
+
+            # Видаляємо мешканця зі списку
+            self._remove_sorted("residents", self._sort_key("residents", resident))
+            undo.append(lambda: self._insert_sorted("residents", resident))
+            del self._residents_by_tax_id[tax_id]
+            undo.append(lambda: self._residents_by_tax_id.__setitem__(tax_id, resident))
+            search_index = self._search_index
+            if search_index is not None:
+                search_index.remove(resident)
+                undo.append(lambda: search_index.add(resident))
+            changes.append(delete_change("residents", tax_id))
+            self._commit_undoable(changes, undo)
+
+    @_synchronized
     def add_apartment(self, apartment):
-        """ Додає квартиру до списку. """
+        """ Додає квартиру до списку. Під'їзд, поверхи, поверх і кімнати мають бути числами або порожніми,
+        інакше зміну не вдалося б зберегти у сховищах з числовими полями (бінарний знімок, SQLite). """
         if self.find_apartment_by_number(apartment.number):
             print(f"Квартира з номером {apartment.number} вже існує.")
             return
-        self.data["apartments"].append(apartment.to_dict()) # Додаємо квартиру у список
-        self.file_manager.save(self.data) # Зберігаємо оновлені дані
-
+        errors = Validator.validate_apartment_record(apartment.to_dict(), optional=Validator.APARTMENT_FIELDS)
+        errors.pop("number", None)
+        if errors:
+            print(Validator.reason(errors))
+            return
+        record = Apartment.from_dict(apartment.to_dict())
+        with self._transaction() as undo:
+            self._insert_sorted("apartments", record) # Додаємо квартиру у список
+            undo.append(lambda: self._remove_sorted("apartments", self._sort_key("apartments", record)))
+            self._apartments_by_number[record.number] = record
+            undo.append(lambda: self._apartments_by_number.pop(record.number))
+            for index in (self._range_indexes or {}).values():
+                index.add(record)
+                undo.append(lambda index=index: index.remove(record))
+            # Зберігаємо оновлені дані
+            self._commit_undoable([put_change("apartments", record)], undo)
+
+    @_synchronized
     def remove_apartment(self, number):
         """ Видаляє квартиру за номером. """
         # Перевіряє наявність квартири за номером
@@ -155,23 +1497,76 @@ class HouseRepository:
             print(f"Квартира з номером {number} не знайдена.")
             return
 
-        # Видаляємо квартиру з усіх мешканців
-        for resident in self.data["residents"]:
-            if resident.get("apartment") == number:
-                resident["apartment"] = None  # Відкріплюємо мешканця від квартири
+        changes = []
+        with self._transaction() as undo:
+            # Відкріплюємо від квартири всіх її мешканців
+            for resident in self.residents_of(apartment):
+                self._move_resident(resident, None, undo)
+                changes.append(put_change("residents", resident))
+
+            # Видаляємо квартиру зі списку
+            self._remove_sorted("apartments", self._sort_key("apartments", apartment))
+            undo.append(lambda: self._insert_sorted("apartments", apartment))
+            del self._apartments_by_number[number]
+            undo.append(lambda: self._apartments_by_number.__setitem__(number, apartment))
+            for index in (self._range_indexes or {}).values():
+                index.remove(apartment)
+                undo.append(lambda index=index: index.add(apartment))
+            changes.append(delete_change("apartments", number))
+            self._commit_undoable(changes, undo)
+
+    @contextmanager
+    def _transaction(self):
+        """ Журнал відкату для зміни на місці: блок додає до списку дії скасування,
+        і якщо блок завершився помилкою, вони виконуються у зворотному порядку."""
+        undo = []
+        try:
+            yield undo
+        except BaseException:
+            for action in reversed(undo):
+                action()
+            raise
+        if self._batch_depth:
+            # Усередині пакета зміну ще можна буде скасувати, доки пакет не записано
+            self._batch_undo.extend(undo)
+
+    def _commit_undoable(self, changes, undo):
+        """ Зберігає зміни транзакції. Якщо запис не вдався, зміни відкочуються в пам'яті,
+        тож прибираємо їх і з відкладених, щоб вони не потрапили на диск з наступним записом."""
+        undo.append(lambda: self._discard_pending(changes))
+        self._commit(changes)
+
+    def _move_resident(self, resident, apartment_number, undo):
+        """Змінює квартиру мешканця та переставляє його у впорядкованому списку (з діями скасування)."""
+        previous_number = resident["apartment"]
+        self._remove_sorted("residents", self._sort_key("residents", resident))
+        undo.append(lambda: self._insert_sorted("residents", resident))
+        resident["apartment"] = apartment_number
+        undo.append(lambda: resident.__setitem__("apartment", previous_number))
+        self._insert_sorted("residents", resident)
+        undo.append(lambda: self._remove_sorted("residents", self._sort_key("residents", resident)))
 
-        # Видаляємо квартиру зі списку
-        self.data["apartments"] = [a for a in self.data["apartments"] if a["number"] != number]
-        self.file_manager.save(self.data)
+    @staticmethod
+    def _detach(apartment, tax_id, undo):
+        """Прибирає ІПН зі списку квартири на місці; повертає True, якщо він там був."""
+        if apartment is None or tax_id not in apartment["residents"]:
+            return False
+        position = apartment["residents"].index(tax_id)
+        del apartment["residents"][position]
+        undo.append(lambda: apartment["residents"].insert(position, tax_id))
+        return True
 
+    @_synchronized
     def assign_resident_to_apartment(self, tax_id, apartment_number):
-        """Закріплює мешканця за квартирою."""
-        resident = self.find_resident_by_tax_id(tax_id)
+        """ Закріплює мешканця за квартирою. Записи мешканця та квартир змінюються на місці;
+        якщо операція не вдалася, зміни відкочуються."""
+        with profiler.stage("repository.lookup"):
+            resident = self.find_resident_by_tax_id(tax_id)
+            apartment = self.find_apartment_by_number(apartment_number)
         if not resident:
             print(f"Мешканця з ІПН {tax_id} не знайдено.")
             return
 
-        apartment = self.find_apartment_by_number(apartment_number)
         if not apartment:
             print(f"Квартиру з номером {apartment_number} не знайдено.")
             return
@@ -181,26 +1576,23 @@ class HouseRepository:
             print(f"Мешканець з ІПН {tax_id} вже прив'язаний до квартири з номером {apartment_number}.")
             return
 
-        # Оновлюємо мешканця: додаємо квартиру
-        resident['apartment'] = apartment_number
-
-        # Створюємо об'єкти
-        resident_obj = Resident(**resident)
-        apartment_obj = Apartment(**apartment)
-        # Додаємо мешканця до квартири
-        apartment_obj.add_resident(resident_obj)
-
-        self.data["apartments"] = [
-            apartment_obj.to_dict() if a["number"] == apartment_number else a
-            for a in self.data["apartments"]
-        ]
-
-        # Оновлюємо дані
-        self.data["residents"] = [r if r != resident else resident_obj.__dict__ for r in self.data["residents"]]
+        changes = []
+        with self._transaction() as undo:
+            # Якщо мешканець був закріплений за іншою квартирою, прибираємо його звідти
+            previous_apartment = self.find_apartment_by_number(resident["apartment"])
+            if self._detach(previous_apartment, tax_id, undo):
+                changes.append(put_change("apartments", previous_apartment))
 
-        self.file_manager.save(self.data)
+            # Оновлюємо мешканця та додаємо його ІПН до квартири
+            self._move_resident(resident, apartment_number, undo)
+            if tax_id not in apartment["residents"]:
+                apartment["residents"].append(tax_id)
+                undo.append(apartment["residents"].pop)
 
+            changes += [put_change("apartments", apartment), put_change("residents", resident)]
+            self._commit_undoable(changes, undo)
 
+    @_synchronized
     def unassign_resident_from_apartment(self, tax_id):
         """Відкріплює мешканця від квартири і видаляє його зі списку мешканців цієї квартири."""
         resident = self.find_resident_by_tax_id(tax_id)
@@ -213,74 +1605,245 @@ class HouseRepository:
             print(f"Мешканець не закріплений за жодною квартирою.")
             return
 
-        apartment = self.find_apartment_by_number(apartment_number)
-        if apartment:
-            apartment_obj = Apartment(**apartment)
-            apartment_obj.remove_resident(tax_id)
-            self.data["apartments"] = [
-                apartment_obj.to_dict() if a["number"] == apartment_number else a
-                for a in self.data["apartments"]
-            ]
-
-        # Відкріплюємо мешканця від квартири
-        resident["apartment"] = None
-        self.file_manager.save(self.data)
+        changes = []
+        with self._transaction() as undo:
+            apartment = self.find_apartment_by_number(apartment_number)
+            if apartment is not None:
+                self._detach(apartment, tax_id, undo)
+                changes.append(put_change("apartments", apartment))
 
+            # Відкріплюємо мешканця від квартири та переміщуємо його в кінець списку
+            self._move_resident(resident, None, undo)
+            changes.append(put_change("residents", resident))
+            self._commit_undoable(changes, undo)
 
 
 class Validator:
+    """ Validator перевіряє коректність введених даних.
+    Шаблони компілюються один раз під час імпорту модуля."""
+    # Допускаються формати: +38-050-123-45-67 або 050-123-45-67
+    PHONE_PATTERN = re.compile(r"^(\+38-)?0\d{2}-\d{3}-\d{2}-\d{2}$")
+    EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+    TAX_ID_PATTERN = re.compile(r"^\d{9}$")
+    # Формат РРРР-ММ-ДД (місяць і день можуть бути однозначними, як і для strptime)
+    DATE_PATTERN = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+
+    # Повідомлення про помилки для полів записів
+    RESIDENT_ERRORS = {
+        "tax_id": "ІПН повинен складатися з 9 цифр.",
+        "birthdate": "Неправильний формат дати. Використовуйте формат 'YYYY-MM-DD'.",
+        "phone": "Неправильний формат телефону. Використовуйте формат '+38-050-123-45-67' або '050-123-45-67'.",
+        "email": "Неправильний формат email.",
+    }
+    APARTMENT_FIELDS = ("number", "entrance", "floors", "floor", "rooms")
+    APARTMENT_ERRORS = {
+        "number": "Номер квартири повинен бути числом.",
+        "entrance": "Номер під'їзду повинен бути числом.",
+        "floors": "Кількість поверхів повинна бути числом.",
+        "floor": "Поверх повинен бути числом.",
+        "rooms": "Кількість кімнат повинна бути числом.",
+    }
+
     @staticmethod
     def validate_phone(phone):
-        # Допускаються формати: +38-050-123-45-67 або 050-123-45-67
-        pattern = re.compile(r"^(\+38-)?0\d{2}-\d{3}-\d{2}-\d{2}$")
-        return bool(pattern.match(phone))
+        return bool(Validator.PHONE_PATTERN.match(phone))
 
     @staticmethod
     def validate_email(email):
         # Перевірка на формат email
-        pattern = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
-        return bool(pattern.match(email))
+        return bool(Validator.EMAIL_PATTERN.match(email))
 
     @staticmethod
     def validate_tax_id(tax_id):
         # Перевірка на 9 цифр за допомогою патерну
-        pattern = re.compile(r"^\d{9}$")
-        return bool(pattern.match(tax_id))
+        return bool(Validator.TAX_ID_PATTERN.match(tax_id))
 
     @staticmethod
     def validate_date(date):
-        # Перетворення рядків у дати
+        # Розбір шаблоном і перевірка існування дати без повільного strptime
+        match = Validator.DATE_PATTERN.fullmatch(date)
+        if not match:
+            return False
         try:
-            datetime.strptime(date, '%Y-%m-%d')
+            calendar_date(*map(int, match.groups()))
             return True
         except ValueError:
             return False
+
     @staticmethod
     def validate_apartment(apartment):
         # Перевірка, що квартира є числовим значенням
         return apartment.isdigit()
 
+    @staticmethod
+    def validate_resident(record):
+        """ Перевіряє всі поля запису мешканця. Повертає словник {поле: повідомлення};
+        порожній словник означає, що запис коректний."""
+        errors = {}
+        if not str(record.get("name") or "").strip():
+            errors["name"] = "Ім'я не може бути порожнім."
+        checks = (("tax_id", Validator.validate_tax_id), ("birthdate", Validator.validate_date),
+                  ("phone", Validator.validate_phone), ("email", Validator.validate_email))
+        for field, check in checks:
+            value = record.get(field)
+            if not isinstance(value, str) or not check(value):
+                errors[field] = Validator.RESIDENT_ERRORS[field]
+        return errors
+
+    @staticmethod
+    def validate_apartment_record(record, optional=()):
+        """ Перевіряє, що всі числові поля запису квартири містять лише цифри. Поля з optional
+        можуть бути порожніми (None або ""). Повертає {поле: повідомлення}."""
+        return {field: Validator.APARTMENT_ERRORS[field] for field in Validator.APARTMENT_FIELDS
+                if not str(record.get(field, "")).isdigit()
+                and not (field in optional and record.get(field) in (None, ""))}
+
+    @staticmethod
+    def validate_many(records, kind="resident"):
+        """ Пакетна перевірка записів ("resident" або "apartment").
+        Повертає для кожного запису словник {"record": запис, "errors": {поле: повідомлення}}."""
+        check = Validator.validate_resident if kind == "resident" else Validator.validate_apartment_record
+        return [{"record": record, "errors": check(record)} for record in records]
+
+    @staticmethod
+    def reason(errors):
+        """Причина відхилення запису: повідомлення про помилки полів через пробіл."""
+        return " ".join(errors.values())
+
+
+# Приймачі звітів
+class ReportSink:
+    """ ReportSink приймає рядки звіту (словники) та записує їх у потік із буферизацією.
+    Якщо target - шлях до файлу, приймач сам відкриває та закриває файл."""
+    newline = None  # Параметр newline для open(), CSV потребує ''
+
+    def __init__(self, target=None, buffer_size=1000):
+        if isinstance(target, (str, os.PathLike)):
+            self._stream = open(target, 'w', encoding='utf-8', newline=self.newline)
+            self._owns_stream = True
+        else:
+            self._stream = target  # None - стандартний вивід, визначається під час запису
+            self._owns_stream = False
+        self.buffer_size = buffer_size  # Кількість рядків у буфері до запису в потік
+        self._buffer = []
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def begin(self, title, formatter):
+        """Викликається перед рядками звіту: передає заголовок і текстовий форматувальник."""
+
+    def encode(self, row):
+        """Перетворює рядок звіту на текст для запису."""
+        raise NotImplementedError
+
+    def write(self, row):
+        """Додає рядок звіту в буфер, скидаючи буфер у потік при заповненні."""
+        self._buffer.append(self.encode(row))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Записує вміст буфера в потік."""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer.clear()
+        self.stream.flush()
+
+    def close(self):
+        """Скидає буфер і закриває файл, якщо приймач його відкривав."""
+        self.flush()
+        if self._owns_stream:
+            self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TextSink(ReportSink):
+    """Записує звіт як текст за форматуванням звіту (у файл за шляхом або в потік)."""
+    def __init__(self, target=None, buffer_size=1000):
+        super().__init__(target, buffer_size)
+        self.formatter = str
+
+    def begin(self, title, formatter):
+        self.formatter = formatter
+        self._buffer.append(title + "\n")
+
+    def encode(self, row):
+        return self.formatter(row) + "\n"
+
+
+class StdoutSink(TextSink):
+    """Виводить звіт у стандартний вивід."""
+    def __init__(self, buffer_size=1000):
+        super().__init__(None, buffer_size)
+
+
+class CsvSink(ReportSink):
+    """Записує рядки звіту у форматі CSV; заголовок береться з ключів першого рядка."""
+    newline = ''
+
+    def __init__(self, target=None, buffer_size=1000):
+        super().__init__(target, buffer_size)
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+        self._header_written = False
+
+    def encode(self, row):
+        if not self._header_written:
+            self._writer.writerow(row.keys())
+            self._header_written = True
+        # Вкладені значення (списки мешканців) записуються як JSON
+        self._writer.writerow(json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+                              for value in row.values())
+        text = self._text.getvalue()
+        self._text.seek(0)
+        self._text.truncate()
+        return text
+
+
+class JsonLinesSink(ReportSink):
+    """Записує кожен рядок звіту окремим JSON-об'єктом (JSON Lines)."""
+    def encode(self, row):
+        return json.dumps(row, ensure_ascii=False) + "\n"
+
 
     # Клас сервісу для управління мешканцями і квартирами
 class HouseManagementService:
     """HouseManagementService містить бізнес-логіку управління мешканцями та квартирами."""
 
-    def __init__(self, repository):
-        self.repository = repository  # Посилання на репозиторій даних
+    # Звіти: назва -> генератор рядків
+    REPORT_ROWS = {"residents": "iter_residents", "apartments": "iter_apartments",
+                   "residents_by_apartment": "iter_residents_by_apartment", "unassigned": "iter_unassigned_residents"}
 
+    def __init__(self, repository, auto_report=False, cache=None):
+        self.repository = repository  # Посилання на репозиторій даних
+        self.auto_report = auto_report  # Чи виводити повний звіт після кожної зміни
+        self.cache = cache  # ReportCache для рядків звітів (None - звіти будуються щоразу)
+
+    def report_rows(self, name, **filters):
+        """ Рядки звіту name з REPORT_ROWS. З кешем рядки будуються один раз для кожної ревізії
+        репозиторію; без кешу (або якщо репозиторій не має лічильника revision) - генеруються щоразу."""
+        rows = getattr(self, self.REPORT_ROWS[name])
+        revision = getattr(self.repository, "revision", None)
+        if self.cache is None or revision is None:
+            return rows(**filters)
+        return self.cache.get(("report", name, tuple(sorted(filters.items()))), revision,
+                              lambda: list(rows(**filters)))
+
+    @profiler.measure("service.add_resident")
     def add_resident(self, name, tax_id, birthdate, phone, email, additional_info, apartment=None):
         """Додає нового мешканця п.1."""
-        if not Validator.validate_tax_id(tax_id):
-            print("ІПН повинен складатися з 9 цифр.")
-            return
-        if not Validator.validate_date(birthdate):
-            print("Неправильний формат дати. Використовуйте формат 'YYYY-MM-DD'.")
-            return
-        if not Validator.validate_phone(phone):
-            print("Неправильний формат телефону. Використовуйте формат '+38-050-123-45-67' або '050-123-45-67'.")
-            return
-        if not Validator.validate_email(email):
-            print("Неправильний формат email.")
+        with profiler.stage("service.validation"):
+            errors = Validator.validate_resident(
+                {"name": name, "tax_id": tax_id, "birthdate": birthdate, "phone": phone, "email": email})
+        if errors:
+            print(next(iter(errors.values())))  # Повідомляємо про першу помилку
             return
 
         # Додаємо мешканця в репозиторій
@@ -288,8 +1851,10 @@ class HouseManagementService:
         self.repository.add_resident(resident)
 
         print(f"Мешканеця {name} успішно додано.")
-        self.generate_report_residents()
+        if self.auto_report:
+            self.generate_report_residents()
 
+    @profiler.measure("service.remove_resident")
     def remove_resident(self, tax_id):
         """Видаляє мешканця за ІПН п.2."""
         if not self.repository.find_resident_by_tax_id(tax_id):
@@ -297,27 +1862,25 @@ class HouseManagementService:
             return
         self.repository.remove_resident(tax_id)
         print(f"Мешканця з ІПН {tax_id} видалено успішно.")
-        self.generate_report_residents()
+        if self.auto_report:
+            self.generate_report_residents()
 
+    @profiler.measure("service.add_apartment")
     def add_apartment(self, number, entrance, floors, floor, rooms):
         """ Додає нову квартиру п.3. """
 
-        if not number.isdigit() or not floors.isdigit() or not floor.isdigit() or not rooms.isdigit():
-            print("Номер квартири, кількість поверхів, номер поверху та кількість кімнат повинні бути числами.")
+        if not all(value.isdigit() for value in (number, entrance, floors, floor, rooms)):
+            print("Номер квартири, під'їзду, кількість поверхів, номер поверху та кількість кімнат повинні бути числами.")
             return
 
         # Додаємо квартиру в репозиторій
         apartment = Apartment(number, entrance, floors, floor, rooms)
         self.repository.add_apartment(apartment)
-
-        # Сортуємо список квартир за номером
-        self.repository.data["apartments"] = sorted(
-            self.repository.data["apartments"],
-            key=lambda x: int(x["number"])  # Сортування за числовим значенням номера
-        )
         print(f"Квартира з номером {number} додана.")
-        self.generate_report_apartments()
+        if self.auto_report:
+            self.generate_report_apartments()
 
+    @profiler.measure("service.remove_apartment")
     def remove_apartment(self, number):
         """ Видаляє квартиру за номером п.4."""
 
@@ -329,8 +1892,10 @@ class HouseManagementService:
             return
         self.repository.remove_apartment(number)
         print(f"Квартира з номером {number} видалена.")
-        self.generate_report_apartments()
+        if self.auto_report:
+            self.generate_report_apartments()
 
+    @profiler.measure("service.assign_resident_to_apartment")
     def assign_resident_to_apartment(self, tax_id, apartment_number):
         """Закріплює мешканця за квартирою п.5."""
         if not tax_id.isdigit():
@@ -347,14 +1912,11 @@ class HouseManagementService:
             print(f"Квартира з номером {apartment_number} не знайдена.")
             return
         self.repository.assign_resident_to_apartment(tax_id, apartment_number)
-        # Сортуємо список мешканців за номером квартири
-        self.repository.data["residents"] = sorted(
-            self.repository.data["residents"],
-            key=lambda x: int(x["apartment"]) if x["apartment"] else float('inf')  # Несортовані без номера квартири
-        )
         print(f"Мешканця з ІПН {tax_id} успішно закріплено за квартирою {apartment_number}.")
-        self.generate_report_residents()
+        if self.auto_report:
+            self.generate_report_residents()
 
+    @profiler.measure("service.unassign_resident_from_apartment")
     def unassign_resident_from_apartment(self, tax_id):
         """Відкріплює мешканця від квартири п.6. """
         if not tax_id.isdigit():
@@ -365,50 +1927,219 @@ class HouseManagementService:
             return
         self.repository.unassign_resident_from_apartment(tax_id)
         print(f"Мешканця з ІПН {tax_id} успішно відкріплено.")
-        self.generate_report_residents()
+        if self.auto_report:
+            self.generate_report_residents()
+
+    @profiler.measure("service.add_residents_bulk")
+    def add_residents_bulk(self, records, errors=None):
+        """ Додає багато мешканців однією транзакцією. Спочатку перевіряє всі записи,
+        потім застосовує коректні та зберігає дані один раз.
+        errors - уже отримані помилки Validator для кожного запису (наприклад, перевірених
+        у пулі процесів); тоді записи повторно не перевіряються.
+        Повертає словник {"accepted": [...], "rejected": [{"record": ..., "reason": ...}]}."""
+        result = {"accepted": [], "rejected": []}
+        seen = set()
+        if errors is not None:
+            checked_records = [{"record": record, "errors": record_errors}
+                               for record, record_errors in zip(records, errors)]
+        else:
+            with profiler.stage("service.validation"):
+                checked_records = Validator.validate_many(records)
+        for checked in checked_records:
+            record, errors = checked["record"], checked["errors"]
+            if not errors:
+                apartment_number = record.get("apartment")
+                if record["tax_id"] in seen or self.repository.find_resident_by_tax_id(record["tax_id"]):
+                    errors = {"tax_id": f"Мешканець із ІПН {record['tax_id']} вже існує."}
+                elif apartment_number and not self.repository.find_apartment_by_number(apartment_number):
+                    errors = {"apartment": f"Квартира з номером {apartment_number} не знайдена."}
+            if errors:
+                result["rejected"].append({"record": record, "reason": Validator.reason(errors), "errors": errors})
+            else:
+                seen.add(record["tax_id"])
+                result["accepted"].append(record)
+
+        with self.repository.batch():
+            for record in result["accepted"]:
+                self.repository.add_resident(Resident(
+                    record["name"], record["tax_id"], record["birthdate"], record["phone"],
+                    record["email"], record.get("additional_info", "")))
+                if record.get("apartment"):
+                    self.repository.assign_resident_to_apartment(record["tax_id"], record["apartment"])
+        return result
+
+    @profiler.measure("service.add_apartments_bulk")
+    def add_apartments_bulk(self, records):
+        """ Додає багато квартир однією транзакцією з одним збереженням.
+        Повертає словник {"accepted": [...], "rejected": [{"record": ..., "reason": ...}]}."""
+        result = {"accepted": [], "rejected": []}
+        seen = set()
+        with profiler.stage("service.validation"):
+            checked_records = Validator.validate_many(records, kind="apartment")
+        for checked in checked_records:
+            record, errors = checked["record"], checked["errors"]
+            if not errors and (record["number"] in seen or self.repository.find_apartment_by_number(record["number"])):
+                errors = {"number": f"Квартира з номером {record['number']} вже існує."}
+            if errors:
+                result["rejected"].append({"record": record, "reason": Validator.reason(errors), "errors": errors})
+            else:
+                seen.add(record["number"])
+                result["accepted"].append(record)
+
+        with self.repository.batch():
+            for record in result["accepted"]:
+                self.repository.add_apartment(Apartment(*(record[field] for field in Validator.APARTMENT_FIELDS)))
+        return result
+
+    @profiler.measure("service.assign_many")
+    def assign_many(self, assignments):
+        """ Закріплює мешканців за квартирами однією транзакцією.
+        assignments - пари (ІПН, номер квартири). Повертає словник з прийнятими та відхиленими парами."""
+        result = {"accepted": [], "rejected": []}
+        seen = set()
+        for tax_id, apartment_number in assignments:
+            resident = self.repository.find_resident_by_tax_id(tax_id)
+            if not resident:
+                reason = f"Мешканця з ІПН {tax_id} не знайдено."
+            elif not self.repository.find_apartment_by_number(apartment_number):
+                reason = f"Квартира з номером {apartment_number} не знайдена."
+            elif tax_id in seen:
+                reason = f"Мешканця з ІПН {tax_id} вже закріплено в цьому пакеті."
+            elif resident.get("apartment") == apartment_number:
+                reason = f"Мешканець з ІПН {tax_id} вже прив'язаний до квартири з номером {apartment_number}."
+            else:
+                reason = None
+            if reason:
+                result["rejected"].append({"record": (tax_id, apartment_number), "reason": reason})
+            else:
+                seen.add(tax_id)
+                result["accepted"].append((tax_id, apartment_number))
+
+        with self.repository.batch():
+            for tax_id, apartment_number in result["accepted"]:
+                self.repository.assign_resident_to_apartment(tax_id, apartment_number)
+        return result
+
+    def iter_residents(self):
+        """Генерує рядки звіту про всіх мешканців."""
+        for resident in self.repository.iter_residents():
+            yield {"name": resident["name"], "tax_id": resident["tax_id"],
+                   "apartment": resident.get("apartment", "Не закріплена")}
+
+    def iter_apartments(self):
+        """Генерує рядки звіту про всі квартири."""
+        for apartment in self.repository.iter_apartments():
+            yield {"number": apartment["number"], "entrance": apartment["entrance"],
+                   "floors": apartment["floors"], "floor": apartment["floor"], "rooms": apartment["rooms"],
+                   "residents_count": len(apartment["residents"])}
+
+    def iter_residents_by_apartment(self, entrance=None, floor_min=None, floor_max=None,
+                                    vacant_only=False, offset=0, limit=None):
+        """ Генерує рядки звіту: квартира та список її мешканців.
+        Мешканців кожної квартири беремо з її списку ІПН, тому звіт лінійний за O(A + R).
+        Фільтри: під'їзд, діапазон поверхів, лише квартири без мешканців;
+        offset/limit повертають сторінку рядків без обходу решти квартир."""
+        apartments = self.repository.iter_apartments()
+        if entrance is not None:
+            apartments = (a for a in apartments if str(a["entrance"]) == str(entrance))
+        if floor_min is not None:
+            apartments = (a for a in apartments if _number_key(a["floor"]) >= int(floor_min))
+        if floor_max is not None:
+            apartments = (a for a in apartments if _number_key(a["floor"]) <= int(floor_max))
+        if vacant_only:
+            apartments = (a for a in apartments if not a["residents"])
+        stop = offset + limit if limit is not None else None
+        for apartment in islice(apartments, offset, stop):
+            yield {"number": apartment["number"],
+                   "residents": [{"name": resident["name"], "tax_id": resident["tax_id"]}
+                                 for resident in self.repository.residents_of(apartment)]}
+
+    def iter_unassigned_residents(self):
+        """Генерує рядки звіту про мешканців без квартири."""
+        for resident in self.repository.iter_residents():
+            if not resident.get("apartment"):
+                yield {"name": resident["name"], "tax_id": resident["tax_id"]}
 
-    def generate_report_residents(self):
+    @staticmethod
+    def _write_report(rows, sink, title, formatter):
+        """Записує рядки звіту в приймач; без приймача звіт виводиться у стандартний вивід."""
+        report_sink = sink if sink is not None else StdoutSink()
+        report_sink.begin(title, formatter)
+        for row in rows:
+            report_sink.write(row)
+        report_sink.flush()
+
+    @profiler.measure("service.search")
+    def search_residents(self, query, sink=None, limit=20, fuzzy=True):
+        """ Шукає мешканців за частиною імені, телефону, ІПН або за email і виводить знайдених.
+        Повертає рядки результату."""
+        rows = [{"name": resident["name"], "tax_id": resident["tax_id"], "phone": resident["phone"],
+                 "email": resident["email"], "apartment": resident["apartment"] or "Не закріплена"}
+                for resident in self.repository.search_residents(query, limit, fuzzy)]
+        if not rows:
+            print(f"Мешканців за запитом «{query}» не знайдено.")
+            return rows
+        self._write_report(rows, sink, f"\nРезультати пошуку «{query}»:",
+                           lambda row: f"  - {row['name']}, ІПН: {row['tax_id']}, Телефон: {row['phone']}, "
+                                       f"Email: {row['email']}, Квартира: {row['apartment']}")
+        return rows
+
+    @profiler.measure("report.residents")
+    def generate_report_residents(self, sink=None):
         """ Виводить список усіх мешканців. """
-        print("\nСписок мешканців:")
-        for resident in self.repository.data["residents"]:
-            print(
-                f"Ім'я: {resident['name']}, ІПН: {resident['tax_id']}, Квартира: {resident.get('apartment', 'Не закріплена')}")
+        self._write_report(self.report_rows("residents"), sink, "\nСписок мешканців:",
+                           lambda row: f"Ім'я: {row['name']}, ІПН: {row['tax_id']}, Квартира: {row['apartment']}")
 
-    def generate_report_apartments(self):
+    @profiler.measure("report.apartments")
+    def generate_report_apartments(self, sink=None):
         """Виводить список усіх квартир."""
-        print("\nСписок квартир (в порядку зростання номера):")
-        for apartment in self.repository.data["apartments"]:
-            print(
-                f"Номер квартири: {apartment['number']}, Під'їзд: {apartment['entrance']}, Кіл-ть поверхів: {apartment['floors']}, "
-                f"Поверх: {apartment['floor']}, Кілкість кімнат: {apartment['rooms']}, "
-                f"Кіл-ть мешканців: {len(apartment['residents'])}")
-
-    def report_residents_by_apartment(self):
-        """ Виводить список усіх мешканців за квартирами. """
-        print("\nСписок мешканців за квартирами:")
-        for apartment in self.repository.data["apartments"]:
-            print(f"Квартира {apartment['number']}:")
-            for resident in self.repository.data["residents"]:
-                if resident.get("apartment") == apartment["number"]:
-                    print(f"  - {resident['name']}, ІПН: {resident['tax_id']}")
-
-    def report_unassigned_residents(self):
+        self._write_report(
+            self.report_rows("apartments"), sink, "\nСписок квартир (в порядку зростання номера):",
+            lambda row: f"Номер квартири: {row['number']}, Під'їзд: {row['entrance']}, "
+                        f"Кіл-ть поверхів: {row['floors']}, Поверх: {row['floor']}, "
+                        f"Кілкість кімнат: {row['rooms']}, Кіл-ть мешканців: {row['residents_count']}")
+
+    @profiler.measure("report.residents_by_apartment")
+    def report_residents_by_apartment(self, sink=None, **filters):
+        """ Виводить список мешканців за квартирами.
+        Додаткові параметри фільтрують та розбивають звіт на сторінки (див. iter_residents_by_apartment)."""
+        self._write_report(
+            self.report_rows("residents_by_apartment", **filters), sink, "\nСписок мешканців за квартирами:",
+            lambda row: "\n".join([f"Квартира {row['number']}:"] +
+                                  [f"  - {r['name']}, ІПН: {r['tax_id']}" for r in row["residents"]]))
+
+    @profiler.measure("report.unassigned")
+    def report_unassigned_residents(self, sink=None):
         """ Виводить список усіх мешканців без квартир. """
-        print("\nМешканці без закріпленої квартири:")
-        for resident in self.repository.data["residents"]:
-            if not resident.get("apartment"):
-                print(f"  - {resident['name']}, ІПН: {resident['tax_id']}")
+        self._write_report(self.report_rows("unassigned"), sink, "\nМешканці без закріпленої квартири:",
+                           lambda row: f"  - {row['name']}, ІПН: {row['tax_id']}")
 
 
 # Основна функція
-def main():
+def main(argv=None):
     """
     Запускає інтерактивне меню для управління мешканцями та квартирами.
+    Параметр --profile [файл] вмикає профілювання і зберігає статистику у файл JSON при виході,
+    --auto-report - виведення повного списку після кожної зміни (інакше списки - у розділі "Звіти").
     """
-    # Створення репозиторію, що завантажує дані з файлу або створює порожній репозиторій
-    repository = HouseRepository('house_data1.json')
+    parser = argparse.ArgumentParser(description="Управління мешканцями та квартирами.")
+    parser.add_argument("--profile", nargs="?", const="house_profile.json", metavar="ФАЙЛ",
+                        help="увімкнути профілювання та зберегти статистику у файл JSON при виході")
+    parser.add_argument("--auto-report", action="store_true",
+                        help="виводити повний список мешканців або квартир після кожної зміни")
+    arguments = parser.parse_args(argv)
+    profiler.enabled = arguments.profile is not None
+
+    # Створення репозиторію: дані читаються з файлу (або бінарного кешу) при першому зверненні,
+    # а зміни записуються у фоні не частіше ніж раз на секунду
+    started = time.perf_counter()
+    repository = HouseRepository('house_data1.json', journal=True, lazy=True, cache=True,
+                                 durability="group", flush_interval=1.0)
+    print(f"Програму запущено за {(time.perf_counter() - started) * 1000:.1f} мс.")
+    load_time_reported = False
     # Створення сервісу для виконання дій над даними
-    service = HouseManagementService(repository)
+    # Звіти кешуються до наступної зміни даних
+    service = HouseManagementService(repository, auto_report=arguments.auto_report, cache=ReportCache())
 
     while True:
         # Виведення головного меню
@@ -423,9 +2154,16 @@ def main():
         print("8. Завантажити дані з файлу.")
         print("9. Звіти.")
         print("10. Вийти.")
+        print("11. Профілювання.")
+        print("12. Пошук мешканців.")
         try:
             # Отримання вибору користувача
             choice = input("Виберіть дію: ")
+            if not load_time_reported:
+                # Перше звернення до даних завантажує їх - повідомляємо час завантаження
+                repository.data
+                print(f"Дані завантажено за {repository.load_time * 1000:.1f} мс.")
+                load_time_reported = True
 
             if choice == "1":
                 # Додавання нового мешканця
@@ -546,7 +2284,8 @@ def main():
                     print("2. Звіт про квартири.")
                     print("3. Звіт мешканців за квартирами.")
                     print("4. Звіт мешканців без закріпленої квартири.")
-                    print("5. Повернення до головного меню")
+                    print("5. Звіт мешканців за квартирами з фільтром.")
+                    print("6. Повернення до головного меню")
                     report_choice = input("Виберіть дію: ")
 
                     try:
@@ -567,6 +2306,18 @@ def main():
                             service.report_unassigned_residents()
 
                         elif report_choice == "5":
+                            # Вибірка квартир за під'їздом, поверхами, незаселеністю та сторінкою
+                            entrance = input("Під'їзд (Enter - усі): ").strip() or None
+                            floor_min = input("Поверх від (Enter - без обмеження): ").strip() or None
+                            floor_max = input("Поверх до (Enter - без обмеження): ").strip() or None
+                            vacant_only = input("Лише квартири без мешканців? (т/н): ").strip().lower() == "т"
+                            offset = int(input("Пропустити квартир (Enter - 0): ").strip() or 0)
+                            limit = input("Кількість квартир (Enter - усі): ").strip()
+                            service.report_residents_by_apartment(
+                                entrance=entrance, floor_min=floor_min, floor_max=floor_max,
+                                vacant_only=vacant_only, offset=offset, limit=int(limit) if limit else None)
+
+                        elif report_choice == "6":
                             break
                         else:
                             print("Некоректний вибір у розділі звітів.")
@@ -574,10 +2325,64 @@ def main():
                         print(f"Помилка при генерації звіту: {e}")
 
             elif choice == "10":
-                # Завершення роботи програми
+                # Завершення роботи програми: зберігаємо відкладені зміни та ущільнюємо журнал у знімок
+                try:
+                    repository.close()
+                    repository.file_manager.compact(repository.data)
+                except OSError:
+                    print("Не всі зміни вдалося зберегти на диск.")
+                if arguments.profile:
+                    profiler.dump(arguments.profile)
+                    print(f"Статистику профілювання збережено у {arguments.profile}.")
                 print("До побачення!")
                 break
 
+            elif choice == "11":
+                while True:    # Профілювання
+                    print("\n--- Профілювання ---")
+                    print(f"1. {'Вимкнути' if profiler.enabled else 'Увімкнути'} профілювання.")
+                    print("2. Показати статистику.")
+                    print("3. Зберегти статистику у файл JSON.")
+                    print("4. Очистити статистику.")
+                    print("5. Статистика кешу звітів.")
+                    print("6. Повернення до головного меню")
+                    profile_choice = input("Виберіть дію: ")
+
+                    if profile_choice == "1":
+                        profiler.enabled = not profiler.enabled
+                        print(f"Профілювання {'увімкнено' if profiler.enabled else 'вимкнено'}.")
+                    elif profile_choice == "2":
+                        profiler.report()
+                    elif profile_choice == "3":
+                        path = input("Файл (Enter - house_profile.json): ").strip() or "house_profile.json"
+                        try:
+                            profiler.dump(path)
+                            print(f"Статистику збережено у {path}.")
+                        except OSError as e:
+                            print(f"Помилка запису до файлу: {e}")
+                    elif profile_choice == "4":
+                        profiler.reset()
+                        print("Статистику очищено.")
+                    elif profile_choice == "5":
+                        for name, value in service.cache.stats().items():
+                            print(f"  {name}: {value:.2f}" if isinstance(value, float) else f"  {name}: {value}")
+                    elif profile_choice == "6":
+                        break
+                    else:
+                        print("Некоректний вибір у розділі профілювання.")
+
+            elif choice == "12":
+                # Пошук мешканців за частиною імені, телефону, ІПН або за email
+                try:
+                    query = input("Ім'я, телефон, ІПН або email: ").strip()
+                    if not query:
+                        raise ValueError("Запит не може бути порожнім.")
+                    service.search_residents(query)
+                except ValueError as ve:
+                    print(f"Помилка: {ve}")
+                except Exception as e:
+                    print(f"Помилка при пошуку мешканців: {e}")
+
             else:
                 # Обробка некоректного вибору
                 print("Некоректний вибір, спробуйте знову.")
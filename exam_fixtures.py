@@ -0,0 +1,18 @@
+import json
+import os
+import tempfile
+
+
+def write_empty_house(path):
+    """Записує файл даних будинку без мешканців і квартир; повертає шлях до нього."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({"residents": [], "apartments": []}, file)
+    return path
+
+
+def empty_house_file(test, name="house.json"):
+    """ Створює для тесту тимчасову теку (test.temp_dir) з порожнім файлом даних будинку
+    і повертає шлях до файлу. Тека видаляється після завершення тесту."""
+    test.temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(test.temp_dir.cleanup)
+    return write_empty_house(os.path.join(test.temp_dir.name, name))
@@ -0,0 +1,137 @@
+from collections import Counter
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необов'язковий: без нього працює реалізація на чистому Python
+    np = None
+
+# Значення для відсутніх або нечислових полів у числових стовпцях
+MISSING = -1
+
+
+def _as_int(value):
+    """Перетворює поле на int; відсутні та нечислові значення стають MISSING."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _birth_year(birthdate):
+    """Рік народження з дати у форматі РРРР-ММ-ДД або MISSING."""
+    return _as_int(birthdate[:4]) if isinstance(birthdate, str) else MISSING
+
+
+class OccupancyAnalytics:
+    """ OccupancyAnalytics будує стовпці (номер квартири, під'їзд, поверх, кімнати,
+    кількість мешканців, рік народження мешканців) за один прохід по репозиторію
+    і рахує агрегати над ними. Якщо встановлено NumPy, агрегати векторизовані,
+    інакше використовується еквівалентна реалізація на чистому Python.
+    Стовпці - знімок даних на момент створення; після змін створіть об'єкт заново."""
+    def __init__(self, repository, use_numpy=None):
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+        self.numbers = []
+        entrances, floors, rooms, occupants = [], [], [], []
+        for apartment in repository.iter_apartments():
+            self.numbers.append(apartment["number"])
+            entrances.append(_as_int(apartment["entrance"]))
+            floors.append(_as_int(apartment["floor"]))
+            rooms.append(_as_int(apartment["rooms"]))
+            occupants.append(len(apartment["residents"]))
+        birth_years = [_birth_year(resident["birthdate"]) for resident in repository.iter_residents()]
+
+        if self.use_numpy:
+            self.entrances = np.array(entrances, dtype=np.int64)
+            self.floors = np.array(floors, dtype=np.int64)
+            self.rooms = np.array(rooms, dtype=np.int64)
+            self.occupants = np.array(occupants, dtype=np.int64)
+            self.birth_years = np.array(birth_years, dtype=np.int64)
+        else:
+            self.entrances, self.floors, self.rooms = entrances, floors, rooms
+            self.occupants, self.birth_years = occupants, birth_years
+
+    def _group(self, keys):
+        """Групує квартири за стовпцем keys: {ключ: {"apartments": к-ть, "residents": к-ть}}."""
+        if self.use_numpy:
+            unique, inverse = np.unique(keys, return_inverse=True)
+            apartments = np.bincount(inverse, minlength=len(unique))
+            residents = np.bincount(inverse, weights=self.occupants, minlength=len(unique))
+            return {int(key): {"apartments": int(a), "residents": int(r)}
+                    for key, a, r in zip(unique, apartments, residents)}
+        groups = {}
+        for key, occupants in zip(keys, self.occupants):
+            group = groups.setdefault(key, {"apartments": 0, "residents": 0})
+            group["apartments"] += 1
+            group["residents"] += occupants
+        return dict(sorted(groups.items()))
+
+    def occupancy_by_entrance(self):
+        """Кількість квартир і мешканців у кожному під'їзді."""
+        return self._group(self.entrances)
+
+    def occupancy_by_floor(self):
+        """Кількість квартир і мешканців на кожному поверсі (усі під'їзди разом)."""
+        return self._group(self.floors)
+
+    def residents_per_room(self):
+        """Загальна кількість мешканців, кімнат і середня кількість мешканців на кімнату."""
+        if self.use_numpy:
+            known = self.rooms > 0
+            total_rooms = int(self.rooms[known].sum())
+            total_residents = int(self.occupants[known].sum())
+        else:
+            known = [(r, o) for r, o in zip(self.rooms, self.occupants) if r > 0]
+            total_rooms = sum(r for r, _ in known)
+            total_residents = sum(o for _, o in known)
+        return {"residents": total_residents, "rooms": total_rooms,
+                "ratio": total_residents / total_rooms if total_rooms else 0.0}
+
+    def age_distribution(self, bucket=10, year=None):
+        """Розподіл мешканців за віковими групами ширини bucket років: {"0-9": к-ть, ...}."""
+        year = year if year is not None else date.today().year
+        if self.use_numpy:
+            ages = year - self.birth_years[self.birth_years != MISSING]
+            starts, counts = np.unique(ages // bucket * bucket, return_counts=True)
+            distribution = zip((int(s) for s in starts), (int(c) for c in counts))
+        else:
+            ages = (year - birth_year for birth_year in self.birth_years if birth_year != MISSING)
+            distribution = sorted(Counter(age // bucket * bucket for age in ages).items())
+        return {f"{start}-{start + bucket - 1}": count for start, count in distribution}
+
+    def overcrowded_units(self, max_per_room=2):
+        """Номери квартир, де мешканців більше, ніж max_per_room на кімнату."""
+        if self.use_numpy:
+            mask = (self.rooms > 0) & (self.occupants > self.rooms * max_per_room)
+            return [self.numbers[i] for i in np.flatnonzero(mask)]
+        return [number for number, rooms, occupants in zip(self.numbers, self.rooms, self.occupants)
+                if rooms > 0 and occupants > rooms * max_per_room]
+
+    def empty_units(self):
+        """Номери квартир без мешканців."""
+        if self.use_numpy:
+            return [self.numbers[i] for i in np.flatnonzero(self.occupants == 0)]
+        return [number for number, occupants in zip(self.numbers, self.occupants) if occupants == 0]
+
+    def summary(self, year=None):
+        """Усі агрегати одним словником."""
+        return {
+            "by_entrance": self.occupancy_by_entrance(),
+            "by_floor": self.occupancy_by_floor(),
+            "residents_per_room": self.residents_per_room(),
+            "age_distribution": self.age_distribution(year=year),
+            "overcrowded": self.overcrowded_units(),
+            "empty": self.empty_units(),
+        }
+
+
+def occupancy_summary(repository, cache=None, year=None, use_numpy=None):
+    """ Агрегати зайнятості репозиторію (OccupancyAnalytics.summary).
+    З кешем (exam4_3.ReportCache) стовпці й агрегати перераховуються лише після зміни даних."""
+    def compute():
+        return OccupancyAnalytics(repository, use_numpy=use_numpy).summary(year=year)
+
+    revision = getattr(repository, "revision", None)
+    if cache is None or revision is None:
+        return compute()
+    return cache.get(("occupancy_summary", year, use_numpy), revision, compute)
@@ -0,0 +1,264 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+
+from exam4_3 import DATA_FORMAT, HouseManagementService, HouseRepository, TextSink
+
+# Розміри будинків за замовчуванням (кількість мешканців). Будинок на 1 000 000 мешканців
+# будується кілька хвилин і потребує кількох ГБ пам'яті, тому запускається лише явно: --sizes 1000000
+DEFAULT_SIZES = (1000, 10000, 100000)
+RESIDENTS_PER_APARTMENT = 3
+
+# Операції потоку: назва методу -> (чий метод викликається: "repository" або "service"; частка в потоці)
+OPERATIONS = {
+    "find_resident_by_tax_id": ("repository", 30),
+    "find_apartment_by_number": ("repository", 15),
+    "add_resident": ("service", 15),
+    "assign_resident_to_apartment": ("service", 15),
+    "unassign_resident_from_apartment": ("service", 10),
+    "remove_resident": ("service", 5),
+    "add_apartment": ("service", 5),
+    "remove_apartment": ("service", 5),
+}
+
+# Звіти: назва -> метод сервісу
+REPORTS = {
+    "residents": "generate_report_residents",
+    "apartments": "generate_report_apartments",
+    "residents_by_apartment": "report_residents_by_apartment",
+    "unassigned": "report_unassigned_residents",
+}
+
+
+def _tax_id(index):
+    return str(100000000 + index)
+
+
+def _resident(index, apartment):
+    return {"name": f"Мешканець {index}", "tax_id": _tax_id(index), "birthdate": f"{1950 + index % 60}-01-01",
+            "phone": f"050-{index % 1000:03d}-{index % 100:02d}-{index % 97:02d}",
+            "email": f"resident{index}@example.com", "additional_info": "", "apartment": apartment}
+
+
+def _apartment(number):
+    return {"number": str(number), "entrance": str(number % 8 + 1), "floors": "9",
+            "floor": str(number % 9 + 1), "rooms": str(number % 4 + 1), "residents": []}
+
+
+def synthetic_house(size):
+    """ Будує дані будинку з size мешканцями: по RESIDENTS_PER_APARTMENT на квартиру,
+    кожен десятий мешканець без квартири."""
+    apartments = [_apartment(number) for number in range(1, size // RESIDENTS_PER_APARTMENT + 2)]
+    residents = []
+    for index in range(size):
+        apartment = None
+        if index % 10:
+            apartment = apartments[index // RESIDENTS_PER_APARTMENT]
+            apartment["residents"].append(_tax_id(index))
+        residents.append(_resident(index, apartment["number"] if apartment else None))
+    return {"format": DATA_FORMAT, "residents": residents, "apartments": apartments}
+
+
+def generate_operations(size, count, seed=0):
+    """Генерує потік операцій {"op": назва, "args": [...]} для будинку з size мешканцями."""
+    rng = random.Random(seed)
+    names = list(OPERATIONS)
+    weights = [OPERATIONS[name][1] for name in names]
+    apartments_count = size // RESIDENTS_PER_APARTMENT + 1
+    next_resident, next_apartment = size, apartments_count + 1
+    added_residents, added_apartments = [], []
+    for name in rng.choices(names, weights, k=count):
+        existing = _tax_id(rng.randrange(size))
+        apartment = str(rng.randint(1, apartments_count))
+        if name == "find_resident_by_tax_id":
+            args = [existing]
+        elif name == "find_apartment_by_number":
+            args = [apartment]
+        elif name == "add_resident":
+            record = _resident(next_resident, None)
+            args = [record[field] for field in ("name", "tax_id", "birthdate", "phone", "email", "additional_info")]
+            added_residents.append(record["tax_id"])
+            next_resident += 1
+        elif name == "assign_resident_to_apartment":
+            args = [rng.choice(added_residents or [existing]), apartment]
+        elif name == "unassign_resident_from_apartment":
+            args = [existing]
+        elif name == "remove_resident":
+            args = [added_residents.pop() if added_residents else existing]
+        elif name == "add_apartment":
+            record = _apartment(next_apartment)
+            args = [record[field] for field in ("number", "entrance", "floors", "floor", "rooms")]
+            added_apartments.append(record["number"])
+            next_apartment += 1
+        else:
+            args = [added_apartments.pop() if added_apartments else apartment]
+        yield {"op": name, "args": args}
+
+
+def write_operations(path, operations):
+    """Записує потік операцій у файл JSON Lines."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for operation in operations:
+            file.write(json.dumps(operation, ensure_ascii=False) + "\n")
+
+
+def read_operations(path):
+    """Читає потік операцій з файлу JSON Lines, пропускаючи порожні рядки."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize(latencies):
+    """Кількість, пропускна здатність (оп/с) та перцентилі p50/p99 у мілісекундах."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(q):
+        return ordered[round(q * (len(ordered) - 1))] * 1000 if ordered else 0.0
+
+    return {"count": len(ordered), "throughput": len(ordered) / total if total else 0.0,
+            "p50_ms": percentile(0.5), "p99_ms": percentile(0.99)}
+
+
+def replay(service, operations):
+    """Виконує потік операцій і повертає затримки кожного типу операції: {назва: [с, ...]}."""
+    latencies = {}
+    for operation in operations:
+        name = operation["op"]
+        if name not in OPERATIONS:
+            raise ValueError(f"Невідома операція: {name}")
+        target = service if OPERATIONS[name][0] == "service" else service.repository
+        method = getattr(target, name)
+        start = time.perf_counter()
+        method(*operation["args"])
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+    return latencies
+
+
+def run_reports(service, repeat, stream):
+    """Будує кожен звіт repeat разів у текстовий потік stream і повертає затримки."""
+    latencies = {}
+    for name, method in REPORTS.items():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            getattr(service, method)(sink=TextSink(stream))
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+    return latencies
+
+
+def run_benchmark(size, operations, report_repeat=3, journal=True):
+    """ Створює синтетичний будинок у тимчасовій теці, відтворює потік операцій
+    і будує звіти. Повертає статистику за кожною операцією та кожним звітом."""
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, 'w', encoding='utf-8') as null:
+        file_path = os.path.join(temp_dir, "house.json")
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(synthetic_house(size), file, ensure_ascii=False)
+        repository = HouseRepository(file_path, journal=journal)
+        service = HouseManagementService(repository)
+        with contextlib.redirect_stdout(null):  # Повідомлення сервісу не вимірюємо
+            start = time.perf_counter()
+            latencies = replay(service, operations)
+            elapsed = time.perf_counter() - start
+            reports = run_reports(service, report_repeat, null)
+    return {
+        "size": size,
+        "load_seconds": repository.load_time,
+        "operations_total": {"count": sum(len(v) for v in latencies.values()),
+                             "seconds": elapsed},
+        "operations": {name: summarize(values) for name, values in latencies.items()},
+        "reports": {name: summarize(values) for name, values in reports.items()},
+    }
+
+
+def git_commit():
+    """Поточний коміт git або None, якщо його не вдалося визначити."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Порівнює p50 двох результатів: {розмір: {назва: відношення нового до старого}}."""
+    old_runs = {run["size"]: run for run in previous["runs"]}
+    ratios = {}
+    for run in current["runs"]:
+        old = old_runs.get(run["size"])
+        if not old:
+            continue
+        ratios[run["size"]] = {
+            name: stats["p50_ms"] / old[group][name]["p50_ms"]
+            for group in ("operations", "reports") for name, stats in run[group].items()
+            if old[group].get(name, {}).get("p50_ms")}
+    return ratios
+
+
+def stream_path(path, size):
+    """Шлях файлу потоку для будинку size: розмір додається перед розширенням (ops.jsonl -> ops.1000.jsonl)."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{size}{extension}"
+
+
+def print_run(run):
+    print(f"\nБудинок на {run['size']} мешканців, завантаження {run['load_seconds']:.3f} с")
+    for group in ("operations", "reports"):
+        for name, stats in run[group].items():
+            print(f"  {name:34} {stats['count']:7d}  {stats['throughput']:12.1f} оп/с"
+                  f"  p50 {stats['p50_ms']:9.3f} мс  p99 {stats['p99_ms']:9.3f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк HouseManagementService на синтетичних будинках.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="кількість мешканців (1000000 - лише явно), напр. 1000 10000 100000 1000000")
+    parser.add_argument("--ops", type=int, default=10000, help="довжина згенерованого потоку операцій")
+    parser.add_argument("--stream", help="файл JSON Lines з операціями замість згенерованого потоку")
+    parser.add_argument("--write-stream",
+                        help="зберегти згенеровані потоки у файли JSON Lines (по файлу на розмір, напр. ops.1000.jsonl)")
+    parser.add_argument("--report-repeat", type=int, default=3, help="скільки разів будувати кожен звіт")
+    parser.add_argument("--snapshot", action="store_true", help="зберігати знімок замість журналу")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл результатів (за замовчуванням bench_results/<коміт>.json)")
+    parser.add_argument("--compare", help="попередній файл результатів для порівняння")
+    arguments = parser.parse_args()
+
+    commit = git_commit()
+    results = {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "python": platform.python_version(), "runs": []}
+    for size in arguments.sizes:
+        if arguments.stream:
+            operations = list(read_operations(arguments.stream))
+        else:
+            operations = list(generate_operations(size, arguments.ops, arguments.seed))
+            if arguments.write_stream:
+                write_operations(stream_path(arguments.write_stream, size), operations)
+        run = run_benchmark(size, operations, arguments.report_repeat, journal=not arguments.snapshot)
+        results["runs"].append(run)
+        print_run(run)
+
+    output = arguments.output or os.path.join("bench_results", f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=4)
+    print(f"\nРезультати збережено у {output}")
+
+    if arguments.compare:
+        with open(arguments.compare, encoding='utf-8') as file:
+            previous = json.load(file)
+        for size, ratios in compare(previous, results).items():
+            print(f"\nЗміна p50 для {size} мешканців (нове / старе):")
+            for name, ratio in ratios.items():
+                print(f"  {name:34} {ratio:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
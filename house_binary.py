@@ -0,0 +1,281 @@
+import mmap
+import os
+import struct
+import sys
+
+from exam4_3 import (DATA_FORMAT, Apartment, FileManager, Resident, _number_key, migrate_to_normalized,
+                     profiler)
+
+# Бінарний знімок (little-endian):
+#   заголовок | мешканці | квартири | індекс ІПН | ІПН мешканців квартир | таблиця рядків
+# Рядки зберігаються один раз у таблиці рядків (UTF-8), записи містять посилання (зсув, довжина).
+MAGIC = b"HOUSEBIN"
+BINARY_FORMAT = 1  # Версія бінарного формату; інша версія у файлі - помилка
+
+# Магічні байти, версія формату, прапорці, версія знімка, кількість мешканців, квартир і зв'язків,
+# зсув і розмір таблиці рядків
+HEADER = struct.Struct("<8sHHQIIIIQQ")
+# Мешканець: сім посилань на рядки (поля RESIDENT_FIELDS)
+RESIDENT_FIELDS = ("name", "tax_id", "birthdate", "phone", "email", "additional_info", "apartment")
+RESIDENT = struct.Struct("<" + "II" * len(RESIDENT_FIELDS))
+# Квартира: посилання на номер, під'їзд, поверхів, поверх, кімнат, перший зв'язок і кількість мешканців
+APARTMENT_NUMBERS = ("entrance", "floors", "floor", "rooms")
+APARTMENT = struct.Struct("<II4iII")
+REF = struct.Struct("<II")  # Посилання на рядок: зсув у таблиці рядків і довжина
+INDEX = struct.Struct("<I")  # Рядок таблиці мешканців в індексі, впорядкованому за ІПН
+LINK = REF  # Посилання на ІПН мешканця квартири
+
+NONE_REF = 0xFFFFFFFF  # Посилання на відсутній рядок (None)
+NONE_NUMBER = -1  # Відсутнє числове поле квартири
+EMPTY_NUMBER = -2  # Порожнє числове поле квартири ("")
+# Спеціальні значення числових полів і значення, які вони позначають
+SPECIAL_NUMBERS = {NONE_NUMBER: None, EMPTY_NUMBER: ""}
+
+
+class _StringTable:
+    """Будує таблицю рядків без повторів: кожен рядок записується один раз."""
+    def __init__(self):
+        self.refs = {}
+        self.parts = []
+        self.size = 0
+
+    def ref(self, value):
+        if value is None:
+            return NONE_REF, 0
+        ref = self.refs.get(value)
+        if ref is None:
+            encoded = str(value).encode('utf-8')
+            ref = self.refs[value] = (self.size, len(encoded))
+            self.parts.append(encoded)
+            self.size += len(encoded)
+        return ref
+
+
+def _number(apartment, field):
+    """Числове поле квартири для запису фіксованої ширини."""
+    value = apartment.get(field)
+    if value is None:
+        return NONE_NUMBER
+    if value == "":
+        return EMPTY_NUMBER
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, int) or not 0 <= value < 2 ** 31:
+        raise ValueError(f"Поле {field} квартири {apartment['number']} має бути невід'ємним числом.")
+    return value
+
+
+def write_binary(data, path, version=0):
+    """ Записує дані (словники або об'єкти моделі) у бінарний знімок path.
+    Квартири впорядковуються за номером, щоб їх можна було шукати бінарним пошуком."""
+    strings = _StringTable()
+    residents = data["residents"]
+    apartments = sorted(data["apartments"], key=lambda a: (_number_key(a["number"]), a["number"]))
+
+    resident_rows = bytearray()
+    for resident in residents:
+        resident_rows += RESIDENT.pack(*(part for field in RESIDENT_FIELDS for part in strings.ref(resident.get(field))))
+
+    apartment_rows = bytearray()
+    links = bytearray()
+    links_count = 0
+    for apartment in apartments:
+        apartment_rows += APARTMENT.pack(*strings.ref(apartment["number"]),
+                                         *(_number(apartment, field) for field in APARTMENT_NUMBERS),
+                                         links_count, len(apartment["residents"]))
+        for tax_id in apartment["residents"]:
+            links += LINK.pack(*strings.ref(tax_id))
+        links_count += len(apartment["residents"])
+
+    by_tax_id = sorted(range(len(residents)), key=lambda row: residents[row]["tax_id"])
+    index = b"".join(INDEX.pack(row) for row in by_tax_id)
+
+    strings_offset = HEADER.size + len(resident_rows) + len(apartment_rows) + len(index) + len(links)
+    header = HEADER.pack(MAGIC, BINARY_FORMAT, 0, version, len(residents), len(apartments), links_count, 0,
+                         strings_offset, strings.size)
+    with open(path, 'wb') as file:
+        for part in (header, resident_rows, apartment_rows, index, links):
+            file.write(part)
+        for part in strings.parts:
+            file.write(part)
+        file.flush()
+        os.fsync(file.fileno())
+        profiler.count("bytes_written", file.tell())
+
+
+def read_header(path):
+    """Читає заголовок знімка: словник з версією формату, версією знімка та кількостями записів."""
+    with open(path, 'rb') as file:
+        raw = file.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("Файл занадто короткий для бінарного знімка.")
+    (magic, binary_format, _flags, version, residents, apartments, links, _reserved,
+     strings_offset, strings_size) = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError("Файл не є бінарним знімком будинку.")
+    if binary_format != BINARY_FORMAT:
+        raise ValueError(f"Непідтримувана версія бінарного формату: {binary_format}.")
+    return {"format": binary_format, "version": version, "residents": residents, "apartments": apartments,
+            "links": links, "strings_offset": strings_offset, "strings_size": strings_size}
+
+
+class BinarySnapshot:
+    """ BinarySnapshot відкриває бінарний знімок через mmap і декодує записи на вимогу:
+    мешканець чи квартира читаються лише тоді, коли до них звертаються.
+    Пошук мешканця за ІПН і квартири за номером - бінарний пошук без читання всього файлу."""
+    def __init__(self, path):
+        self.header = read_header(path)
+        self.version = self.header["version"]
+        self.residents_count = self.header["residents"]
+        self.apartments_count = self.header["apartments"]
+        self._residents_offset = HEADER.size
+        self._apartments_offset = self._residents_offset + self.residents_count * RESIDENT.size
+        self._index_offset = self._apartments_offset + self.apartments_count * APARTMENT.size
+        self._links_offset = self._index_offset + self.residents_count * INDEX.size
+        self._strings_offset = self.header["strings_offset"]
+        if self._links_offset + self.header["links"] * LINK.size != self._strings_offset:
+            raise ValueError("Пошкоджений бінарний знімок: розміри таблиць не збігаються.")
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) != self._strings_offset + self.header["strings_size"]:
+            self._map.close()
+            raise ValueError("Пошкоджений бінарний знімок: неочікуваний розмір файлу.")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _string(self, offset, length):
+        if offset == NONE_REF:
+            return None
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _resident_field(self, row, field):
+        """Декодує одне поле мешканця без читання решти запису."""
+        position = RESIDENT_FIELDS.index(field)
+        return self._string(*REF.unpack_from(self._map, self._residents_offset + row * RESIDENT.size
+                                             + position * REF.size))
+
+    def resident(self, row):
+        """Мешканець у рядку row таблиці."""
+        refs = RESIDENT.unpack_from(self._map, self._residents_offset + row * RESIDENT.size)
+        return Resident(**{field: self._string(refs[2 * i], refs[2 * i + 1])
+                           for i, field in enumerate(RESIDENT_FIELDS)})
+
+    def _apartment_number(self, row):
+        return self._string(*REF.unpack_from(self._map, self._apartments_offset + row * APARTMENT.size))
+
+    def apartment(self, row):
+        """Квартира в рядку row таблиці разом з ІПН її мешканців."""
+        (number_offset, number_length, *numbers, first_link, count) = APARTMENT.unpack_from(
+            self._map, self._apartments_offset + row * APARTMENT.size)
+        residents = [self._string(*LINK.unpack_from(self._map, self._links_offset + link * LINK.size))
+                     for link in range(first_link, first_link + count)]
+        return Apartment(self._string(number_offset, number_length),
+                         *(SPECIAL_NUMBERS.get(value, value) for value in numbers), residents=residents)
+
+    def iter_residents(self):
+        """Мешканці в порядку, в якому їх було записано."""
+        return (self.resident(row) for row in range(self.residents_count))
+
+    def iter_apartments(self):
+        """Квартири в порядку зростання номера."""
+        return (self.apartment(row) for row in range(self.apartments_count))
+
+    def find_resident(self, tax_id):
+        """Шукає мешканця за ІПН бінарним пошуком в індексі; повертає None, якщо не знайдено."""
+        low, high = 0, self.residents_count
+        while low < high:
+            middle = (low + high) // 2
+            row = INDEX.unpack_from(self._map, self._index_offset + middle * INDEX.size)[0]
+            if self._resident_field(row, "tax_id") < tax_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.residents_count:
+            row = INDEX.unpack_from(self._map, self._index_offset + low * INDEX.size)[0]
+            if self._resident_field(row, "tax_id") == tax_id:
+                return self.resident(row)
+        return None
+
+    def find_apartment(self, number):
+        """Шукає квартиру за номером бінарним пошуком; повертає None, якщо не знайдено."""
+        key = (_number_key(number), number)
+        low, high = 0, self.apartments_count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._apartment_number(middle)
+            if (_number_key(current), current) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.apartments_count and self._apartment_number(low) == number:
+            return self.apartment(low)
+        return None
+
+    def to_data(self):
+        """Повністю читає знімок у формат даних HouseRepository."""
+        return {"version": self.version, "format": DATA_FORMAT,
+                "residents": list(self.iter_residents()), "apartments": list(self.iter_apartments())}
+
+
+class BinaryFileManager(FileManager):
+    """ FileManager, що зберігає знімок у бінарному форматі замість JSON.
+    Журнал змін, кеш і блокування працюють так само, як у FileManager.
+    Використання: HouseRepository(path, storage=BinaryFileManager(path, journal=True))."""
+    def _disk_version(self):
+        try:
+            return read_header(self.file_path)["version"]
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _read_snapshot(self):
+        with BinarySnapshot(self.file_path) as snapshot:
+            return snapshot.to_data()
+
+    def _dump_snapshot(self, snapshot, path):
+        write_binary(snapshot, path, snapshot.get("version", 0))
+
+    def open_snapshot(self):
+        """Відкриває знімок для читання записів на вимогу (без завантаження всіх даних)."""
+        return BinarySnapshot(self.file_path)
+
+
+def json_to_binary(json_path, binary_path):
+    """Перетворює JSON-файл даних (старого або нормалізованого формату) на бінарний знімок."""
+    data = migrate_to_normalized(FileManager(json_path).load())
+    write_binary(data, binary_path, data.get("version", 0))
+    return len(data["residents"]), len(data["apartments"])
+
+
+def binary_to_json(binary_path, json_path):
+    """Перетворює бінарний знімок на JSON-файл у форматі HouseRepository."""
+    with BinarySnapshot(binary_path) as snapshot:
+        data = snapshot.to_data()
+    FileManager(json_path).compact(data)
+    return len(data["residents"]), len(data["apartments"])
+
+
+if __name__ == "__main__":
+    # Використання: python house_binary.py to-binary|to-json <json-файл> <бінарний файл>
+    #               python house_binary.py info <бінарний файл>
+    if len(sys.argv) == 3 and sys.argv[1] == "info":
+        for name, value in read_header(sys.argv[2]).items():
+            print(f"{name}: {value}")
+        sys.exit(0)
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-json"):
+        print("Використання: python house_binary.py to-binary|to-json <json-файл> <бінарний файл>\n"
+              "              python house_binary.py info <бінарний файл>")
+        sys.exit(1)
+    command, json_file, binary_file = sys.argv[1:]
+    if command == "to-binary":
+        residents, apartments = json_to_binary(json_file, binary_file)
+    else:
+        residents, apartments = binary_to_json(binary_file, json_file)
+    print(f"Перенесено мешканців: {residents}, квартир: {apartments}.")
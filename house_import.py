@@ -0,0 +1,162 @@
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from exam4_3 import HouseManagementService, HouseRepository, JsonLinesSink, Validator
+
+DEFAULT_CHUNK_SIZE = 10000
+RESIDENT_FIELDS = ("name", "tax_id", "birthdate", "phone", "email", "additional_info", "apartment")
+
+
+def detect_format(path):
+    """Формат вхідного файлу за розширенням: "csv" або "jsonl"."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Невідомий формат файлу {path}: вкажіть csv або jsonl.")
+
+
+def _normalize(record):
+    """Приводить запис до полів мешканця; порожня квартира стає None."""
+    normalized = {field: record.get(field) for field in RESIDENT_FIELDS}
+    normalized["additional_info"] = normalized["additional_info"] or ""
+    normalized["apartment"] = normalized["apartment"] or None
+    return normalized
+
+
+def iter_rows(path, fmt):
+    """ Генерує рядки файлу як (номер рядка, запис, помилка розбору).
+    Рядок JSON Lines, який не вдалося розібрати, повертається з помилкою замість запису."""
+    with open(path, encoding='utf-8', newline='') as file:
+        if fmt == "csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, _normalize(record), None
+        else:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {"raw": line.rstrip("\n")}, f"Некоректний JSON: {e.msg}."
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, {"raw": line.rstrip("\n")}, "Рядок має бути JSON-об'єктом."
+                    continue
+                yield line_number, _normalize(record), None
+
+
+def iter_chunks(rows, chunk_size):
+    """Розбиває потік рядків на списки по chunk_size."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(records):
+    """Перевіряє частину записів правилами Validator (виконується в окремому процесі)."""
+    return [checked["errors"] for checked in Validator.validate_many(records)]
+
+
+def _validated_chunks(chunks, executor, window):
+    """ Передає частини на перевірку в пул, тримаючи в роботі не більше window частин,
+    і повертає результати в порядку файлу: (частина, помилки кожного запису)."""
+    pending = deque()
+    for chunk in chunks:
+        records = [record for _, record, error in chunk if error is None]
+        pending.append((chunk, executor.submit(validate_chunk, records)))
+        if len(pending) >= window:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+    while pending:
+        chunk, future = pending.popleft()
+        yield chunk, future.result()
+
+
+def import_residents(repository, path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                     rejected_path=None, progress=None):
+    """ Імпортує мешканців із CSV або JSON Lines у репозиторій.
+    Файл читається частинами по chunk_size записів, частини перевіряються в пулі процесів,
+    а потім передаються в HouseManagementService.add_residents_bulk, який відхиляє дублікати ІПН
+    і квартири, яких немає. Увесь імпорт - одна пакетна операція з одним збереженням.
+    Відхилені рядки записуються у rejected_path (JSON Lines: рядок файлу, запис, причина).
+    progress(stats) викликається після кожної частини.
+    Повертає статистику {"read", "accepted", "rejected", "seconds", "throughput"}."""
+    fmt = fmt or detect_format(path)
+    started = time.perf_counter()
+    stats = {"read": 0, "accepted": 0, "rejected": 0, "seconds": 0.0, "throughput": 0.0}
+    rejected_sink = JsonLinesSink(rejected_path) if rejected_path else None
+    service = HouseManagementService(repository)
+
+    def reject(line_number, record, reason):
+        stats["rejected"] += 1
+        if rejected_sink is not None:
+            rejected_sink.write({"line": line_number, "record": record, "reason": reason})
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor, repository.batch():
+            window = 2 * (workers or os.cpu_count() or 1)
+            chunks = iter_chunks(iter_rows(path, fmt), chunk_size)
+            for chunk, errors in _validated_chunks(chunks, executor, window):
+                stats["read"] += len(chunk)
+                records = [record for _, record, parse_error in chunk if parse_error is None]
+                result = service.add_residents_bulk(records, errors)
+                # Відхилені сервісом записи - ті самі об'єкти, тож рядок файлу знаходиться за id
+                reasons = {id(rejected["record"]): rejected["reason"] for rejected in result["rejected"]}
+                for line_number, record, parse_error in chunk:
+                    reason = parse_error or reasons.get(id(record))
+                    if reason is not None:
+                        reject(line_number, record, reason)
+                stats["accepted"] += len(result["accepted"])
+                stats["seconds"] = time.perf_counter() - started
+                stats["throughput"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+                if progress is not None:
+                    progress(dict(stats))
+    finally:
+        if rejected_sink is not None:
+            rejected_sink.close()
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["throughput"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def print_progress(stats):
+    print(f"Оброблено: {stats['read']}, прийнято: {stats['accepted']}, відхилено: {stats['rejected']}, "
+          f"{stats['throughput']:.0f} записів/с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Імпорт мешканців із CSV або JSON Lines.")
+    parser.add_argument("input", help="файл CSV або JSON Lines")
+    parser.add_argument("--data", default="house_data1.json", help="файл даних будинку")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="формат файлу (за замовчуванням - за розширенням)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="записів в одній частині")
+    parser.add_argument("--workers", type=int, help="кількість процесів перевірки")
+    parser.add_argument("--rejected", help="файл JSON Lines для відхилених рядків")
+    arguments = parser.parse_args()
+
+    repository = HouseRepository(arguments.data, journal=True)
+    stats = import_residents(repository, arguments.input, arguments.format, arguments.chunk_size,
+                             arguments.workers, arguments.rejected, progress=print_progress)
+    repository.file_manager.compact(repository.data)
+    print(f"Імпорт завершено за {stats['seconds']:.2f} с: прийнято {stats['accepted']}, "
+          f"відхилено {stats['rejected']} із {stats['read']}.")
+    if arguments.rejected and stats["rejected"]:
+        print(f"Відхилені рядки збережено у {arguments.rejected}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import heapq
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+from exam4_3 import HouseManagementService, HouseRepository, Resident, _number_key
+from house_analytics import OccupancyAnalytics
+
+MANIFEST_NAME = "portfolio.json"
+ROUTES_NAME = "routes.jsonl"  # Маршрути ключів до під'їздів у теці будинку (режим по під'їздах)
+# Під'їзд для мешканців, ще не закріплених за жодною квартирою (режим по під'їздах)
+UNASSIGNED_ENTRANCE = 0
+
+# Звіти: назва -> (генератор рядків HouseManagementService, ключ упорядкування рядків)
+REPORTS = {
+    "residents": ("iter_residents", lambda row: _number_key(row["apartment"])),
+    "apartments": ("iter_apartments", lambda row: _number_key(row["number"])),
+    "residents_by_apartment": ("iter_residents_by_apartment", lambda row: _number_key(row["number"])),
+    "unassigned": ("iter_unassigned_residents", None),
+}
+
+
+def _shard_rows(path, report, filters, stop=None):
+    """Будує рядки звіту одного сховища, не більше stop (виконується в окремому процесі)."""
+    service = HouseManagementService(HouseRepository(path, journal=True))
+    return list(islice(getattr(service, REPORTS[report][0])(**filters), stop))
+
+
+def _shard_summary(path, year):
+    """Рахує агрегати зайнятості одного сховища (виконується в окремому процесі)."""
+    return OccupancyAnalytics(HouseRepository(path, journal=True), use_numpy=False).summary(year=year)
+
+
+def _add_counts(total, part):
+    for key, value in part.items():
+        if isinstance(value, dict):
+            _add_counts(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def merge_summaries(summaries, labels=None):
+    """ Зливає агрегати OccupancyAnalytics.summary() кількох сховищ: лічильники додаються,
+    співвідношення перераховується. Списки квартир мітяться labels, якщо їх задано."""
+    merged = {"by_entrance": {}, "by_floor": {}, "residents_per_room": {"residents": 0, "rooms": 0},
+              "age_distribution": {}, "overcrowded": [], "empty": []}
+    for position, summary in enumerate(summaries):
+        for key in ("by_entrance", "by_floor", "age_distribution"):
+            _add_counts(merged[key], summary[key])
+        for key in ("residents", "rooms"):
+            merged["residents_per_room"][key] += summary["residents_per_room"][key]
+        for key in ("overcrowded", "empty"):
+            merged[key] += [[labels[position], number] for number in summary[key]] if labels else summary[key]
+    per_room = merged["residents_per_room"]
+    per_room["ratio"] = per_room["residents"] / per_room["rooms"] if per_room["rooms"] else 0.0
+    for key in ("by_entrance", "by_floor"):
+        merged[key] = dict(sorted(merged[key].items()))
+    merged["age_distribution"] = dict(sorted(merged["age_distribution"].items(),
+                                             key=lambda item: int(item[0].split("-")[0])))
+    return merged
+
+
+class ShardRoutes:
+    """ Маршрути ключів будинку до сховищ під'їздів: ІПН мешканця та номер квартири -> під'їзд.
+    Пошук запису відкриває одне сховище замість перебору всіх під'їздів. Маршрути зберігаються
+    в журналі JSON Lines (кожна зміна - рядок) і перезаписуються цілком, коли журнал
+    стає вдвічі довшим за кількість маршрутів."""
+    COLLECTIONS = ("residents", "apartments")
+
+    def __init__(self, path):
+        self.path = path
+        self.routes = {collection: {} for collection in self.COLLECTIONS}
+        self._lines = 0
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        collection, key, entrance = json.loads(line)
+                    except ValueError:
+                        continue  # Неповний рядок після збою
+                    self._apply(collection, key, entrance)
+                    self._lines += 1
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return sum(len(routes) for routes in self.routes.values())
+
+    def _apply(self, collection, key, entrance):
+        if entrance is None:
+            self.routes[collection].pop(key, None)
+        else:
+            self.routes[collection][key] = entrance
+
+    def get(self, collection, key):
+        """Під'їзд, у сховищі якого лежить запис, або None."""
+        return self.routes[collection].get(key)
+
+    def set(self, collection, key, entrance):
+        """Записує маршрут; entrance=None видаляє його."""
+        if self.routes[collection].get(key) == entrance:
+            return
+        self._apply(collection, key, entrance)
+        if self._lines > 2 * len(self) + 1000:
+            self.rewrite()
+            return
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps([collection, key, entrance], ensure_ascii=False) + "\n")
+        self._lines += 1
+
+    def rewrite(self):
+        """Перезаписує журнал лише чинними маршрутами."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for collection, routes in self.routes.items():
+                file.writelines(json.dumps([collection, key, entrance], ensure_ascii=False) + "\n"
+                                for key, entrance in routes.items())
+        os.replace(temp_path, self.path)
+        self._lines = len(self)
+
+
+class Portfolio:
+    """ Portfolio керує багатьма будинками: дані кожного будинку (або кожного під'їзду,
+    якщо per_entrance) зберігаються в окремому сховищі HouseRepository у теці root.
+    Сховища відкриваються ліниво, тож зміна одного будинку не перечитує й не перезаписує інших.
+    У режимі по під'їздах ключі записів маршрутизуються до сховищ через ShardRoutes, тож операції
+    з одним записом відкривають одне сховище; зміни мають іти через Portfolio, щоб маршрути
+    лишалися актуальними. Звіти й агрегати будуються паралельно в ProcessPoolExecutor
+    і зливаються в порядку будинків."""
+    def __init__(self, root, per_entrance=False, journal=True, max_workers=None):
+        self.root = root
+        self.journal = journal
+        self.max_workers = max_workers  # Кількість процесів для звітів (None - за кількістю ядер)
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as file:
+                manifest = json.load(file)
+        else:
+            manifest = {"per_entrance": per_entrance, "buildings": []}
+        self.per_entrance = manifest["per_entrance"]  # Спосіб шардування фіксується при створенні
+        self.buildings = manifest["buildings"]
+        self._repositories = {}  # Шлях сховища -> відкритий HouseRepository
+        self._routes = {}  # Будинок -> ShardRoutes (режим по під'їздах)
+        self._save_manifest()
+
+    def _save_manifest(self):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({"per_entrance": self.per_entrance, "buildings": self.buildings}, file,
+                      ensure_ascii=False, indent=4)
+        os.replace(temp_path, self.manifest_path)
+
+    def add_building(self, name):
+        """Додає будинок до портфеля."""
+        if not name or os.sep in name or name in (".", ".."):
+            print(f"Некоректна назва будинку: {name!r}.")
+            return
+        if name in self.buildings:
+            print(f"Будинок {name} вже існує.")
+            return
+        self.buildings.append(name)
+        self._save_manifest()
+
+    def _check_building(self, building):
+        if building not in self.buildings:
+            raise KeyError(f"Будинок {building} не знайдено.")
+
+    def shard_path(self, building, entrance=None):
+        """Шлях сховища будинку або його під'їзду."""
+        if not self.per_entrance:
+            return os.path.join(self.root, f"{building}.json")
+        return os.path.join(self.root, building, f"entrance-{int(entrance or UNASSIGNED_ENTRANCE)}.json")
+
+    def shard_paths(self, building):
+        """Шляхи всіх наявних сховищ будинку (під'їзди - у порядку номерів)."""
+        if not self.per_entrance:
+            path = self.shard_path(building)
+            return [path] if os.path.exists(path) or path in self._repositories else []
+        directory = os.path.join(self.root, building)
+        names = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+        paths = {os.path.join(directory, name) for name in names if name.startswith("entrance-")
+                 and name.endswith(".json")}
+        paths.update(path for path in self._repositories if os.path.dirname(path) == directory)
+        return sorted(paths, key=lambda path: int(os.path.basename(path)[len("entrance-"):-len(".json")]))
+
+    def repository(self, building, entrance=None):
+        """Сховище будинку (або під'їзду); відкривається ліниво при першому зверненні."""
+        self._check_building(building)
+        return self._open(self.shard_path(building, entrance))
+
+    def _open(self, path):
+        repository = self._repositories.get(path)
+        if repository is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as file:
+                    json.dump({"residents": [], "apartments": []}, file)
+            repository = self._repositories[path] = HouseRepository(path, journal=self.journal, lazy=True)
+        return repository
+
+    def routes(self, building):
+        """ Маршрути будинку (режим по під'їздах). Для будинку без файлу маршрутів
+        (створеного до їх появи) маршрути один раз будуються з наявних сховищ."""
+        routes = self._routes.get(building)
+        if routes is None:
+            path = os.path.join(self.root, building, ROUTES_NAME)
+            exists = os.path.exists(path)
+            routes = self._routes[building] = ShardRoutes(path)
+            if not exists:
+                for shard in self.shard_paths(building):
+                    entrance = int(os.path.basename(shard)[len("entrance-"):-len(".json")])
+                    repository = self._open(shard)
+                    for collection, records, key in (("residents", repository.iter_residents(), "tax_id"),
+                                                     ("apartments", repository.iter_apartments(), "number")):
+                        routes.routes[collection].update((record[key], entrance) for record in records)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                routes.rewrite()
+        return routes
+
+    def _entrance(self, building, collection, key):
+        """Під'їзд, у сховищі якого лежить запис, або None (завжди None без поділу на під'їзди)."""
+        return self.routes(building).get(collection, key) if self.per_entrance else None
+
+    def _locate(self, building, find, key):
+        """Знаходить запис будинку за маршрутом: повертає (сховище, запис) або (None, None)."""
+        self._check_building(building)
+        collection = "residents" if find == "find_resident_by_tax_id" else "apartments"
+        if self.per_entrance:
+            entrance = self._entrance(building, collection, key)
+            if entrance is None:
+                return None, None
+            path = self.shard_path(building, entrance)
+        else:
+            path = self.shard_path(building)
+            if path not in self._repositories and not os.path.exists(path):
+                return None, None
+        repository = self._open(path)
+        record = getattr(repository, find)(key)
+        return (repository, record) if record is not None else (None, None)
+
+    def _route(self, building, collection, key, entrance):
+        if self.per_entrance:
+            self.routes(building).set(collection, key, entrance)
+
+    def find_apartment(self, building, number):
+        """Повертає квартиру будинку за номером або None."""
+        return self._locate(building, "find_apartment_by_number", number)[1]
+
+    def find_resident(self, building, tax_id):
+        """Повертає мешканця будинку за ІПН або None."""
+        return self._locate(building, "find_resident_by_tax_id", tax_id)[1]
+
+    def add_apartment(self, building, apartment):
+        """Додає квартиру до сховища її будинку (або під'їзду)."""
+        if self.find_apartment(building, apartment.number):
+            print(f"Квартира з номером {apartment.number} вже існує.")
+            return
+        # Маршрут записується першим: після збою він вказує на відсутній запис, що безпечно
+        self._route(building, "apartments", apartment.number, int(apartment.entrance or UNASSIGNED_ENTRANCE))
+        self.repository(building, apartment.entrance).add_apartment(apartment)
+
+    def add_resident(self, building, resident):
+        """Додає мешканця до будинку; у режимі по під'їздах - до сховища незакріплених мешканців."""
+        if self.find_resident(building, resident.tax_id):
+            print(f"Мешканець із ІПН {resident.tax_id} вже існує.")
+            return
+        self._route(building, "residents", resident.tax_id, UNASSIGNED_ENTRANCE)
+        self.repository(building).add_resident(resident)
+
+    def remove_resident(self, building, tax_id):
+        repository, resident = self._locate(building, "find_resident_by_tax_id", tax_id)
+        if repository is None:
+            print(f"Мешканця з ІПН {tax_id} не знайдено.")
+            return
+        repository.remove_resident(tax_id)
+        self._route(building, "residents", tax_id, None)
+
+    def remove_apartment(self, building, number):
+        repository, apartment = self._locate(building, "find_apartment_by_number", number)
+        if repository is None:
+            print(f"Квартира з номером {number} не знайдена.")
+            return
+        repository.remove_apartment(number)  # Відкріплені мешканці лишаються у сховищі під'їзду
+        self._route(building, "apartments", number, None)
+
+    def assign_resident_to_apartment(self, building, tax_id, apartment_number):
+        """ Закріплює мешканця за квартирою будинку. Якщо квартира в іншому під'їзді,
+        запис мешканця переноситься до сховища цього під'їзду: додавання і закріплення там -
+        один запис (пакетна операція), потім мешканець видаляється з попереднього сховища.
+        Перенесення не атомарне: якщо процес зупиниться між цими двома записами, маршрут уже
+        вказує на нове сховище, а в попередньому лишається копія мешканця, яку бачать звіти."""
+        source, resident = self._locate(building, "find_resident_by_tax_id", tax_id)
+        if source is None:
+            print(f"Мешканця з ІПН {tax_id} не знайдено.")
+            return
+        target, apartment = self._locate(building, "find_apartment_by_number", apartment_number)
+        if target is None:
+            print(f"Квартиру з номером {apartment_number} не знайдено.")
+            return
+        if source is target:
+            target.assign_resident_to_apartment(tax_id, apartment_number)
+            return
+        record = Resident.from_dict(resident.to_dict())
+        record.apartment = None
+        with target.batch():
+            target.add_resident(record)
+            target.assign_resident_to_apartment(tax_id, apartment_number)
+        previous = self._entrance(building, "residents", tax_id)
+        self._route(building, "residents", tax_id, self._entrance(building, "apartments", apartment_number))
+        try:
+            source.remove_resident(tax_id)
+        except Exception:
+            self._route(building, "residents", tax_id, previous)
+            with target.batch():
+                target.remove_resident(tax_id)
+            raise
+
+    def unassign_resident_from_apartment(self, building, tax_id):
+        """Відкріплює мешканця; запис лишається у сховищі, де він є."""
+        repository, resident = self._locate(building, "find_resident_by_tax_id", tax_id)
+        if repository is None:
+            print(f"Мешканця з ІПН {tax_id} не знайдено.")
+            return
+        repository.unassign_resident_from_apartment(tax_id)
+
+    def flush(self):
+        """Зберігає відкладені зміни всіх відкритих сховищ."""
+        for repository in self._repositories.values():
+            repository.flush()
+
+    def close(self):
+        for repository in self._repositories.values():
+            repository.close()
+        self._repositories.clear()
+
+    def _map_shards(self, function, buildings, *args):
+        """ Виконує function(шлях, *args) для кожного сховища в пулі процесів.
+        Повертає {будинок: [результат кожного сховища в порядку під'їздів]}."""
+        self.flush()  # Процеси читають сховища з диска
+        buildings = list(buildings) if buildings is not None else self.buildings
+        for building in buildings:
+            self._check_building(building)
+        shards = [(building, path) for building in buildings for path in self.shard_paths(building)]
+        results = {building: [] for building in buildings}
+        if not shards:
+            return results
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(function, path, *args) for _, path in shards]
+            for (building, _), future in zip(shards, futures):
+                results[building].append(future.result())
+        return results
+
+    def report(self, name, buildings=None, offset=0, limit=None, **filters):
+        """ Рядки звіту name ("residents", "apartments", "residents_by_apartment", "unassigned")
+        по всіх (або вибраних) будинках. Рядки кожного будинку йдуть разом, під'їзди зливаються
+        за номером квартири; кожен рядок містить поле building. offset/limit - сторінка всього звіту."""
+        if name not in REPORTS:
+            raise KeyError(f"Невідомий звіт: {name}.")
+        order = REPORTS[name][1]
+        # Кожне сховище повертає не більше offset + limit рядків, а сторінка береться
+        # з ланцюжка злитих генераторів без побудови повного списку
+        stop = offset + limit if limit is not None else None
+        shards = self._map_shards(_shard_rows, buildings, name, filters, stop)
+        rows = chain.from_iterable(
+            ((dict(building=building, **row) for row in
+              (heapq.merge(*parts, key=order) if order else chain.from_iterable(parts)))
+             for building, parts in shards.items()))
+        return list(islice(rows, offset, stop))
+
+    def aggregate(self, buildings=None, year=None):
+        """Агрегати зайнятості кожного будинку та всього портфеля."""
+        per_building = {building: merge_summaries(parts)
+                        for building, parts in self._map_shards(_shard_summary, buildings, year).items()}
+        total = merge_summaries(list(per_building.values()), labels=list(per_building))
+        return {"buildings": per_building, "total": total}
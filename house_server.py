@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from exam4_3 import HouseManagementService, HouseRepository, ReportCache, Validator, to_serializable
+
+# Максимальний розмір тіла запиту, байт
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+def _copy(record):
+    """Копія запису для відповіді: об'єкт моделі стає словником, вкладені списки копіюються."""
+    if hasattr(record, "to_dict"):
+        return record.to_dict()
+    return {key: list(value) if isinstance(value, list) else value for key, value in record.items()}
+
+
+class _ReadWriteLock:
+    """ Блокування читання/запису: читачів може бути кілька одночасно, запис - лише один і без читачів.
+    Запис, що чекає, не пропускає нових читачів, тож потік змін не голодує."""
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writing and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._waiting_writers += 1
+            self._condition.wait_for(lambda: not self._writing and not self._readers)
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class ApiError(Exception):
+    """Помилка запиту, що повертається клієнту з відповідним HTTP-статусом."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HouseApiServer:
+    """ HouseApiServer - локальний HTTP/JSON API над HouseManagementService на asyncio.
+    Зміни виконуються в окремому потоці (по одній, у порядку надходження) всередині відкритої
+    пакетної операції репозиторію, а запис на диск відбувається не частіше ніж раз на flush_delay секунд
+    у власному потоці. Читання виконуються паралельно в пулі потоків з пам'яті і повертають копії записів;
+    блокування читання/запису не дає їм побачити напівзмінені списки, а запису на диск - зміни посеред
+    серіалізації. Сервер має бути єдиним процесом, що змінює файл даних."""
+    def __init__(self, service, flush_delay=0.5):
+        self.service = service
+        self.repository = service.repository
+        self.flush_delay = flush_delay  # Затримка для об'єднання записів на диск, с
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="house-writer")
+        self._readers = ThreadPoolExecutor(thread_name_prefix="house-reader")
+        self._flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="house-flush")
+        self._lock = _ReadWriteLock()
+        self._loop = None
+        self._flush_handle = None
+        self._stopping = False
+        self._batch = None
+        self._server = None
+        self._routes = [
+            ("GET", ("residents",), self.list_residents),
+            ("GET", ("residents", None), self.get_resident),
+            ("POST", ("residents",), self.add_residents),
+            ("DELETE", ("residents", None), self.remove_resident),
+            ("GET", ("apartments",), self.list_apartments),
+            ("GET", ("apartments", None), self.get_apartment),
+            ("POST", ("apartments",), self.add_apartments),
+            ("DELETE", ("apartments", None), self.remove_apartment),
+            ("POST", ("assignments",), self.assign),
+            ("DELETE", ("assignments", None), self.unassign),
+            ("GET", ("reports", None), self.report),
+        ]
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Запускає сервер; зміни накопичуються в пакетній операції до наступного скидання на диск."""
+        self._loop = asyncio.get_running_loop()
+        self._batch = self.repository.batch()
+        self._batch.__enter__()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Зупиняє сервер і зберігає всі відкладені зміни."""
+        self._server.close()
+        await self._server.wait_closed()
+        self._stopping = True  # Останнє збереження виконує завершення пакетної операції
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._flusher.shutdown)
+        await loop.run_in_executor(self._writer, self._locked_write, self._batch.__exit__, None, None, None)
+        self._writer.shutdown()
+        self._readers.shutdown()
+
+    def _locked_write(self, function, *args):
+        with self._lock.writing():
+            return function(*args)
+
+    def _locked_read(self, function, *args):
+        with self._lock.reading():
+            return function(*args)
+
+    async def _write(self, function, *args):
+        """Виконує зміну в потоці запису та планує об'єднане збереження на диск."""
+        try:
+            return await self._loop.run_in_executor(self._writer, self._locked_write, function, *args)
+        finally:
+            self._plan_flush()
+
+    async def _read(self, function, *args):
+        """Виконує читання в пулі потоків паралельно з іншими читаннями, але не під час змін."""
+        return await self._loop.run_in_executor(self._readers, self._locked_read, function, *args)
+
+    @staticmethod
+    def _records(payload):
+        """Тіло запиту на додавання: один об'єкт або непорожній список об'єктів."""
+        records = payload if isinstance(payload, list) else [payload]
+        if not records:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Порожній список записів.")
+        if not all(isinstance(record, dict) for record in records):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Кожен запис має бути JSON-об'єктом.")
+        return records
+
+    def _plan_flush(self):
+        """Планує збереження відкладених змін через flush_delay секунд, якщо його ще не заплановано."""
+        if self._flush_handle is None and not self._stopping:
+            self._flush_handle = self._loop.call_later(self.flush_delay, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        # Збереження лише читає дані, тож читання під час запису на диск не чекають
+        self._flusher.submit(self._locked_read, self.repository.flush).add_done_callback(self._flushed)
+
+    def _flushed(self, future):
+        """Повідомляє про невдале збереження; зміни лишаються відкладеними і зберігаються повторно."""
+        if future.cancelled() or future.exception() is None:
+            return
+        print(f"Помилка збереження змін: {future.exception()}")
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._plan_flush)
+
+    async def _handle_connection(self, reader, writer):
+        """Обробляє запити одного з'єднання (з підтримкою keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1').strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Завеликий запит."},
+                                        keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=to_serializable).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, target, body):
+        """Знаходить обробник за методом і шляхом та повертає (статус, JSON-відповідь)."""
+        url = urlsplit(target)
+        parts = tuple(unquote(part) for part in url.path.strip("/").split("/") if part)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler in self._routes:
+            if len(pattern) == len(parts) and all(p is None or p == part for p, part in zip(pattern, parts)):
+                if route_method != method:
+                    continue
+                try:
+                    payload = json.loads(body) if body else None
+                    args = [part for p, part in zip(pattern, parts) if p is None]
+                    return await handler(*args, query=query, payload=payload)
+                except ApiError as e:
+                    return e.status, {"error": e.message}
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    return HTTPStatus.BAD_REQUEST, {"error": f"Некоректний запит: {e}"}
+        return HTTPStatus.NOT_FOUND, {"error": "Невідомий шлях."}
+
+    # --- Мешканці ---
+    async def list_residents(self, query, payload):
+        return HTTPStatus.OK, await self._read(lambda: [_copy(r) for r in self.repository.iter_residents()])
+
+    def _resident_copy(self, tax_id):
+        resident = self.repository.find_resident_by_tax_id(tax_id)
+        return _copy(resident) if resident else None
+
+    async def get_resident(self, tax_id, query, payload):
+        resident = await self._read(self._resident_copy, tax_id)
+        if not resident:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Мешканця з ІПН {tax_id} не знайдено.")
+        return HTTPStatus.OK, resident
+
+    async def add_residents(self, query, payload):
+        """Приймає один запис або список; відповідь - прийняті та відхилені записи."""
+        return self._bulk_status(await self._write(self.service.add_residents_bulk, self._records(payload)))
+
+    def _remove_resident(self, tax_id):
+        if not self.repository.find_resident_by_tax_id(tax_id):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Мешканця з ІПН {tax_id} не знайдено.")
+        self.repository.remove_resident(tax_id)
+
+    async def remove_resident(self, tax_id, query, payload):
+        # Перевірка і видалення - одна операція в потоці запису, між ними запис не може зникнути
+        await self._write(self._remove_resident, tax_id)
+        return HTTPStatus.OK, {"removed": tax_id}
+
+    # --- Квартири ---
+    async def list_apartments(self, query, payload):
+        return HTTPStatus.OK, await self._read(lambda: [_copy(a) for a in self.repository.iter_apartments()])
+
+    def _apartment_copy(self, number):
+        apartment = self.repository.find_apartment_by_number(number)
+        return _copy(apartment) if apartment else None
+
+    async def get_apartment(self, number, query, payload):
+        apartment = await self._read(self._apartment_copy, number)
+        if not apartment:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Квартира з номером {number} не знайдена.")
+        return HTTPStatus.OK, apartment
+
+    async def add_apartments(self, query, payload):
+        return self._bulk_status(await self._write(self.service.add_apartments_bulk, self._records(payload)))
+
+    def _remove_apartment(self, number):
+        if not Validator.validate_apartment(number) or not self.repository.find_apartment_by_number(number):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Квартира з номером {number} не знайдена.")
+        self.repository.remove_apartment(number)
+
+    async def remove_apartment(self, number, query, payload):
+        await self._write(self._remove_apartment, number)
+        return HTTPStatus.OK, {"removed": number}
+
+    # --- Закріплення ---
+    async def assign(self, query, payload):
+        """Приймає {"tax_id", "apartment"} або список таких об'єктів."""
+        items = self._records(payload)
+        result = await self._write(self.service.assign_many, [(item["tax_id"], item["apartment"]) for item in items])
+        return self._bulk_status(result)
+
+    def _unassign(self, tax_id):
+        resident = self.repository.find_resident_by_tax_id(tax_id)
+        if not resident:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Мешканця з ІПН {tax_id} не знайдено.")
+        if resident["apartment"] is None:
+            raise ApiError(HTTPStatus.CONFLICT, "Мешканець не закріплений за жодною квартирою.")
+        self.repository.unassign_resident_from_apartment(tax_id)
+
+    async def unassign(self, tax_id, query, payload):
+        await self._write(self._unassign, tax_id)
+        return HTTPStatus.OK, {"unassigned": tax_id}
+
+    # --- Звіти ---
+    async def report(self, name, query, payload):
+        """Звіти: residents, apartments, residents-by-apartment (з фільтрами), unassigned."""
+        filters = {}
+        if name == "residents-by-apartment":
+            filters = {key: query[key] for key in ("entrance", "floor_min", "floor_max") if key in query}
+            filters["vacant_only"] = query.get("vacant_only", "").lower() in ("1", "true", "yes")
+            filters["offset"] = int(query.get("offset", 0))
+            filters["limit"] = int(query["limit"]) if "limit" in query else None
+        report = name.replace("-", "_")
+        if "_" in name or report not in self.service.REPORT_ROWS:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Невідомий звіт: {name}.")
+        return HTTPStatus.OK, await self._read(lambda: list(self.service.report_rows(report, **filters)))
+
+    @staticmethod
+    def _bulk_status(result):
+        """201, якщо всі записи прийнято; 422, якщо жодного; інакше 207 з деталями."""
+        if not result["rejected"]:
+            status = HTTPStatus.CREATED
+        elif not result["accepted"]:
+            status = HTTPStatus.UNPROCESSABLE_ENTITY
+        else:
+            status = HTTPStatus.MULTI_STATUS
+        return status, result
+
+
+async def serve(file_path, host, port, flush_delay):
+    """Запускає API над файлом даних і працює до переривання."""
+    repository = HouseRepository(file_path, journal=True)
+    server = HouseApiServer(HouseManagementService(repository, cache=ReportCache()), flush_delay=flush_delay)
+    await server.start(host, port)
+    print(f"API доступне на http://{host}:{server.port}/")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        repository.file_manager.compact(repository.data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON API для управління мешканцями та квартирами.")
+    parser.add_argument("--file", default="house_data1.json", help="файл даних")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--flush-delay", type=float, default=0.5, help="затримка об'єднання записів, с")
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.file, arguments.host, arguments.port, arguments.flush_delay))
+    except KeyboardInterrupt:
+        print("Сервер зупинено.")
@@ -0,0 +1,432 @@
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+from exam4_3 import (APARTMENT_RANGE_FIELDS, DATA_FORMAT, FileManager, migrate_to_normalized, NON_DIGITS,
+                     PHONE_DIGITS, PHONE_QUERY, RECORD_KEYS, _MAX_CHAR, _name_tokens, _phone_key, _value_range)
+
+# Схема бази даних: квартири та мешканці в окремих таблицях, зв'язок - через поле apartment
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS apartments (
+    number TEXT PRIMARY KEY,
+    entrance TEXT,
+    floors TEXT,
+    floor TEXT,
+    rooms TEXT
+);
+CREATE INDEX IF NOT EXISTS apartments_order ON apartments (CAST(number AS INTEGER));
+-- Індекси виразів для вибірки квартир за числовими полями (query_apartments): вирази
+-- мають збігатися з умовами запиту; під'їзд і кількість кімнат найчастіше уточнюються поверхом
+CREATE INDEX IF NOT EXISTS apartments_entrance ON apartments (CAST(entrance AS INTEGER), CAST(floor AS INTEGER));
+CREATE INDEX IF NOT EXISTS apartments_floors ON apartments (CAST(floors AS INTEGER));
+CREATE INDEX IF NOT EXISTS apartments_floor ON apartments (CAST(floor AS INTEGER));
+CREATE INDEX IF NOT EXISTS apartments_rooms ON apartments (CAST(rooms AS INTEGER), CAST(floor AS INTEGER));
+CREATE TABLE IF NOT EXISTS residents (
+    tax_id TEXT PRIMARY KEY,
+    name TEXT,
+    birthdate TEXT,
+    phone TEXT,
+    email TEXT,
+    additional_info TEXT,
+    apartment TEXT,
+    seq INTEGER NOT NULL DEFAULT 0,
+    phone_reversed TEXT
+);
+CREATE INDEX IF NOT EXISTS residents_apartment ON residents (apartment, seq);
+-- Слова імен мешканців для пошуку за префіксом діапазоном по первинному ключу
+CREATE TABLE IF NOT EXISTS resident_words (
+    word TEXT,
+    tax_id TEXT,
+    PRIMARY KEY (word, tax_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resident_words_tax_id ON resident_words (tax_id);
+"""
+
+# Індекси пошуку; phone_reversed - цифри телефону у зворотному порядку, щоб кінцеві цифри
+# шукались діапазоном. Створюються після додавання стовпця до баз старішої схеми.
+SEARCH_INDEXES = """
+CREATE INDEX IF NOT EXISTS residents_phone ON residents (phone_reversed);
+CREATE INDEX IF NOT EXISTS residents_email ON residents (email COLLATE NOCASE);
+"""
+
+RESIDENT_COLUMNS = ("name", "tax_id", "birthdate", "phone", "email", "additional_info", "apartment")
+RESIDENT_INSERT = ("INSERT OR REPLACE INTO residents (name, tax_id, birthdate, phone, email, additional_info, "
+                   "apartment, phone_reversed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+APARTMENT_COLUMNS = ("number", "entrance", "floors", "floor", "rooms")
+
+MAX_INTEGER = 2 ** 63 - 1  # Найбільше ціле SQLite
+
+# Порядок, у якому звіти повертають записи (як і в HouseRepository)
+APARTMENTS_ORDER = "ORDER BY CAST(number AS INTEGER), number"
+RESIDENTS_ORDER = "ORDER BY apartment IS NULL, CAST(apartment AS INTEGER), tax_id"
+
+# Квартира разом зі списком ІПН її мешканців у порядку закріплення
+APARTMENT_SELECT = """
+SELECT number, entrance, floors, floor, rooms,
+       (SELECT json_group_array(tax_id) FROM
+            (SELECT tax_id FROM residents WHERE apartment = apartments.number ORDER BY seq)) AS residents
+FROM apartments
+"""
+
+
+def connect(db_path):
+    """Відкриває з'єднання з базою та створює схему, якщо її ще немає."""
+    connection = sqlite3.connect(db_path, isolation_level=None)  # Транзакціями керуємо явно
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    if "phone_reversed" not in {row["name"] for row in connection.execute("PRAGMA table_info(residents)")}:
+        _add_search_columns(connection)
+    connection.executescript(SEARCH_INDEXES)
+    return connection
+
+
+def _add_search_columns(connection):
+    """Переводить базу старішої схеми: додає ключі пошуку для вже збережених мешканців."""
+    with _transaction(connection):
+        connection.execute("ALTER TABLE residents ADD COLUMN phone_reversed TEXT")
+        residents = [dict(row) for row in connection.execute(f"SELECT {', '.join(RESIDENT_COLUMNS)} FROM residents")]
+        connection.executemany("UPDATE residents SET phone_reversed = ? WHERE tax_id = ?",
+                               ((_resident_row(r)[-1], r["tax_id"]) for r in residents))
+        _put_words(connection, residents)
+
+
+def _resident_row(record):
+    return tuple(record.get(column) for column in RESIDENT_COLUMNS) + (_phone_key(record.get("phone"))[::-1],)
+
+
+def _put_words(connection, records):
+    """Оновлює слова імен мешканців у таблиці пошуку."""
+    connection.executemany("DELETE FROM resident_words WHERE tax_id = ?", ((r["tax_id"],) for r in records))
+    connection.executemany("INSERT OR IGNORE INTO resident_words (word, tax_id) VALUES (?, ?)",
+                           ((word, r["tax_id"]) for r in records for word in set(_name_tokens(r.get("name")))))
+
+
+def _put_residents(connection, records):
+    """Записує мешканців (з заміною наявних) разом із ключами пошуку."""
+    records = list(records)
+    connection.executemany(RESIDENT_INSERT, (_resident_row(record) for record in records))
+    _put_words(connection, records)
+
+
+def _delete_resident(connection, tax_id):
+    """Видаляє мешканця та його слова з таблиці пошуку; повертає кількість видалених мешканців."""
+    connection.execute("DELETE FROM resident_words WHERE tax_id = ?", (tax_id,))
+    return connection.execute("DELETE FROM residents WHERE tax_id = ?", (tax_id,)).rowcount
+
+
+def _apartment_row(record):
+    return tuple(record.get(column) for column in APARTMENT_COLUMNS)
+
+
+def _write_records(connection, data):
+    """Записує мешканців і квартири з даних у форматі JSON (вже нормалізованих)."""
+    connection.executemany(
+        "INSERT OR REPLACE INTO apartments (number, entrance, floors, floor, rooms) VALUES (?, ?, ?, ?, ?)",
+        (_apartment_row(apartment) for apartment in data["apartments"]))
+    _put_residents(connection, data["residents"])
+    # Порядок мешканців у квартирах беремо зі списків ІПН квартир
+    connection.executemany(
+        "UPDATE residents SET seq = ? WHERE tax_id = ?",
+        ((position, tax_id) for apartment in data["apartments"]
+         for position, tax_id in enumerate(apartment["residents"], 1)))
+
+
+def _read_records(connection):
+    """Читає всі записи бази у форматі даних HouseRepository."""
+    return {
+        "residents": [dict(row) for row in connection.execute(
+            f"SELECT {', '.join(RESIDENT_COLUMNS)} FROM residents {RESIDENTS_ORDER}")],
+        "apartments": [_apartment_from_row(row) for row in connection.execute(
+            f"{APARTMENT_SELECT} {APARTMENTS_ORDER}")],
+    }
+
+
+def _apartment_from_row(row):
+    apartment = dict(row)
+    apartment["residents"] = json.loads(apartment["residents"])
+    return apartment
+
+
+class SqliteStorage:
+    """ SqliteStorage - сховище з інтерфейсом FileManager (load/save) поверх SQLite.
+    HouseRepository може використовувати його замість JSON-файлу: зміни журналу
+    застосовуються як окремі рядки в одній транзакції."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = connect(db_path)
+
+    def load(self):
+        """Завантажує всі дані з бази."""
+        return _read_records(self.connection)
+
+    def save(self, data, changes=None):
+        """Зберігає зміни (або повністю замінює вміст бази, якщо змін не передано) однією транзакцією."""
+        with _transaction(self.connection):
+            if changes is None:
+                self.connection.execute("DELETE FROM residents")
+                self.connection.execute("DELETE FROM resident_words")
+                self.connection.execute("DELETE FROM apartments")
+                _write_records(self.connection, data)
+                return
+            for change in changes:
+                if change["op"] == "put" and change["collection"] == "residents":
+                    _put_residents(self.connection, [change["record"]])
+                elif change["op"] == "put":
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO apartments (number, entrance, floors, floor, rooms) "
+                        "VALUES (?, ?, ?, ?, ?)", _apartment_row(change["record"]))
+                    self.connection.executemany(
+                        "UPDATE residents SET seq = ? WHERE tax_id = ?",
+                        ((position, tax_id) for position, tax_id in enumerate(change["record"]["residents"], 1)))
+                elif change["collection"] == "residents":
+                    _delete_resident(self.connection, change["key"])
+                else:
+                    key_field = RECORD_KEYS[change["collection"]]
+                    self.connection.execute(
+                        f"DELETE FROM {change['collection']} WHERE {key_field} = ?", (change["key"],))
+
+    def compact(self, data):
+        """Для SQLite ущільнення не потрібне - зміни вже в базі."""
+
+
+@contextmanager
+def _transaction(connection):
+    """Виконує блок в одній транзакції; при помилці зміни відкочуються."""
+    connection.execute("BEGIN")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class SqliteHouseRepository:
+    """ SqliteHouseRepository - репозиторій з тим самим інтерфейсом, що й HouseRepository,
+    але без завантаження всього будинку в пам'ять: пошук іде за індексами бази,
+    кожна зміна - окрема транзакція, а звіти виконуються SQL-запитами."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = connect(db_path)
+        self._batch_depth = 0  # Глибина вкладених пакетних операцій
+
+    @contextmanager
+    def _write(self):
+        """Транзакція для зміни; всередині пакетної операції використовується її транзакція."""
+        if self._batch_depth:
+            yield self.connection
+        else:
+            with _transaction(self.connection):
+                yield self.connection
+
+    @contextmanager
+    def batch(self):
+        """ Пакетна операція: усі зміни всередині блоку виконуються в одній транзакції. """
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+        with _transaction(self.connection):
+            self._batch_depth = 1
+            try:
+                yield self
+            finally:
+                self._batch_depth = 0
+
+    def flush(self):
+        """Зміни зберігаються одразу в базі, тому відкладених даних немає."""
+
+    def find_resident_by_tax_id(self, tax_id):
+        """Повертає мешканця за його ІПН або None, якщо не знайдено."""
+        row = self.connection.execute(
+            f"SELECT {', '.join(RESIDENT_COLUMNS)} FROM residents WHERE tax_id = ?", (tax_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_apartment_by_number(self, number):
+        """Повертає квартиру за її номером або None, якщо не знайдено."""
+        row = self.connection.execute(f"{APARTMENT_SELECT} WHERE number = ?", (number,)).fetchone()
+        return _apartment_from_row(row) if row else None
+
+    def iter_residents(self):
+        """Повертає мешканців у порядку номерів квартир."""
+        cursor = self.connection.execute(f"SELECT {', '.join(RESIDENT_COLUMNS)} FROM residents {RESIDENTS_ORDER}")
+        return (dict(row) for row in cursor)
+
+    def iter_apartments(self):
+        """Повертає квартири в порядку зростання номера."""
+        cursor = self.connection.execute(f"{APARTMENT_SELECT} {APARTMENTS_ORDER}")
+        return (_apartment_from_row(row) for row in cursor)
+
+    def search_residents(self, query, limit=20, fuzzy=True):
+        """ Шукає мешканців SQL-запитом за тими ж правилами, що й HouseRepository.search_residents:
+        запит з "@" - email, цифри - ІПН, номер телефону або його кінцеві цифри, інакше - слова імені
+        за префіксом. Кожна умова - пошук за індексом (точний збіг або діапазон префікса), а не обхід
+        таблиці. Опечатки (fuzzy) в SQLite не враховуються. Повертає не більше limit мешканців."""
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        columns = ", ".join(RESIDENT_COLUMNS)
+        if "@" in query:
+            cursor = self.connection.execute(
+                f"SELECT {columns} FROM residents WHERE email = ? COLLATE NOCASE ORDER BY tax_id LIMIT ?",
+                (query, limit))
+        elif PHONE_QUERY.fullmatch(query):
+            digits = NON_DIGITS.sub("", query)
+            # Повний номер - точний збіг, кінцеві цифри - діапазон перевернутих номерів
+            prefix = digits[-PHONE_DIGITS:][::-1]
+            upper = prefix if len(digits) >= PHONE_DIGITS else prefix + _MAX_CHAR
+            # Точний збіг ІПН - першим, далі мешканці зі збігом телефону
+            cursor = self.connection.execute(
+                f"SELECT {columns} FROM residents WHERE tax_id IN "
+                f"(SELECT ? UNION SELECT tax_id FROM residents WHERE phone_reversed >= ? AND phone_reversed <= ?) "
+                f"ORDER BY tax_id != ?, tax_id LIMIT ?", (digits, prefix, upper, digits, limit))
+        else:
+            tokens = _name_tokens(query)
+            if not tokens:
+                return []
+            conditions = " AND ".join(
+                "tax_id IN (SELECT tax_id FROM resident_words WHERE word >= ? AND word < ?)" for _ in tokens)
+            cursor = self.connection.execute(
+                f"SELECT {columns} FROM residents WHERE {conditions} ORDER BY tax_id LIMIT ?",
+                (*(bound for token in tokens for bound in (token, token + _MAX_CHAR)), limit))
+        return [dict(row) for row in cursor]
+
+    def query_apartments(self, entrance=None, floors=None, floor=None, rooms=None, vacant=None):
+        """ Вибирає квартири SQL-запитом з умовами WHERE за тими ж правилами, що й
+        HouseRepository.query_apartments: число - точне значення, пара (від, до) - діапазон включно,
+        vacant - лише вільні (True) або заселені (False). Квартири з нечисловим полем не підходять.
+        Умови за полями використовують індекси виразів CAST(поле AS INTEGER) (див. SCHEMA)."""
+        conditions, parameters = [], []
+        for field, condition in zip(APARTMENT_RANGE_FIELDS, (entrance, floors, floor, rooms)):
+            if condition is None:
+                continue
+            low, high = _value_range(condition)
+            # Відкриті межі замінюємо межами цілих SQLite: з обома межами планувальник обирає індекс
+            low, high = max(low, 0), min(high, MAX_INTEGER)
+            if low == high:
+                conditions.append(f"CAST({field} AS INTEGER) = ?")
+                parameters.append(low)
+            else:
+                conditions.append(f"CAST({field} AS INTEGER) BETWEEN ? AND ?")
+                parameters += [low, high]
+            # CAST перетворює нечислові значення на 0 - такі квартири відкидаємо окремою умовою
+            conditions.append(f"{field} != '' AND {field} NOT GLOB '*[^0-9]*'")
+        if vacant is not None:
+            conditions.append(("NOT " if vacant else "") +
+                              "EXISTS (SELECT 1 FROM residents WHERE apartment = apartments.number)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.connection.execute(f"{APARTMENT_SELECT} {where} {APARTMENTS_ORDER}", parameters)
+        return [_apartment_from_row(row) for row in cursor]
+
+    def residents_of(self, apartment):
+        """Повертає мешканців квартири."""
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(RESIDENT_COLUMNS)} FROM residents WHERE apartment = ? ORDER BY seq",
+            (apartment["number"],))
+        return [dict(row) for row in cursor]
+
+    def add_resident(self, resident):
+        """Додає мешканця."""
+        if self.find_resident_by_tax_id(resident.tax_id):
+            print(f"Мешканець із ІПН {resident.tax_id} вже існує.")
+            return
+        with self._write() as connection:
+            _put_residents(connection, [resident.to_dict()])
+
+    def remove_resident(self, tax_id):
+        """ Видаляє мешканця за ІПН. """
+        with self._write() as connection:
+            if not _delete_resident(connection, tax_id):
+                print(f"Мешканця з ІПН {tax_id} не знайдено.")
+
+    def add_apartment(self, apartment):
+        """ Додає квартиру. """
+        if self.find_apartment_by_number(apartment.number):
+            print(f"Квартира з номером {apartment.number} вже існує.")
+            return
+        with self._write() as connection:
+            connection.execute("INSERT INTO apartments (number, entrance, floors, floor, rooms) VALUES (?, ?, ?, ?, ?)",
+                               _apartment_row(apartment.to_dict()))
+
+    def remove_apartment(self, number):
+        """ Видаляє квартиру та відкріплює від неї мешканців. """
+        with self._write() as connection:
+            if not connection.execute("DELETE FROM apartments WHERE number = ?", (number,)).rowcount:
+                print(f"Квартира з номером {number} не знайдена.")
+                return
+            connection.execute("UPDATE residents SET apartment = NULL, seq = 0 WHERE apartment = ?", (number,))
+
+    def assign_resident_to_apartment(self, tax_id, apartment_number):
+        """Закріплює мешканця за квартирою."""
+        resident = self.find_resident_by_tax_id(tax_id)
+        if not resident:
+            print(f"Мешканця з ІПН {tax_id} не знайдено.")
+            return
+        if not self.connection.execute("SELECT 1 FROM apartments WHERE number = ?", (apartment_number,)).fetchone():
+            print(f"Квартиру з номером {apartment_number} не знайдено.")
+            return
+        if resident["apartment"] == apartment_number:
+            print(f"Мешканець з ІПН {tax_id} вже прив'язаний до квартири з номером {apartment_number}.")
+            return
+        with self._write() as connection:
+            connection.execute(
+                "UPDATE residents SET apartment = ?, "
+                "seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM residents WHERE apartment = ?) WHERE tax_id = ?",
+                (apartment_number, apartment_number, tax_id))
+
+    def unassign_resident_from_apartment(self, tax_id):
+        """Відкріплює мешканця від квартири."""
+        resident = self.find_resident_by_tax_id(tax_id)
+        if not resident:
+            print(f"Мешканця з ІПН {tax_id} не знайдено.")
+            return
+        if resident["apartment"] is None:
+            print(f"Мешканець не закріплений за жодною квартирою.")
+            return
+        with self._write() as connection:
+            connection.execute("UPDATE residents SET apartment = NULL, seq = 0 WHERE tax_id = ?", (tax_id,))
+
+    def close(self):
+        """Закриває з'єднання з базою."""
+        self.connection.close()
+
+
+def import_json(json_path, db_path):
+    """Імпортує дані з JSON-файлу (старого або нормалізованого формату) у базу SQLite."""
+    data = migrate_to_normalized(FileManager(json_path).load())
+    connection = connect(db_path)
+    try:
+        with _transaction(connection):
+            _write_records(connection, data)
+    finally:
+        connection.close()
+    return len(data["residents"]), len(data["apartments"])
+
+
+def export_json(db_path, json_path):
+    """Експортує вміст бази SQLite у JSON-файл у форматі HouseRepository."""
+    connection = connect(db_path)
+    try:
+        data = _read_records(connection)
+    finally:
+        connection.close()
+    data["format"] = DATA_FORMAT
+    FileManager(json_path).compact(data)
+    return len(data["residents"]), len(data["apartments"])
+
+
+if __name__ == "__main__":
+    # Використання: python house_sqlite.py import|export <json-файл> <файл бази>
+    if len(sys.argv) != 4 or sys.argv[1] not in ("import", "export"):
+        print("Використання: python house_sqlite.py import|export <json-файл> <файл бази>")
+        sys.exit(1)
+    command, json_file, db_file = sys.argv[1:]
+    if command == "import":
+        residents, apartments = import_json(json_file, db_file)
+    else:
+        residents, apartments = export_json(db_file, json_file)
+    print(f"Перенесено мешканців: {residents}, квартир: {apartments}.")
@@ -37,6 +37,27 @@ class TestValidator(unittest.TestCase):
         self.assertFalse(Validator.validate_apartment("Apartment1"))
         self.assertFalse(Validator.validate_apartment(""))
 
+    def test_validate_date_checks_calendar(self):
+        self.assertTrue(Validator.validate_date("2024-02-29"))
+        self.assertTrue(Validator.validate_date("2023-1-5"))
+        self.assertFalse(Validator.validate_date("2023-02-29"))
+        self.assertFalse(Validator.validate_date("2023-13-01"))
+
+    def test_validate_many_returns_all_errors_per_record(self):
+        records = [
+            {"name": "Андрій", "tax_id": "123456789", "birthdate": "1990-01-01",
+             "phone": "050-123-45-67", "email": "andre@gmail.com"},
+            {"name": "", "tax_id": "12345", "birthdate": "1990-01-01", "phone": "123", "email": "andre@gmail.com"},
+        ]
+        results = Validator.validate_many(records)
+        self.assertEqual(results[0]["errors"], {})
+        self.assertEqual(set(results[1]["errors"]), {"name", "tax_id", "phone"})
+        self.assertIs(results[1]["record"], records[1])
+
+        apartments = Validator.validate_many([{"number": "1", "entrance": "1", "floors": "5", "floor": "x"}],
+                                             kind="apartment")
+        self.assertEqual(set(apartments[0]["errors"]), {"floor", "rooms"})
+
 if __name__ == "__main__":
     unittest.main()
 
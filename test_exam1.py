@@ -1,5 +1,5 @@
 import unittest
-from exam4_3 import Resident  # Імпорт класy Resident
+from exam4_3 import Resident, Apartment  # Імпорт класів Resident та Apartment
 
 class TestResident(unittest.TestCase):
     def setUp(self):
@@ -75,6 +75,31 @@ class TestResident(unittest.TestCase):
         """
         self.assertNotEqual(self.resident1, "Some string")
 
+    def test_compact_record_with_dict_access(self):
+        """
+        Перевірка, що Resident не має __dict__, але поля доступні як ключі словника.
+        """
+        self.assertFalse(hasattr(self.resident1, "__dict__"))
+        self.assertEqual(self.resident1["name"], "Андрій")
+        self.assertEqual(self.resident1.get("apartment"), "5")
+        self.resident1["apartment"] = None
+        self.assertIsNone(self.resident1.apartment)
+        self.assertEqual(Resident.from_dict(self.resident2.to_dict()), self.resident2)
+        with self.assertRaises(KeyError):
+            self.resident1["unknown"]
+
+
+class TestApartment(unittest.TestCase):
+    def test_numeric_fields_are_integers_in_memory(self):
+        """
+        Числові поля квартири зберігаються як int, а у словнику для файлу - як рядки.
+        """
+        apartment = Apartment("12", "2", "9", "5", "3")
+        self.assertEqual((apartment.entrance, apartment.floors, apartment.floor, apartment.rooms), (2, 9, 5, 3))
+        apartment.add_resident(Resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        self.assertEqual(apartment.to_dict(), {"number": "12", "entrance": "2", "floors": "9", "floor": "5",
+                                               "rooms": "3", "residents": ["123456789"]})
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
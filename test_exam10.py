@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import struct
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from exam4_3 import Apartment, HouseManagementService, HouseRepository, Resident
+from house_binary import (HEADER, BinaryFileManager, BinarySnapshot, binary_to_json, json_to_binary,
+                          read_header, write_binary)
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.binary_path = os.path.join(self.temp_dir.name, "house.bin")
+        self.data = {
+            "residents": [
+                {"name": "Андрій", "tax_id": "222222222", "birthdate": "1990-01-01", "phone": "050-123-45-67",
+                 "email": "andre@gmail.com", "additional_info": "", "apartment": "12"},
+                {"name": "Тамара", "tax_id": "111111111", "birthdate": "1985-05-15", "phone": "050-987-65-43",
+                 "email": "tamara@gmail.com", "additional_info": "кіт", "apartment": None},
+            ],
+            "apartments": [
+                {"number": "12", "entrance": "2", "floors": "9", "floor": "4", "rooms": "3", "residents": ["222222222"]},
+                {"number": "3", "entrance": "1", "floors": "9", "floor": "1", "rooms": "1", "residents": []},
+            ]
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_records_are_read_on_demand(self):
+        write_binary(self.data, self.binary_path, version=7)
+        with BinarySnapshot(self.binary_path) as snapshot:
+            self.assertEqual(snapshot.version, 7)
+            self.assertEqual(snapshot.find_resident("111111111").to_dict(), self.data["residents"][1])
+            self.assertIsNone(snapshot.find_resident("333333333"))
+            self.assertEqual(snapshot.find_apartment("12").to_dict(), self.data["apartments"][0])
+            self.assertIsNone(snapshot.find_apartment("4"))
+            # Квартири впорядковані за номером
+            self.assertEqual([a["number"] for a in snapshot.iter_apartments()], ["3", "12"])
+
+    def test_json_round_trip(self):
+        json_path = os.path.join(self.temp_dir.name, "house.json")
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file, ensure_ascii=False)
+        self.assertEqual(json_to_binary(json_path, self.binary_path), (2, 2))
+        self.assertEqual(binary_to_json(self.binary_path, json_path), (2, 2))
+        with open(json_path, encoding='utf-8') as file:
+            restored = json.load(file)
+        self.assertEqual(restored["residents"], self.data["residents"])
+        self.assertEqual(restored["apartments"], sorted(self.data["apartments"], key=lambda a: int(a["number"])))
+
+    def test_empty_numeric_fields_round_trip(self):
+        self.data["apartments"][1].update(entrance="", floors=None)
+        write_binary(self.data, self.binary_path)
+        with BinarySnapshot(self.binary_path) as snapshot:
+            self.assertEqual(snapshot.find_apartment("3").to_dict(), self.data["apartments"][1])
+
+    def test_header_is_checked(self):
+        write_binary(self.data, self.binary_path)
+        self.assertEqual(read_header(self.binary_path)["residents"], 2)
+        with open(self.binary_path, 'r+b') as file:
+            file.seek(8)
+            file.write(struct.pack("<H", 99))  # Невідома версія формату
+        with self.assertRaises(ValueError):
+            BinarySnapshot(self.binary_path)
+        with open(self.binary_path, 'wb') as file:
+            file.write(b"{}" + bytes(HEADER.size))
+        with self.assertRaises(ValueError):
+            read_header(self.binary_path)
+
+    def test_repository_with_binary_storage(self):
+        write_binary({"residents": [], "apartments": []}, self.binary_path)
+        repository = HouseRepository(self.binary_path, storage=BinaryFileManager(self.binary_path, journal=True))
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        repository.add_resident(Resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        repository.assign_resident_to_apartment("123456789", "1")
+        repository.file_manager.compact(repository.data)
+
+        file_manager = BinaryFileManager(self.binary_path, journal=True)
+        self.assertEqual(file_manager._disk_version(), 1)
+        with file_manager.open_snapshot() as snapshot:
+            self.assertEqual(snapshot.find_apartment("1")["residents"], ["123456789"])
+        reloaded = HouseRepository(self.binary_path, storage=file_manager)
+        self.assertEqual(reloaded.find_resident_by_tax_id("123456789")["apartment"], "1")
+
+    def test_non_numeric_apartment_fields_are_rejected_before_saving(self):
+        write_binary({"residents": [], "apartments": []}, self.binary_path)
+        repository = HouseRepository(self.binary_path, storage=BinaryFileManager(self.binary_path, journal=True),
+                                     durability="exit")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            repository.add_apartment(Apartment("1", "A", "5", "1", "2"))
+            HouseManagementService(repository).add_apartment("2", "A", "5", "1", "2")
+        self.assertIn("Номер під'їзду повинен бути числом.", output.getvalue())
+        self.assertIsNone(repository.find_apartment_by_number("1"))
+        self.assertIsNone(repository.find_apartment_by_number("2"))
+        repository.add_apartment(Apartment("3", "", None, "1", "2"))
+        repository.flush()  # Порожні поля зберігаються, відкладених змін, які не можна записати, немає
+        self.assertEqual(repository.find_apartment_by_number("3")["entrance"], "")
+
+
+if __name__ == '__main__':
+    unittest.main()
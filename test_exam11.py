@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from exam4_3 import Apartment, Resident
+from house_portfolio import Portfolio
+
+
+def resident(tax_id, name="Мешканець"):
+    return Resident(name, tax_id, "1990-01-01", "050-123-45-67", "r@example.com", "")
+
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_edits_touch_only_their_building(self):
+        portfolio = Portfolio(self.root, max_workers=2)
+        for building in ("A", "B"):
+            portfolio.add_building(building)
+            portfolio.add_apartment(building, Apartment("1", "1", "5", "1", "2"))
+        portfolio.close()
+
+        portfolio = Portfolio(self.root, max_workers=2)
+        other = portfolio.shard_path("B")
+        state = os.stat(other).st_mtime_ns, os.path.getsize(other)
+        portfolio.add_resident("A", resident("123456789"))
+        portfolio.assign_resident_to_apartment("A", "123456789", "1")
+
+        self.assertEqual(portfolio.find_resident("A", "123456789")["apartment"], "1")
+        self.assertIsNone(portfolio.find_resident("B", "123456789"))
+        self.assertEqual((os.stat(other).st_mtime_ns, os.path.getsize(other)), state)
+        portfolio.close()
+
+    def test_per_entrance_shards_move_residents_between_entrances(self):
+        portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+        portfolio.add_building("A")
+        portfolio.add_apartment("A", Apartment("1", "1", "5", "1", "2"))
+        portfolio.add_apartment("A", Apartment("7", "2", "5", "1", "2"))
+        portfolio.add_resident("A", resident("123456789"))
+
+        portfolio.assign_resident_to_apartment("A", "123456789", "7")
+        self.assertIsNone(portfolio.repository("A").find_resident_by_tax_id("123456789"))
+        self.assertEqual(portfolio.repository("A", 2).find_apartment_by_number("7")["residents"], ["123456789"])
+        self.assertEqual([os.path.basename(path) for path in portfolio.shard_paths("A")],
+                         ["entrance-0.json", "entrance-1.json", "entrance-2.json"])
+
+        portfolio.assign_resident_to_apartment("A", "123456789", "1")
+        self.assertEqual(portfolio.find_apartment("A", "7")["residents"], [])
+        self.assertEqual(portfolio.find_resident("A", "123456789")["apartment"], "1")
+        portfolio.close()
+
+    def test_lookups_open_only_the_routed_shard(self):
+        portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+        portfolio.add_building("A")
+        for number, entrance in (("1", "1"), ("7", "2"), ("9", "3")):
+            portfolio.add_apartment("A", Apartment(number, entrance, "5", "1", "2"))
+        portfolio.add_resident("A", resident("123456789"))
+        portfolio.assign_resident_to_apartment("A", "123456789", "7")
+        portfolio.close()
+
+        for routes_kept in (True, False):
+            if not routes_kept:
+                os.remove(os.path.join(self.root, "A", "routes.jsonl"))  # Будинок без маршрутів будує їх заново
+            portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+            portfolio.routes("A")
+            portfolio.close()
+            portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+            self.assertEqual(portfolio.find_resident("A", "123456789")["apartment"], "7")
+            self.assertEqual(portfolio.find_apartment("A", "9")["number"], "9")
+            self.assertIsNone(portfolio.find_apartment("A", "5"))
+            self.assertEqual(sorted(os.path.basename(path) for path in portfolio._repositories),
+                             ["entrance-2.json", "entrance-3.json"])
+            portfolio.close()
+
+    def test_failed_cross_shard_assign_leaves_resident_in_source(self):
+        portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+        portfolio.add_building("A")
+        portfolio.add_apartment("A", Apartment("7", "2", "5", "1", "2"))
+        portfolio.add_resident("A", resident("123456789"))
+        target = portfolio.repository("A", 2)
+        with mock.patch.object(target, "assign_resident_to_apartment", side_effect=OSError("збій")):
+            with self.assertRaises(OSError):
+                portfolio.assign_resident_to_apartment("A", "123456789", "7")
+        self.assertIsNone(target.find_resident_by_tax_id("123456789"))
+        self.assertIsNone(portfolio.find_resident("A", "123456789")["apartment"])
+        portfolio.close()
+
+    def test_reports_and_aggregates_merge_shards_in_order(self):
+        portfolio = Portfolio(self.root, per_entrance=True, max_workers=2)
+        for building in ("A", "B"):
+            portfolio.add_building(building)
+            for number, entrance in (("3", "2"), ("1", "1"), ("2", "1")):
+                portfolio.add_apartment(building, Apartment(number, entrance, "5", "1", "1"))
+        portfolio.add_resident("A", resident("111111111"))
+        portfolio.add_resident("A", resident("222222222"))
+        portfolio.assign_resident_to_apartment("A", "111111111", "3")
+
+        rows = portfolio.report("apartments")
+        self.assertEqual([(row["building"], row["number"]) for row in rows],
+                         [("A", "1"), ("A", "2"), ("A", "3"), ("B", "1"), ("B", "2"), ("B", "3")])
+        self.assertEqual(portfolio.report("unassigned"), [{"building": "A", "name": "Мешканець", "tax_id": "222222222"}])
+        self.assertEqual(len(portfolio.report("residents_by_apartment", buildings=["B"], offset=1, limit=1)), 1)
+        self.assertEqual([(row["building"], row["number"]) for row in portfolio.report("apartments", offset=2, limit=2)],
+                         [("A", "3"), ("B", "1")])
+
+        aggregate = portfolio.aggregate(year=2024)
+        self.assertEqual(aggregate["buildings"]["A"]["by_entrance"], {1: {"apartments": 2, "residents": 0},
+                                                                     2: {"apartments": 1, "residents": 1}})
+        self.assertEqual(aggregate["total"]["residents_per_room"], {"residents": 1, "rooms": 6, "ratio": 1 / 6})
+        self.assertEqual(len(aggregate["total"]["empty"]), 5)
+        portfolio.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from exam4_3 import Apartment, HouseManagementService, HouseRepository, Resident
+from exam_fixtures import empty_house_file
+from house_import import detect_format, import_residents
+
+
+def record(tax_id, **fields):
+    return dict({"name": "Андрій", "tax_id": tax_id, "birthdate": "1990-01-01", "phone": "050-123-45-67",
+                 "email": "andre@gmail.com", "additional_info": "", "apartment": ""}, **fields)
+
+
+class TestImportPipeline(unittest.TestCase):
+    def setUp(self):
+        self.data_path = empty_house_file(self)
+        self.repository = HouseRepository(self.data_path, journal=True)
+        self.repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        self.repository.add_resident(Resident(
+            "Тамара", "999999999", "1985-05-15", "050-987-65-43", "t@b.cc", ""))
+        self.rows = [record("111111111", apartment="1"), record("222222222", email="bad"),
+                     record("111111111"), record("999999999"), record("333333333", apartment="42"),
+                     record("444444444")]
+
+    def check_import(self, path):
+        rejected_path = os.path.join(self.temp_dir.name, "rejected.jsonl")
+        progress = []
+        with patch.object(self.repository.file_manager, "save", wraps=self.repository.file_manager.save) as save:
+            stats = import_residents(self.repository, path, chunk_size=2, workers=2,
+                                     rejected_path=rejected_path, progress=progress.append)
+            save.assert_called_once()  # Усі прийняті записи - одним збереженням
+
+        self.assertEqual((stats["accepted"], stats["rejected"]), (2, stats["read"] - 2))
+        self.assertEqual(len(progress), (stats["read"] + 1) // 2)
+        self.assertEqual(self.repository.find_resident_by_tax_id("111111111")["apartment"], "1")
+        self.assertIsNotNone(self.repository.find_resident_by_tax_id("444444444"))
+        with open(rejected_path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_csv_import(self):
+        path = os.path.join(self.temp_dir.name, "residents.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(self.rows[0]))
+            writer.writeheader()
+            writer.writerows(self.rows)
+        rejected = self.check_import(path)
+        self.assertEqual([row["line"] for row in rejected], [3, 4, 5, 6])
+        self.assertEqual(rejected[0]["reason"], "Неправильний формат email.")
+        self.assertIn("вже існує", rejected[1]["reason"])
+
+    def test_jsonl_import_with_broken_line(self):
+        path = os.path.join(self.temp_dir.name, "residents.jsonl")
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in self.rows:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            file.write('{"name": "обірваний\n')
+        rejected = self.check_import(path)
+        self.assertEqual([row["line"] for row in rejected], [2, 3, 4, 5, 7])
+        self.assertIn("Некоректний JSON", rejected[-1]["reason"])
+
+    def test_bulk_add_uses_given_validation_errors(self):
+        service = HouseManagementService(self.repository)
+        with patch("exam4_3.Validator.validate_many") as validate_many:
+            result = service.add_residents_bulk([record("555555555"), record("666666666")],
+                                                errors=[{}, {"email": "Неправильний формат email."}])
+        validate_many.assert_not_called()
+        self.assertEqual([row["tax_id"] for row in result["accepted"]], ["555555555"])
+        self.assertEqual(result["rejected"][0]["reason"], "Неправильний формат email.")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            detect_format("residents.xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+from exam4_3 import Apartment, HouseRepository, Resident  # Імпортуємо клас з основного файлу
+
+
+class TestHouseRepository(unittest.TestCase):
+
+    @patch('exam4_3.FileManager')  # Патчимо клас FileManager
+    def setUp(self, MockFileManager):
+        # Створюємо мок для FileManager
+        self.mock_file_manager = MagicMock()
+        MockFileManager.return_value = self.mock_file_manager
+
+        # Підготовка тестових даних
+        self.mock_file_manager.load.return_value = {
+            "residents": [
+                {"tax_id": "123456789", "name": "John Doe", "email": "john.doe@example.com"},
+                {"tax_id": "987654321", "name": "Jane Doe", "email": "jane.doe@example.com"}
+            ],
+            "apartments": [
+                {"number": 101, "residents": [{"tax_id": "123456789"}]},
+                {"number": 102, "residents": [{"tax_id": "987654321"}]}
+            ]
+        }
+
+        # Ініціалізація HouseRepository
+        self.repository = HouseRepository("test_file_path.json")
+
+    def test_find_resident_by_tax_id(self):
+        # Тест на пошук мешканця за ІПН
+        resident = self.repository.find_resident_by_tax_id("123456789")
+        self.assertIsNotNone(resident)
+        self.assertEqual(resident["name"], "John Doe")
+
+        # Тест на пошук неіснуючого мешканця
+        resident = self.repository.find_resident_by_tax_id("111111111")
+        self.assertIsNone(resident)
+
+    def test_add_resident(self):
+        # Тест на додавання мешканця
+        new_resident = MagicMock()
+        new_resident.tax_id = "1122334455"
+        new_resident.to_dict.return_value = {"tax_id": "1122334455", "name": "New Resident"}
+
+        self.repository.add_resident(new_resident)
+
+        # Перевіряємо, чи викликано метод збереження
+        self.mock_file_manager.save.assert_called_once()
+        # Репозиторій зберігає об'єкти моделі, тому порівнюємо поля запису
+        residents = self.mock_file_manager.save.call_args[0][0]["residents"]
+        self.assertIn(("1122334455", "New Resident"), [(r["tax_id"], r["name"]) for r in residents])
+
+    def test_remove_resident(self):
+        # Тест на видалення мешканця
+        self.repository.remove_resident("123456789")
+
+        # Перевіряємо, чи викликано метод збереження
+        self.mock_file_manager.save.assert_called_once()
+        # Перевіряємо, чи мешканець більше не присутній у списку
+        residents = self.mock_file_manager.save.call_args[0][0]["residents"]
+        self.assertNotIn({"tax_id": "123456789", "name": "John Doe"}, residents)
+
+    def test_remove_non_existent_resident(self):
+        # Тест на видалення неіснуючого мешканця
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.repository.remove_resident("000000000")
+        self.assertIn("Мешканця з ІПН 000000000 не знайдено.", output.getvalue())
+        # Перевіряємо, що метод save не був викликаний
+        self.mock_file_manager.save.assert_not_called()
+
+    def test_indexes_follow_mutations_and_reload(self):
+        # Індекси оновлюються при видаленні та перезавантаженні даних
+        self.repository.remove_resident("123456789")
+        self.assertIsNone(self.repository.find_resident_by_tax_id("123456789"))
+
+        self.repository.data = {
+            "residents": [{"tax_id": "555555555", "name": "Reloaded"}],
+            "apartments": [{"number": 7, "residents": []}]
+        }
+        self.assertEqual(self.repository.find_resident_by_tax_id("555555555")["name"], "Reloaded")
+        self.assertIsNone(self.repository.find_resident_by_tax_id("987654321"))
+        self.assertIsNotNone(self.repository.find_apartment_by_number(7))
+        self.assertIsNone(self.repository.find_apartment_by_number(101))
+
+    def test_legacy_layout_is_migrated_to_tax_id_references(self):
+        # Старий формат: повні копії мешканців усередині квартир
+        self.repository.data = {
+            "residents": [{"tax_id": "123456789", "name": "John Doe", "apartment": 101}],
+            "apartments": [
+                {"number": 101, "residents": [{"tax_id": "123456789", "name": "John Doe", "apartment": 101}]}
+            ]
+        }
+        apartment = self.repository.find_apartment_by_number(101)
+        self.assertEqual(apartment["residents"], ["123456789"])
+        # Сумісне подання повертає повні дані мешканців
+        self.assertEqual(self.repository.apartment_view(apartment)["residents"][0]["name"], "John Doe")
+
+        self.repository.remove_resident("123456789")
+        self.assertEqual(apartment["residents"], [])
+
+    def test_lists_stay_sorted_after_mutations(self):
+        # Квартири впорядковані за номером, мешканці - за номером квартири
+        resident = {"name": "", "birthdate": "", "phone": "", "email": "", "additional_info": ""}
+        apartment = {"entrance": "1", "floors": "5", "floor": "1", "rooms": "2"}
+        self.repository.data = {
+            "residents": [dict(resident, tax_id="1", apartment=None), dict(resident, tax_id="2", apartment="5")],
+            "apartments": [dict(apartment, number="5", residents=["2"]), dict(apartment, number="12", residents=[])]
+        }
+        new_apartment = MagicMock()
+        new_apartment.number = "3"
+        new_apartment.to_dict.return_value = dict(apartment, number="3", residents=[])
+        self.repository.add_apartment(new_apartment)
+        self.repository.assign_resident_to_apartment("1", "3")
+
+        self.assertEqual([a["number"] for a in self.repository.data["apartments"]], ["3", "5", "12"])
+        self.assertEqual([r["tax_id"] for r in self.repository.data["residents"]], ["1", "2"])
+
+        self.repository.unassign_resident_from_apartment("1")
+        self.assertEqual([r["tax_id"] for r in self.repository.data["residents"]], ["2", "1"])
+
+
+    def test_assignment_updates_records_in_place_and_rolls_back(self):
+        resident = {"name": "", "birthdate": "", "phone": "", "email": "", "additional_info": ""}
+        apartment = {"entrance": "1", "floors": "5", "floor": "1", "rooms": "2"}
+        self.repository.data = {
+            "residents": [dict(resident, tax_id="1", apartment="5"), dict(resident, tax_id="2", apartment=None)],
+            "apartments": [dict(apartment, number="5", residents=["1"]), dict(apartment, number="7", residents=[])]
+        }
+        record = self.repository.find_resident_by_tax_id("1")
+        apartments = self.repository.data["apartments"]
+
+        # Закріплення змінює ті самі об'єкти, а не створює копії списків і записів
+        self.repository.assign_resident_to_apartment("1", "7")
+        self.assertIs(self.repository.find_resident_by_tax_id("1"), record)
+        self.assertIs(self.repository.data["apartments"], apartments)
+        self.assertEqual(self.repository.find_apartment_by_number("7")["residents"], ["1"])
+
+        # Помилка збереження відкочує всі зміни
+        self.mock_file_manager.save.side_effect = OSError("disk full")
+        with self.assertRaises(OSError):
+            self.repository.assign_resident_to_apartment("1", "5")
+        self.assertEqual(record["apartment"], "7")
+        self.assertEqual(self.repository.find_apartment_by_number("7")["residents"], ["1"])
+        self.assertEqual(self.repository.find_apartment_by_number("5")["residents"], [])
+        self.assertEqual([r["tax_id"] for r in self.repository.data["residents"]], ["1", "2"])
+
+        with self.assertRaises(OSError):
+            self.repository.unassign_resident_from_apartment("1")
+        self.assertEqual(record["apartment"], "7")
+        self.assertEqual(self.repository.find_apartment_by_number("7")["residents"], ["1"])
+
+    def test_search_by_name_phone_and_email_follows_mutations(self):
+        def resident(tax_id, name, phone, email):
+            return {"tax_id": tax_id, "name": name, "birthdate": "1990-01-01", "phone": phone, "email": email,
+                    "additional_info": "", "apartment": None}
+        self.repository.data = {"residents": [
+            resident("111111111", "Андрій Шевченко", "050-123-45-67", "andrii@gmail.com"),
+            resident("222222222", "Олена Шевчук", "+38-067-765-43-21", "olena@ukr.net"),
+            resident("333333333", "Тамара Коваленко", "063-111-22-33", "tamara@gmail.com")], "apartments": []}
+
+        def found(query, **options):
+            return [r["tax_id"] for r in self.repository.search_residents(query, **options)]
+
+        self.assertEqual(found("шевч"), ["111111111", "222222222"])
+        self.assertEqual(found("шевч олена"), ["222222222"])
+        self.assertEqual(found("Шевченка Андрй"), ["111111111"])  # Опечатки
+        self.assertEqual(found("Шевченка", fuzzy=False), [])
+        self.assertEqual(found("43-21"), ["222222222"])
+        self.assertEqual(found("067 765 43 21"), ["222222222"])
+        self.assertEqual(found("OLENA@ukr.net"), ["222222222"])
+        self.assertEqual(found("333333333"), ["333333333"])
+        self.assertEqual(found("шевч", limit=1), ["111111111"])
+
+        # Індекс оновлюється разом з репозиторієм
+        self.repository.add_resident(Resident.from_dict(resident("444444444", "Петро Шевчишин", "", "")))
+        self.repository.remove_resident("111111111")
+        self.assertCountEqual(found("шевч"), ["222222222", "444444444"])
+        self.assertEqual(found("45-67"), [])
+        self.assertEqual(found("andrii@gmail.com"), [])
+
+    def test_query_apartments_by_ranges_follows_mutations(self):
+        self.repository.data = {"residents": [], "apartments": [
+            {"number": str(n), "entrance": str(1 + n % 2), "floors": "9", "floor": str(1 + n % 9),
+             "rooms": str(1 + n % 3), "residents": ["1"] if n % 5 == 0 else []} for n in range(1, 31)]}
+
+        def numbers(**conditions):
+            return [a["number"] for a in self.repository.query_apartments(**conditions)]
+
+        expected = [str(n) for n in range(1, 31)
+                    if 1 + n % 2 == 2 and 1 + n % 3 == 3 and 5 <= 1 + n % 9 <= 9]
+        self.assertEqual(numbers(entrance=2, rooms=3, floor=(5, 9)), expected)
+        self.assertEqual(numbers(entrance="1", vacant=True), [str(n) for n in range(2, 31, 2) if n % 5])
+        self.assertEqual(numbers(floor=(None, 3), vacant=False), ["10", "20"])
+        self.assertEqual(numbers(rooms=(2, 3)), [str(n) for n in range(1, 31) if n % 3])
+        self.assertEqual(len(numbers()), 30)
+
+        # Індекси оновлюються разом з репозиторієм
+        self.repository.add_apartment(Apartment("31", "2", "9", "6", "3"))
+        self.repository.remove_apartment(expected[0])
+        self.assertEqual(numbers(entrance=2, rooms=3, floor=(5, 9)), expected[1:] + ["31"])
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,244 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+from exam4_3 import (HouseRepository, HouseManagementService, Validator, Resident,
+                     CsvSink, JsonLinesSink, ReportCache, TextSink, main)
+from exam_fixtures import empty_house_file
+
+class TestHouseManagementService(unittest.TestCase):
+    def setUp(self):
+        # Мокаємо репозиторій, щоб не використовувати реальні дані
+        self.repository = MagicMock(spec=HouseRepository)
+        # Мокаємо data, щоб воно було доступне у репозиторії
+        self.repository.data = {"residents": []}  # Підготовка порожнього списку для мешканців
+        self.service = HouseManagementService(self.repository)
+
+    def test_add_resident_success(self):
+        """Перевірка додавання мешканця з правильними даними."""
+        # Підготовка
+        self.repository.add_resident = MagicMock()  # Мокаємо додавання мешканця
+
+        # Дані для мешканця
+        name = "John Doe"
+        tax_id = "123456789"
+        birthdate = "1985-05-15"
+        phone = "050-123-45-67"
+        email = "john.doe@example.com"
+        additional_info = "Additional info"
+
+        # Мокаємо метод generate_report_residents, щоб він не виконувався
+        self.service.generate_report_residents = MagicMock()
+        # Звіт після зміни виводиться лише на запит
+        self.service.auto_report = True
+
+        # Виклик методу
+        with redirect_stdout(io.StringIO()):
+            self.service.add_resident(name, tax_id, birthdate, phone, email, additional_info)
+
+        # Перевірка, чи був викликаний метод для додавання мешканця
+        self.repository.add_resident.assert_called_once()
+
+        # Перевірка, чи був викликаний метод для генерації звіту
+        self.service.generate_report_residents.assert_called_once()
+
+    def test_add_resident_invalid_tax_id(self):
+        """Перевірка додавання мешканця з неправильним ІПН."""
+        name = "John Doe"
+        tax_id = "12345"  # Некоректний ІПН
+        birthdate = "1985-05-15"
+        phone = "050-123-45-67"
+        email = "john.doe@example.com"
+        additional_info = "Additional info"
+
+        # Виклик методу
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.service.add_resident(name, tax_id, birthdate, phone, email, additional_info)
+        self.assertIn("ІПН повинен складатися з 9 цифр.", output.getvalue())
+
+        # Перевірка, чи не було додано мешканця (метод не повинен бути викликаний)
+        self.repository.add_resident.assert_not_called()
+
+    def test_add_resident_does_not_report_by_default(self):
+        """Без auto_report зміна не виводить повний звіт."""
+        self.service.generate_report_residents = MagicMock()
+        with redirect_stdout(io.StringIO()):
+            self.service.add_resident("John Doe", "123456789", "1985-05-15", "050-123-45-67",
+                                      "john.doe@example.com", "")
+        self.service.generate_report_residents.assert_not_called()
+
+    def test_menu_reports_after_changes_only_with_flag(self):
+        """Меню вмикає звіт після кожної зміни лише з параметром --auto-report."""
+        for argv, expected in (([], False), (["--auto-report"], True)):
+            with patch("exam4_3.HouseRepository") as repository_class, \
+                    patch("exam4_3.HouseManagementService") as service_class, \
+                    patch("builtins.input", side_effect=["10"]), redirect_stdout(io.StringIO()):
+                repository_class.return_value.load_time = 0.0
+                main(argv)
+            self.assertEqual(service_class.call_args.kwargs["auto_report"], expected)
+
+    # Інші тести...
+
+
+class TestReportSinks(unittest.TestCase):
+    def setUp(self):
+        self.repository = MagicMock(spec=HouseRepository)
+        self.repository.iter_residents.side_effect = lambda: iter([
+            {"name": "Андрій", "tax_id": "123456789", "apartment": "5"},
+            {"name": "Тамара", "tax_id": "987654321", "apartment": None},
+        ])
+        self.service = HouseManagementService(self.repository)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reports_are_generators(self):
+        rows = self.service.iter_unassigned_residents()
+        self.assertEqual(next(rows), {"name": "Тамара", "tax_id": "987654321"})
+
+    def test_search_results_are_written_to_sink(self):
+        self.repository.search_residents.return_value = [Resident(
+            "Андрій", "123456789", "1990-01-01", "050-123-45-67", "andre@gmail.com", "", None)]
+        stream = io.StringIO()
+        rows = self.service.search_residents("андр", sink=TextSink(stream), limit=5)
+        self.repository.search_residents.assert_called_once_with("андр", 5, True)
+        self.assertEqual(rows[0]["apartment"], "Не закріплена")
+        self.assertIn("Андрій, ІПН: 123456789, Телефон: 050-123-45-67", stream.getvalue())
+
+    def test_residents_by_apartment_filters_and_pages(self):
+        apartments = [
+            {"number": str(n), "entrance": str(1 + n % 2), "floor": str(n), "residents": ["123456789"] if n == 1 else []}
+            for n in range(1, 8)
+        ]
+        self.repository.iter_apartments.side_effect = lambda: iter(apartments)
+        self.repository.residents_of.side_effect = lambda apartment: (
+            [{"name": "Андрій", "tax_id": "123456789"}] if apartment["residents"] else [])
+
+        rows = list(self.service.iter_residents_by_apartment())
+        self.assertEqual(rows[0]["residents"], [{"name": "Андрій", "tax_id": "123456789"}])
+        self.assertEqual(len(rows), 7)
+
+        rows = self.service.iter_residents_by_apartment(entrance=1, floor_min=2, floor_max=6, vacant_only=True,
+                                                         offset=1, limit=1)
+        self.assertEqual([row["number"] for row in rows], ["4"])
+
+    def test_csv_json_lines_and_text_sinks(self):
+        csv_path = os.path.join(self.temp_dir.name, "residents.csv")
+        jsonl_path = os.path.join(self.temp_dir.name, "residents.jsonl")
+        text_path = os.path.join(self.temp_dir.name, "residents.txt")
+        with CsvSink(csv_path) as csv_sink, JsonLinesSink(jsonl_path) as jsonl_sink, \
+                TextSink(text_path, buffer_size=1) as text_sink:
+            self.service.generate_report_residents(csv_sink)
+            self.service.generate_report_residents(jsonl_sink)
+            self.service.generate_report_residents(text_sink)
+
+        with open(csv_path, encoding='utf-8') as file:
+            self.assertEqual(file.read().splitlines(),
+                             ["name,tax_id,apartment", "Андрій,123456789,5", "Тамара,987654321,"])
+        with open(jsonl_path, encoding='utf-8') as file:
+            self.assertEqual(json.loads(file.readline())["tax_id"], "123456789")
+        with open(text_path, encoding='utf-8') as file:
+            self.assertIn("Ім'я: Тамара, ІПН: 987654321, Квартира: None", file.read())
+
+
+class TestBulkOperations(unittest.TestCase):
+    def setUp(self):
+        # Справжній репозиторій у тимчасовому файлі
+        self.repository = HouseRepository(empty_house_file(self))
+        self.service = HouseManagementService(self.repository)
+
+    def test_bulk_operations_save_once_and_report_rejections(self):
+        apartments = [
+            {"number": "2", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"},
+            {"number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "1"},
+            {"number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "1"},
+            {"number": "x", "entrance": "1", "floors": "5", "floor": "1", "rooms": "1"},
+        ]
+        residents = [
+            {"name": "Андрій", "tax_id": "123456789", "birthdate": "1990-01-01",
+             "phone": "050-123-45-67", "email": "andre@gmail.com", "apartment": "2"},
+            {"name": "Тамара", "tax_id": "987654321", "birthdate": "1985-05-15",
+             "phone": "050-987-65-43", "email": "tamara@gmail.com"},
+            {"name": "Дублікат", "tax_id": "123456789", "birthdate": "1990-01-01",
+             "phone": "050-123-45-67", "email": "andre@gmail.com"},
+            {"name": "Помилка", "tax_id": "12345", "birthdate": "1990-01-01",
+             "phone": "050-123-45-67", "email": "bad@gmail.com"},
+        ]
+        with patch.object(self.repository.file_manager, 'save',
+                          wraps=self.repository.file_manager.save) as save:
+            apartment_result = self.service.add_apartments_bulk(apartments)
+            resident_result = self.service.add_residents_bulk(residents)
+            assign_result = self.service.assign_many([("987654321", "1"), ("000000000", "1")])
+        self.assertEqual(save.call_count, 3)
+
+        self.assertEqual(len(apartment_result["accepted"]), 2)
+        self.assertEqual(len(apartment_result["rejected"]), 2)
+        # Причини відхилення мають однаковий формат для квартир і мешканців
+        self.assertEqual([r["reason"] for r in apartment_result["rejected"]],
+                         ["Квартира з номером 1 вже існує.", "Номер квартири повинен бути числом."])
+        self.assertEqual(resident_result["rejected"][1]["reason"], "ІПН повинен складатися з 9 цифр.")
+        self.assertEqual(len(resident_result["accepted"]), 2)
+        self.assertEqual([r["record"]["name"] for r in resident_result["rejected"]], ["Дублікат", "Помилка"])
+        self.assertEqual(assign_result["accepted"], [("987654321", "1")])
+        self.assertEqual(len(assign_result["rejected"]), 1)
+
+        self.assertEqual([a["number"] for a in self.repository.data["apartments"]], ["1", "2"])
+        self.assertEqual(self.repository.find_apartment_by_number("2")["residents"], ["123456789"])
+        self.assertEqual(self.repository.find_resident_by_tax_id("987654321")["apartment"], "1")
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.repository = HouseRepository(empty_house_file(self))
+        self.cache = ReportCache()
+        self.service = HouseManagementService(self.repository, cache=self.cache)
+        with redirect_stdout(io.StringIO()):
+            self.service.add_apartment("1", "1", "5", "1", "2")
+            self.service.add_resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "andre@gmail.com", "")
+
+    def report(self, method, **filters):
+        stream = io.StringIO()
+        getattr(self.service, method)(sink=TextSink(stream), **filters)
+        return stream.getvalue()
+
+    def test_reports_are_cached_until_repository_changes(self):
+        with patch.object(self.service, "iter_unassigned_residents",
+                          wraps=self.service.iter_unassigned_residents) as rows:
+            first = self.report("report_unassigned_residents")
+            self.assertEqual(self.report("report_unassigned_residents"), first)
+            self.assertEqual(rows.call_count, 1)
+
+            # Будь-яка зміна збільшує ревізію - звіт перебудовується
+            revision = self.repository.revision
+            with redirect_stdout(io.StringIO()):
+                self.service.assign_resident_to_apartment("123456789", "1")
+            self.assertGreater(self.repository.revision, revision)
+            self.assertNotIn("Андрій", self.report("report_unassigned_residents"))
+            self.assertEqual(rows.call_count, 2)
+
+        # Фільтри - частина ключа кешу
+        self.assertIn("Андрій", self.report("report_residents_by_apartment", entrance="1"))
+        self.assertNotIn("Андрій", self.report("report_residents_by_apartment", entrance="2"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 4, 3))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ReportCache(max_bytes=1000)
+        cache.get("a", 1, lambda: "a" * 300)
+        cache.get("b", 1, lambda: "b" * 300)
+        cache.get("a", 1, lambda: self.fail("результат має бути в кеші"))
+        cache.get("c", 1, lambda: "c" * 300)  # Витісняє "b", до якого зверталися найдавніше
+        self.assertEqual(cache.get("b", 1, lambda: "новий"), "новий")
+        self.assertEqual(cache.get("x", 1, lambda: "x" * 2000), "x" * 2000)  # Більший за кеш - не зберігається
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 5, 1))
+        self.assertLessEqual(stats["bytes"], 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
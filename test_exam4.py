@@ -0,0 +1,333 @@
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from exam4_3 import (FileManager, HouseManagementService, HouseRepository, Resident, Apartment, JsonStreamReader,
+                     VERSION_PATTERN, apply_changes, delete_change, put_change, write_json_stream)
+from exam_fixtures import empty_house_file, write_empty_house
+
+
+class TestFileManagerJournal(unittest.TestCase):
+    def setUp(self):
+        # Тимчасова тека з порожнім файлом даних
+        self.file_path = empty_house_file(self)
+
+    def test_mutations_are_journaled_and_replayed(self):
+        repository = HouseRepository(self.file_path, journal=True)
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        repository.add_resident(Resident("Андрій", "123456789", "1990-01-01",
+                                         "050-123-45-67", "andre@gmail.com", ""))
+        repository.assign_resident_to_apartment("123456789", "1")
+
+        # Основний файл не перезаписувався, зміни лише в журналі
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)["residents"], [])
+        self.assertTrue(os.path.exists(repository.file_manager.journal_path))
+
+        # Нове завантаження відтворює журнал
+        reloaded = HouseRepository(self.file_path, journal=True)
+        self.assertEqual(reloaded.find_resident_by_tax_id("123456789")["apartment"], "1")
+        self.assertEqual(len(reloaded.find_apartment_by_number("1")["residents"]), 1)
+
+    def test_compaction_writes_snapshot_and_clears_journal(self):
+        file_manager = FileManager(self.file_path, journal=True, compact_every=2)
+        data = file_manager.load()
+        record = {"number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2", "residents": []}
+        data["apartments"].append(record)
+        file_manager.save(data, changes=[{"op": "put", "collection": "apartments", "record": record}])
+        file_manager.save(data, changes=[{"op": "put", "collection": "apartments", "record": record}])
+
+        self.assertFalse(os.path.exists(file_manager.journal_path))
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)["apartments"], [record])
+
+    def test_torn_journal_line_is_ignored(self):
+        file_manager = FileManager(self.file_path, journal=True)
+        with open(file_manager.journal_path, 'w', encoding='utf-8') as journal:
+            journal.write(json.dumps({"op": "put", "collection": "residents",
+                                      "record": {"tax_id": "1", "name": "A"}}) + "\n")
+            journal.write('{"op": "put", "collec')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            data = file_manager.load()
+        self.assertIn("пропущено пошкоджених рядків: 1.", output.getvalue())
+        self.assertEqual(data["residents"], [{"tax_id": "1", "name": "A"}])
+
+    def test_apply_changes_with_interleaved_deletes(self):
+        data = {"residents": [{"tax_id": str(n), "name": str(n)} for n in range(5)]}
+        apply_changes(data, [delete_change("residents", "1"), put_change("residents", {"tax_id": "3", "name": "x"}),
+                             delete_change("residents", "0"), put_change("residents", {"tax_id": "1", "name": "y"}),
+                             delete_change("residents", "4"), delete_change("residents", "9")])
+        self.assertEqual(data["residents"], [{"tax_id": "2", "name": "2"}, {"tax_id": "3", "name": "x"},
+                                             {"tax_id": "1", "name": "y"}])
+
+    def test_changes_after_torn_line_survive_reload(self):
+        repository = HouseRepository(self.file_path, journal=True)
+        repository.add_resident(Resident("A", "111111111", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        # Збій під час запису лишив неповний рядок у кінці журналу
+        with open(repository.file_manager.journal_path, 'a', encoding='utf-8') as journal:
+            journal.write('{"op": "put", "collec')
+
+        with redirect_stdout(io.StringIO()):
+            restarted = HouseRepository(self.file_path, journal=True)
+            restarted.add_resident(Resident("B", "222222222", "1990-01-01", "050-123-45-67", "b@b.cc", ""))
+            restarted.add_resident(Resident("C", "333333333", "1990-01-01", "050-123-45-67", "c@b.cc", ""))
+            reloaded = HouseRepository(self.file_path, journal=True)
+        self.assertEqual(sorted(r["name"] for r in reloaded.iter_residents()), ["A", "B", "C"])
+        with open(repository.file_manager.journal_path, encoding='utf-8') as journal:
+            self.assertTrue(all(json.loads(line) for line in journal))
+
+    def test_write_failure_rolls_back_assignment(self):
+        repository = HouseRepository(self.file_path, journal=True)
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        repository.add_resident(Resident("A", "111111111", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        with patch.object(FileManager, "_append_journal", side_effect=OSError("disk full")), \
+                redirect_stdout(io.StringIO()) as output, self.assertRaises(OSError):
+            repository.assign_resident_to_apartment("111111111", "1")
+        self.assertIn("Помилка запису до файлу: disk full", output.getvalue())
+        self.assertIsNone(repository.find_resident_by_tax_id("111111111")["apartment"])
+        self.assertEqual(repository.find_apartment_by_number("1")["residents"], [])
+
+        # Відкочені зміни не потрапляють на диск із наступним записом
+        repository.add_resident(Resident("B", "222222222", "1990-01-01", "050-123-45-67", "b@b.cc", ""))
+        reloaded = HouseRepository(self.file_path, journal=True)
+        self.assertIsNone(reloaded.find_resident_by_tax_id("111111111")["apartment"])
+        self.assertEqual(reloaded.find_apartment_by_number("1")["residents"], [])
+        self.assertIsNotNone(reloaded.find_resident_by_tax_id("222222222"))
+
+    def test_write_failure_rolls_back_adds_and_removals(self):
+        repository = HouseRepository(self.file_path)
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        repository.add_resident(Resident("A", "111111111", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        repository.assign_resident_to_apartment("111111111", "1")
+        # Індекси діапазонів і пошуку теж мають відкочуватися
+        repository.query_apartments(rooms=2)
+        repository.search_residents("A")
+        with patch.object(FileManager, "_write_snapshot", side_effect=OSError("disk full")), \
+                redirect_stdout(io.StringIO()):
+            for operation, argument in ((repository.add_resident, Resident("B", "222222222", "1990-01-01",
+                                                                             "050-123-45-67", "b@b.cc", "")),
+                                        (repository.add_apartment, Apartment("2", "1", "5", "2", "2")),
+                                        (repository.remove_resident, "111111111"),
+                                        (repository.remove_apartment, "1")):
+                with self.assertRaises(OSError):
+                    operation(argument)
+        self.assertIsNone(repository.find_resident_by_tax_id("222222222"))
+        self.assertIsNone(repository.find_apartment_by_number("2"))
+        self.assertEqual(repository.find_resident_by_tax_id("111111111")["apartment"], "1")
+        self.assertEqual(repository.find_apartment_by_number("1")["residents"], ["111111111"])
+        self.assertEqual([a.number for a in repository.query_apartments(rooms=2)], ["1"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("050-123-45-67")], ["111111111"])
+
+        # Наступний успішний запис не зберігає відкочених змін
+        repository.add_resident(Resident("C", "333333333", "1990-01-01", "050-123-45-68", "c@b.cc", ""))
+        reloaded = HouseRepository(self.file_path)
+        self.assertEqual(sorted(r.tax_id for r in reloaded.iter_residents()), ["111111111", "333333333"])
+        self.assertEqual([a.number for a in reloaded.iter_apartments()], ["1"])
+        self.assertEqual(reloaded.find_apartment_by_number("1")["residents"], ["111111111"])
+
+    def test_failed_batch_is_rolled_back(self):
+        repository = HouseRepository(self.file_path, journal=True)
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        with self.assertRaises(RuntimeError):
+            with repository.batch():
+                repository.add_resident(Resident("A", "111111111", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+                repository.assign_resident_to_apartment("111111111", "1")
+                raise RuntimeError("збій")
+        self.assertIsNone(repository.find_resident_by_tax_id("111111111"))
+        self.assertEqual(repository.find_apartment_by_number("1")["residents"], [])
+
+        # Якщо не вдалося записати весь пакет, він теж відкочується
+        service = HouseManagementService(repository)
+        record = {"name": "B", "tax_id": "222222222", "birthdate": "1990-01-01", "phone": "050-123-45-67",
+                  "email": "b@b.cc", "apartment": "1"}
+        with patch.object(FileManager, "_append_journal", side_effect=OSError("disk full")), \
+                redirect_stdout(io.StringIO()), self.assertRaises(OSError):
+            service.add_residents_bulk([record])
+        self.assertIsNone(repository.find_resident_by_tax_id("222222222"))
+        self.assertEqual(repository.find_apartment_by_number("1")["residents"], [])
+
+        repository.add_apartment(Apartment("2", "1", "5", "1", "2"))
+        reloaded = HouseRepository(self.file_path, journal=True)
+        self.assertEqual(list(reloaded.iter_residents()), [])
+        self.assertEqual([a.number for a in reloaded.iter_apartments()], ["1", "2"])
+
+
+class TestConcurrentWriters(unittest.TestCase):
+    def setUp(self):
+        self.file_path = empty_house_file(self)
+
+    def check_both_edits_survive(self, journal):
+        # Два "термінали" відкрили той самий файл і змінюють його по черзі
+        first = HouseRepository(self.file_path, journal=journal)
+        second = HouseRepository(self.file_path, journal=journal)
+        first.add_resident(Resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        second.add_resident(Resident("Тамара", "987654321", "1985-05-15", "050-987-65-43", "t@b.cc", ""))
+
+        # Другий репозиторій злив свої зміни з даними першого
+        self.assertIsNotNone(second.find_resident_by_tax_id("123456789"))
+        reloaded = HouseRepository(self.file_path)
+        self.assertEqual(sorted(r.tax_id for r in reloaded.data["residents"]), ["123456789", "987654321"])
+
+    def test_snapshot_mode_merges_on_conflict(self):
+        self.check_both_edits_survive(journal=False)
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)["version"], 2)
+
+    def test_journal_mode_merges_on_conflict(self):
+        self.check_both_edits_survive(journal=True)
+
+
+class TestLazyLoadingAndCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "house.json")
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            json.dump({"residents": [{"name": "Андрій", "tax_id": "123456789", "apartment": None}],
+                       "apartments": []}, file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_lazy_repository_loads_on_first_access(self):
+        repository = HouseRepository(self.file_path, lazy=True)
+        self.assertIsNone(repository.load_time)
+        self.assertEqual(repository.find_resident_by_tax_id("123456789")["name"], "Андрій")
+        self.assertIsNotNone(repository.load_time)
+
+    def test_cache_is_used_until_source_changes(self):
+        FileManager(self.file_path, cache=True).load()
+        self.assertTrue(os.path.exists(FileManager(self.file_path).cache_path))
+
+        with patch('exam4_3.json.load') as json_load:
+            data = FileManager(self.file_path, cache=True).load()
+        json_load.assert_not_called()
+        self.assertEqual(data["residents"][0]["tax_id"], "123456789")
+
+        # Зміна файлу робить кеш недійсним
+        write_empty_house(self.file_path)
+        self.assertEqual(FileManager(self.file_path, cache=True).load()["residents"], [])
+
+    def test_cache_does_not_hide_concurrent_save(self):
+        resident = {"name": "Тамара", "tax_id": "987654321", "apartment": None}
+        write_cache = FileManager._write_cache
+
+        def save_before_cache(manager, data, signature):
+            # Інший процес зберігає файл між читанням даних і записом кешу
+            FileManager(self.file_path).save({"residents": [resident], "apartments": []})
+            write_cache(manager, data, signature)
+
+        with patch.object(FileManager, "_write_cache", save_before_cache):
+            FileManager(self.file_path, cache=True).load()
+        self.assertEqual(FileManager(self.file_path, cache=True).load()["residents"], [resident])
+
+
+class TestDurabilityModes(unittest.TestCase):
+    def setUp(self):
+        self.file_path = empty_house_file(self)
+
+    def add_apartments(self, repository, count):
+        for number in range(1, count + 1):
+            repository.add_apartment(Apartment(str(number), "1", "5", "1", "2"))
+
+    def test_exit_mode_writes_only_on_flush(self):
+        repository = HouseRepository(self.file_path, journal=True, durability="exit")
+        with patch.object(repository.file_manager, "save", wraps=repository.file_manager.save) as save:
+            self.add_apartments(repository, 5)
+            save.assert_not_called()
+            repository.close()
+            save.assert_called_once()
+        self.assertEqual(len(HouseRepository(self.file_path, journal=True).data["apartments"]), 5)
+
+    def test_group_mode_coalesces_writes_in_background(self):
+        repository = HouseRepository(self.file_path, journal=True, durability="group", flush_interval=0.5)
+        with patch.object(repository.file_manager, "save", wraps=repository.file_manager.save) as save:
+            self.add_apartments(repository, 20)
+            deadline = time.monotonic() + 2
+            while repository._pending_changes and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(save.call_count, 1)
+        repository.close()
+        self.assertEqual(len(HouseRepository(self.file_path, journal=True).data["apartments"]), 20)
+
+    def test_group_mode_flushes_after_enough_changes(self):
+        repository = HouseRepository(self.file_path, journal=True, durability="group",
+                                     flush_interval=60, flush_changes=3)
+        self.add_apartments(repository, 3)
+        deadline = time.monotonic() + 2
+        while repository._pending_changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(repository._pending_changes, [])
+        repository.close()
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            HouseRepository(self.file_path, durability="sometimes")
+
+
+class TestStreamingFormat(unittest.TestCase):
+    def setUp(self):
+        self.file_path = empty_house_file(self)
+        self.data = {
+            "version": 12345, "format": 2,
+            "residents": [{"tax_id": str(100000000 + i), "name": f"Мешканець \"{i}\"", "apartment": str(i % 3 or "")}
+                          for i in range(50)],
+            "apartments": [{"number": str(i), "entrance": "1", "floors": "9", "floor": str(i % 9), "rooms": "2",
+                            "residents": []} for i in range(20)],
+            "meta": {"nested": [1, 2.5, None, True]}
+        }
+
+    def test_reader_matches_json_load_across_chunk_boundaries(self):
+        text = json.dumps(self.data, ensure_ascii=False, indent=4)
+        for chunk_size in (1, 7, 64, 1 << 16):
+            decoded = {"residents": [], "apartments": []}
+            for key, value in JsonStreamReader(io.StringIO(text), chunk_size).items():
+                if key in ("residents", "apartments"):
+                    decoded[key].append(value)
+                else:
+                    decoded[key] = value
+            self.assertEqual(decoded, self.data)
+
+    def test_numbers_split_across_chunks(self):
+        data = {"version": -1.5e3, "ratio": 2.5E-2, "format": 10, "meta": [-0.125, 1e2], "residents": [7, -3.75]}
+        text = json.dumps(data)
+        for chunk_size in range(1, 9):
+            decoded = list(JsonStreamReader(io.StringIO(text), chunk_size).items())
+            self.assertEqual(decoded, [("version", -1500.0), ("ratio", 0.025), ("format", 10),
+                                       ("meta", [-0.125, 100.0]), ("residents", 7), ("residents", -3.75)],
+                             chunk_size)
+
+    def test_writer_output_is_plain_json(self):
+        stream = io.StringIO()
+        write_json_stream(self.data, stream)
+        self.assertEqual(json.loads(stream.getvalue()), self.data)
+        self.assertIsNotNone(VERSION_PATTERN.match(stream.getvalue()))
+
+    def test_streaming_repository_round_trip(self):
+        repository = HouseRepository(self.file_path, journal=True, streaming=True)
+        repository.add_apartment(Apartment("1", "1", "5", "1", "2"))
+        repository.add_resident(Resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "a@b.cc", ""))
+        repository.assign_resident_to_apartment("123456789", "1")
+        repository.file_manager.compact(repository.data)
+
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)["residents"][0]["apartment"], "1")
+        reloaded = HouseRepository(self.file_path, streaming=True)
+        self.assertIsInstance(reloaded.data["residents"][0], Resident)
+        self.assertEqual(reloaded.find_apartment_by_number("1")["residents"], ["123456789"])
+
+    def test_truncated_file_loads_empty_data(self):
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(self.data)[:-40])
+        with patch('builtins.print'):
+            data = FileManager(self.file_path, streaming=True).load()
+        self.assertEqual(data, {"residents": [], "apartments": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from exam4_3 import Apartment, HouseManagementService, HouseRepository
+from house_sqlite import SqliteHouseRepository, SqliteStorage, export_json, import_json
+
+
+class TestSqliteBackend(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.temp_dir.name, "house.json")
+        self.db_path = os.path.join(self.temp_dir.name, "house.db")
+        # Дані у старому форматі - з вкладеними мешканцями
+        resident = {"name": "Петро", "tax_id": "321654987", "birthdate": "1956-12-05", "phone": "066-458-77-11",
+                    "email": "petro@ukr.net", "additional_info": "", "apartment": "2"}
+        with open(self.json_path, 'w', encoding='utf-8') as file:
+            json.dump({"residents": [resident],
+                       "apartments": [{"number": "2", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2",
+                                       "residents": [resident]},
+                                      {"number": "10", "entrance": "2", "floors": "5", "floor": "3", "rooms": "3",
+                                       "residents": []}]}, file)
+        import_json(self.json_path, self.db_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_service_works_on_sqlite_repository(self):
+        repository = SqliteHouseRepository(self.db_path)
+        service = HouseManagementService(repository)
+        with redirect_stdout(io.StringIO()):
+            service.add_resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "andre@gmail.com", "")
+            service.assign_resident_to_apartment("123456789", "10")
+            service.remove_apartment("2")
+
+        self.assertEqual(repository.find_apartment_by_number("10")["residents"], ["123456789"])
+        self.assertIsNone(repository.find_resident_by_tax_id("321654987")["apartment"])
+        self.assertEqual([row["tax_id"] for row in service.iter_unassigned_residents()], ["321654987"])
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            service.report_residents_by_apartment()
+        self.assertIn("Квартира 10:\n  - Андрій, ІПН: 123456789", output.getvalue())
+        repository.close()
+
+    def test_batch_rolls_back_on_error(self):
+        repository = SqliteHouseRepository(self.db_path)
+        with self.assertRaises(RuntimeError):
+            with repository.batch():
+                repository.unassign_resident_from_apartment("321654987")
+                raise RuntimeError("збій")
+        self.assertEqual(repository.find_resident_by_tax_id("321654987")["apartment"], "2")
+        repository.close()
+
+    def test_house_repository_on_sqlite_storage_and_export(self):
+        repository = HouseRepository(self.db_path, storage=SqliteStorage(self.db_path))
+        with redirect_stdout(io.StringIO()):
+            repository.unassign_resident_from_apartment("321654987")
+        export_json(self.db_path, self.json_path)
+        with open(self.json_path, encoding='utf-8') as file:
+            data = json.load(file)
+        self.assertEqual([a["number"] for a in data["apartments"]], ["2", "10"])
+        self.assertEqual(data["apartments"][0]["residents"], [])
+        self.assertIsNone(data["residents"][0]["apartment"])
+
+    def test_search_and_query_match_house_repository(self):
+        repository = SqliteHouseRepository(self.db_path)
+        service = HouseManagementService(repository)
+        with redirect_stdout(io.StringIO()):
+            service.add_resident("Олена Петренко", "123456789", "1990-01-01", "+38-050-123-45-67",
+                                 "Olena@gmail.com", "")
+            service.assign_resident_to_apartment("123456789", "10")
+            rows = service.search_residents("пет")
+        self.assertCountEqual([row["tax_id"] for row in rows], ["321654987", "123456789"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("олена пет")], ["123456789"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("olena@GMAIL.com")], ["123456789"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("050 123 45 67")], ["123456789"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("77-11")], ["321654987"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("321654987")], ["321654987"])
+        self.assertEqual(repository.search_residents("  "), [])
+
+        self.assertEqual([a["number"] for a in repository.query_apartments(floors=5)], ["2", "10"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(floor=(2, None))], ["10"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(rooms=(None, 2))], ["2"])
+        with redirect_stdout(io.StringIO()):
+            service.unassign_resident_from_apartment("321654987")
+        self.assertEqual([a["number"] for a in repository.query_apartments(vacant=True)], ["2"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(entrance=2, vacant=False)], ["10"])
+        repository.close()
+
+    def test_search_uses_indexes(self):
+        repository = SqliteHouseRepository(self.db_path)
+        plans = []
+        repository.connection.set_trace_callback(
+            lambda sql: plans.append(sql) if sql.lstrip().startswith("SELECT") else None)
+        for query in ("пет", "петро пет", "petro@ukr.net", "77-11", "066-458-77-11"):
+            repository.search_residents(query)
+        repository.connection.set_trace_callback(None)
+        for sql in plans:
+            details = [row[3] for row in repository.connection.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            self.assertFalse([d for d in details if d.startswith("SCAN resident")], (sql, details))
+        repository.close()
+
+    def test_apartment_queries_use_indexes(self):
+        repository = SqliteHouseRepository(self.db_path)
+        with redirect_stdout(io.StringIO()):
+            repository.add_apartment(Apartment("11", "", "5", "0", "1"))  # Порожній під'їзд не дорівнює 0
+        plans = []
+        repository.connection.set_trace_callback(
+            lambda sql: plans.append(sql) if sql.lstrip().startswith("SELECT") else None)
+        self.assertEqual([a["number"] for a in repository.query_apartments(entrance=(None, 1))], ["2"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(floor=(None, 1))], ["2", "11"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(entrance=2, floor=(2, 5))], ["10"])
+        self.assertEqual([a["number"] for a in repository.query_apartments(rooms=(2, None))], ["2", "10"])
+        repository.connection.set_trace_callback(None)
+        for sql in plans:
+            details = [row[3] for row in repository.connection.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            self.assertTrue(details[0].startswith("SEARCH apartments USING INDEX"), (sql, details))
+        repository.close()
+
+    def test_old_database_gets_search_keys(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript("DROP INDEX residents_phone; ALTER TABLE residents DROP COLUMN phone_reversed; "
+                                 "DROP TABLE resident_words;")
+        connection.close()
+        repository = SqliteHouseRepository(self.db_path)
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("петро")], ["321654987"])
+        self.assertEqual([r["tax_id"] for r in repository.search_residents("7711")], ["321654987"])
+        repository.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
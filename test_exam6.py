@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock
+
+from exam4_3 import HouseRepository, ReportCache
+from house_analytics import OccupancyAnalytics, np, occupancy_summary
+
+
+class TestOccupancyAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.repository = MagicMock(spec=HouseRepository)
+        self.repository.iter_apartments.side_effect = lambda: iter([
+            {"number": "1", "entrance": 1, "floor": 1, "rooms": 1, "residents": ["1", "2", "3"]},
+            {"number": "2", "entrance": 1, "floor": 2, "rooms": 3, "residents": ["4"]},
+            {"number": "3", "entrance": 2, "floor": 1, "rooms": 2, "residents": []},
+        ])
+        self.repository.iter_residents.side_effect = lambda: iter([
+            {"birthdate": "1956-12-05"}, {"birthdate": "1999-10-30"},
+            {"birthdate": "1990-01-01"}, {"birthdate": "2020-05-15"},
+        ])
+
+    def check_aggregates(self, analytics):
+        self.assertEqual(analytics.occupancy_by_entrance(),
+                         {1: {"apartments": 2, "residents": 4}, 2: {"apartments": 1, "residents": 0}})
+        self.assertEqual(analytics.occupancy_by_floor(),
+                         {1: {"apartments": 2, "residents": 3}, 2: {"apartments": 1, "residents": 1}})
+        self.assertEqual(analytics.residents_per_room(), {"residents": 4, "rooms": 6, "ratio": 4 / 6})
+        self.assertEqual(analytics.age_distribution(year=2024), {"0-9": 1, "20-29": 1, "30-39": 1, "60-69": 1})
+        self.assertEqual(analytics.overcrowded_units(), ["1"])
+        self.assertEqual(analytics.empty_units(), ["3"])
+
+    def test_pure_python_aggregates(self):
+        self.check_aggregates(OccupancyAnalytics(self.repository, use_numpy=False))
+
+    @unittest.skipIf(np is None, "NumPy не встановлено")
+    def test_numpy_aggregates(self):
+        self.check_aggregates(OccupancyAnalytics(self.repository, use_numpy=True))
+
+    def test_summary_is_cached_per_revision(self):
+        cache = ReportCache()
+        self.repository.revision = 1
+        first = occupancy_summary(self.repository, cache, year=2024, use_numpy=False)
+        self.assertIs(occupancy_summary(self.repository, cache, year=2024, use_numpy=False), first)
+        self.assertEqual(self.repository.iter_apartments.call_count, 1)
+        self.repository.revision = 2
+        self.assertEqual(occupancy_summary(self.repository, cache, year=2024, use_numpy=False), first)
+        self.assertEqual(self.repository.iter_apartments.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import io
+import json
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from exam4_3 import HouseManagementService, HouseRepository
+from exam_fixtures import empty_house_file
+from house_server import HouseApiServer
+
+
+async def request(port, method, path, payload=None):
+    """Надсилає один HTTP-запит і повертає (статус, JSON-відповідь)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+class TestHouseApiServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.file_path = empty_house_file(self)
+        self.repository = HouseRepository(self.file_path, journal=True)
+        self.server = HouseApiServer(HouseManagementService(self.repository), flush_delay=0.05)
+        await self.server.start(port=0)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_crud_assignment_and_reports(self):
+        port = self.server.port
+        status, result = await request(port, "POST", "/apartments", {
+            "number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"})
+        self.assertEqual(status, 201)
+        status, result = await request(port, "POST", "/residents", [
+            {"name": "Андрій", "tax_id": "123456789", "birthdate": "1990-01-01",
+             "phone": "050-123-45-67", "email": "andre@gmail.com"},
+            {"name": "Олена", "tax_id": "1", "birthdate": "1990-01-01", "phone": "1", "email": "x"}])
+        self.assertEqual(status, 207)
+        self.assertEqual(len(result["rejected"]), 1)
+
+        status, _ = await request(port, "POST", "/assignments", {"tax_id": "123456789", "apartment": "1"})
+        self.assertEqual(status, 201)
+        status, resident = await request(port, "GET", "/residents/123456789")
+        self.assertEqual((status, resident["apartment"]), (200, "1"))
+        status, rows = await request(port, "GET", "/reports/residents-by-apartment?entrance=1")
+        self.assertEqual(rows, [{"number": "1", "residents": [{"name": "Андрій", "tax_id": "123456789"}]}])
+
+        status, _ = await request(port, "DELETE", "/assignments/123456789")
+        self.assertEqual(status, 200)
+        status, _ = await request(port, "DELETE", "/assignments/123456789")
+        self.assertEqual(status, 409)
+        status, rows = await request(port, "GET", "/reports/unassigned")
+        self.assertEqual([row["tax_id"] for row in rows], ["123456789"])
+
+        status, _ = await request(port, "DELETE", "/residents/123456789")
+        self.assertEqual(status, 200)
+        status, _ = await request(port, "GET", "/residents/123456789")
+        self.assertEqual(status, 404)
+        status, _ = await request(port, "GET", "/unknown")
+        self.assertEqual(status, 404)
+
+    async def test_concurrent_writes_are_coalesced(self):
+        # Багато одночасних запитів - кілька збережень на диск, а не по одному на запит
+        with patch.object(self.repository.file_manager, "save",
+                          wraps=self.repository.file_manager.save) as save:
+            statuses = await asyncio.gather(*(
+                request(self.server.port, "POST", "/apartments", {
+                    "number": str(number), "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"})
+                for number in range(1, 51)))
+            await asyncio.sleep(0.2)
+            self.assertTrue(all(status == 201 for status, _ in statuses))
+            self.assertLess(save.call_count, 10)
+
+        reloaded = HouseRepository(self.file_path, journal=True)
+        self.assertEqual(len(list(reloaded.iter_apartments())), 50)
+
+    async def test_malformed_bodies_are_rejected(self):
+        port = self.server.port
+        for path in ("/residents", "/apartments", "/assignments"):
+            for payload in (5, "x", [1], [], None):
+                status, result = await request(port, "POST", path, payload)
+                self.assertEqual(status, 400, (path, payload))
+                self.assertIn("error", result)
+        # Сервер продовжує працювати після некоректних запитів
+        status, _ = await request(port, "GET", "/residents")
+        self.assertEqual(status, 200)
+
+    async def test_reads_do_not_interleave_with_writes(self):
+        async def add(number):
+            return await request(self.server.port, "POST", "/apartments", {
+                "number": str(number), "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"})
+
+        results = await asyncio.gather(*(add(n) if n % 2 else request(self.server.port, "GET", "/apartments")
+                                         for n in range(1, 61)))
+        for status, rows in results:
+            if isinstance(rows, list):
+                numbers = [int(row["number"]) for row in rows]
+                self.assertEqual(numbers, sorted(set(numbers)))  # Без пропусків, повторів і зсувів
+
+    async def test_reads_are_served_during_slow_flush(self):
+        port = self.server.port
+        started, release = threading.Event(), threading.Event()
+        save = self.repository.file_manager.save
+
+        def slow_save(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return save(*args, **kwargs)
+
+        with patch.object(self.repository.file_manager, "save", side_effect=slow_save):
+            await request(port, "POST", "/apartments", {
+                "number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"})
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            # Запис на диск ще триває, а читання не чекають на нього
+            statuses = await asyncio.wait_for(asyncio.gather(
+                *(request(port, "GET", "/apartments/1") for _ in range(5))), 2)
+            release.set()
+        self.assertEqual([status for status, _ in statuses], [200] * 5)
+
+    async def test_failed_flush_is_reported_and_retried(self):
+        output = io.StringIO()
+        with patch.object(self.repository.file_manager, "save",
+                          side_effect=[OSError("disk full"), None]) as save, redirect_stdout(output):
+            await request(self.server.port, "POST", "/apartments", {
+                "number": "1", "entrance": "1", "floors": "5", "floor": "1", "rooms": "2"})
+            await asyncio.sleep(0.3)
+        self.assertIn("Помилка збереження змін: disk full", output.getvalue())
+        self.assertEqual(save.call_count, 2)
+        self.assertEqual(self.repository._pending_changes, [])
+
+    async def test_checks_run_with_mutations_on_writer_thread(self):
+        threads = set()
+        find = self.repository.find_resident_by_tax_id
+
+        def recording_find(tax_id):
+            threads.add(threading.current_thread().name)
+            return find(tax_id)
+
+        with patch.object(self.repository, "find_resident_by_tax_id", side_effect=recording_find):
+            status, _ = await request(self.server.port, "DELETE", "/residents/123456789")
+            self.assertEqual(status, 404)
+            status, _ = await request(self.server.port, "DELETE", "/assignments/123456789")
+            self.assertEqual(status, 404)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith("house-writer") for name in threads), threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
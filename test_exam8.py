@@ -0,0 +1,57 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from exam4_3 import Validator
+from house_bench import (OPERATIONS, REPORTS, compare, generate_operations, main, read_operations,
+                         run_benchmark, stream_path, summarize, synthetic_house, write_operations)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_house_is_valid_and_consistent(self):
+        data = synthetic_house(100)
+        self.assertEqual(len(data["residents"]), 100)
+        self.assertTrue(all(not check["errors"] for check in Validator.validate_many(data["residents"])))
+        assigned = sum(len(apartment["residents"]) for apartment in data["apartments"])
+        self.assertEqual(assigned, sum(1 for r in data["residents"] if r["apartment"]))
+
+    def test_operation_stream_round_trip(self):
+        operations = list(generate_operations(100, 50, seed=1))
+        self.assertTrue(all(operation["op"] in OPERATIONS for operation in operations))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "ops.jsonl")
+            write_operations(path, operations)
+            self.assertEqual(list(read_operations(path)), operations)
+
+    def test_write_stream_keeps_one_file_per_size(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "ops.jsonl")
+            argv = ["house_bench.py", "--sizes", "50", "60", "--ops", "20", "--report-repeat", "1",
+                    "--write-stream", path, "--output", os.path.join(temp_dir, "results.json")]
+            with mock.patch("sys.argv", argv), redirect_stdout(io.StringIO()):
+                main()
+            for size in (50, 60):
+                self.assertEqual(list(read_operations(stream_path(path, size))),
+                                 list(generate_operations(size, 20, 0)))
+        self.assertEqual(stream_path("bench/ops.jsonl", 1000), "bench/ops.1000.jsonl")
+
+    def test_run_reports_latency_per_operation_and_report(self):
+        run = run_benchmark(100, list(generate_operations(100, 200)), report_repeat=1)
+        self.assertEqual(run["operations_total"]["count"], 200)
+        self.assertEqual(set(run["reports"]), set(REPORTS))
+        for stats in run["operations"].values():
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        self.assertTrue(all(ratio == 1.0 for ratio in compare({"runs": [run]}, {"runs": [run]})[100].values()))
+
+    def test_summarize_percentiles(self):
+        stats = summarize([0.001 * i for i in range(1, 101)])
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["p50_ms"], 51.0)
+        self.assertAlmostEqual(stats["p99_ms"], 99.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from exam4_3 import HouseManagementService, HouseRepository, Instrumentation, TextSink, profiler
+from exam_fixtures import empty_house_file
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.file_path = empty_house_file(self)
+        self.service = HouseManagementService(HouseRepository(self.file_path, journal=True))
+        profiler.reset()
+
+    def tearDown(self):
+        profiler.enabled = False
+        profiler.reset()
+
+    def _populate(self):
+        with redirect_stdout(io.StringIO()):
+            self.service.add_apartment("1", "1", "5", "1", "2")
+            self.service.add_resident("Андрій", "123456789", "1990-01-01", "050-123-45-67", "andre@gmail.com", "")
+            self.service.assign_resident_to_apartment("123456789", "1")
+
+    def test_disabled_profiler_collects_nothing(self):
+        self._populate()
+        self.assertEqual(profiler.snapshot(), {"stages": {}, "counters": {}})
+
+    def test_enabled_profiler_records_stages_and_counters(self):
+        profiler.enabled = True
+        self._populate()
+        self.service.generate_report_residents(sink=TextSink(io.StringIO()))
+
+        snapshot = profiler.snapshot()
+        for stage in ("service.validation", "service.assign_resident_to_apartment", "repository.lookup",
+                      "repository.sort", "repository.save", "report.residents"):
+            self.assertIn(stage, snapshot["stages"])
+        self.assertEqual(snapshot["stages"]["repository.save"]["calls"], 3)
+        self.assertEqual(snapshot["counters"]["bytes_written"], os.path.getsize(self.service.repository.file_manager.journal_path))
+        self.assertEqual(snapshot["counters"]["records_scanned"], 1)
+
+    def test_dump_writes_json(self):
+        instrumentation = Instrumentation(enabled=True)
+        with instrumentation.stage("work"):
+            instrumentation.count("items", 3)
+        path = os.path.join(self.temp_dir.name, "profile.json")
+        instrumentation.dump(path)
+        with open(path, encoding='utf-8') as file:
+            dumped = json.load(file)
+        self.assertEqual(dumped["stages"]["work"]["calls"], 1)
+        self.assertEqual(dumped["counters"], {"items": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()